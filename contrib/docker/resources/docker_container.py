@@ -15,6 +15,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
+
+import eventlet
+from oslo.config import cfg
+
 from heat.engine import properties
 from heat.engine import resource
 from heat.openstack.common import log as logging
@@ -22,6 +27,18 @@ from heat.openstack.common.gettextutils import _
 
 logger = logging.getLogger(__name__)
 
+docker_opts = [
+    cfg.BoolOpt('docker_track_events',
+                default=False,
+                help=_('Follow the event stream of each Docker daemon to '
+                       'track container state changes, rather than '
+                       'inspecting containers while waiting for them to '
+                       'start or stop.'))]
+
+cfg.CONF.register_opts(docker_opts)
+
+EVENT_STREAM_RETRY_INTERVAL = 5
+
 DOCKER_INSTALLED = False
 # conditionally import so tests can work without having the dependency
 # satisfied
@@ -31,6 +48,62 @@ try:
 except ImportError:
     docker = None
 
+# Clients and event watchers shared by all containers, keyed by endpoint
+_clients = {}
+_watchers = {}
+
+
+def _new_client(endpoint):
+    if endpoint:
+        return docker.Client(endpoint)
+    return docker.Client()
+
+
+class ContainerEventWatcher(object):
+    '''
+    Track the running state of the containers on a Docker daemon by following
+    its event stream.
+    '''
+
+    RUNNING_EVENTS = {'start': True, 'restart': True, 'die': False}
+
+    def __init__(self, client):
+        self.client = client
+        self._running = {}
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = eventlet.spawn(self._watch)
+
+    def running(self, container_id):
+        '''
+        Return whether the container was running at the last event seen for
+        it, or None if no event has been seen since the stream was connected.
+        '''
+        return self._running.get(container_id)
+
+    def _watch(self):
+        while True:
+            try:
+                self.follow(self.client.events())
+            except Exception as ex:
+                logger.warning(_('Docker event stream failed: %s') % str(ex))
+            # Events may have been missed while disconnected
+            self._running.clear()
+            eventlet.sleep(EVENT_STREAM_RETRY_INTERVAL)
+
+    def follow(self, events):
+        for event in events:
+            if isinstance(event, basestring):
+                event = json.loads(event)
+            container_id = event.get('id')
+            status = event.get('status')
+            if status == 'destroy':
+                self._running.pop(container_id, None)
+            elif status in self.RUNNING_EVENTS:
+                self._running[container_id] = self.RUNNING_EVENTS[status]
+
 
 class DockerContainer(resource.Resource):
 
@@ -138,14 +211,23 @@ class DockerContainer(resource.Resource):
         'logs_tail': _('Container last logs line')
     }
 
+    volatile_attributes = ('info', 'logs', 'logs_head', 'logs_tail')
+
     def get_client(self):
-        client = None
-        if DOCKER_INSTALLED:
-            endpoint = self.properties.get('docker_endpoint')
-            if endpoint:
-                client = docker.Client(endpoint)
-            else:
-                client = docker.Client()
+        if not DOCKER_INSTALLED:
+            return None
+        endpoint = self.properties.get('docker_endpoint')
+        client = _clients.get(endpoint)
+        if client is None:
+            client = _clients[endpoint] = _new_client(endpoint)
+        if cfg.CONF.docker_track_events and endpoint not in _watchers:
+            # The event stream holds a connection open, so it needs a
+            # client of its own
+            events_client = _new_client(endpoint)
+            if hasattr(events_client, 'events'):
+                watcher = ContainerEventWatcher(events_client)
+                _watchers[endpoint] = watcher
+                watcher.start()
         return client
 
     def _parse_networkinfo_ports(self, networkinfo):
@@ -233,10 +315,18 @@ class DockerContainer(resource.Resource):
         info = client.inspect_container(container_id)
         return info['State']
 
-    def check_create_complete(self, container_id):
+    def _container_running(self, container_id):
+        watcher = _watchers.get(self.properties.get('docker_endpoint'))
+        if watcher is not None:
+            running = watcher.running(container_id)
+            if running is not None:
+                return running
         status = self._get_container_status(container_id)
         return status['Running']
 
+    def check_create_complete(self, container_id):
+        return self._container_running(container_id)
+
     def handle_delete(self):
         if self.resource_id is None:
             return
@@ -245,8 +335,7 @@ class DockerContainer(resource.Resource):
         return self.resource_id
 
     def check_delete_complete(self, container_id):
-        status = self._get_container_status(container_id)
-        return (not status['Running'])
+        return not self._container_running(container_id)
 
     def handle_suspend(self):
         if not self.resource_id:
@@ -256,8 +345,7 @@ class DockerContainer(resource.Resource):
         return self.resource_id
 
     def check_suspend_complete(self, container_id):
-        status = self._get_container_status(container_id)
-        return (not status['Running'])
+        return not self._container_running(container_id)
 
     def handle_resume(self):
         if not self.resource_id:
@@ -267,8 +355,7 @@ class DockerContainer(resource.Resource):
         return self.resource_id
 
     def check_resume_complete(self, container_id):
-        status = self._get_container_status(container_id)
-        return status['Running']
+        return self._container_running(container_id)
 
 
 def resource_mapping():
@@ -15,10 +15,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
+
+from oslo.config import cfg
+
 from heat.common import exception
 from heat.common import template_format
 from heat.engine import resource
 from heat.engine import scheduler
+from heat.openstack.common.fixture import mockpatch
 from heat.tests.common import HeatTestCase
 from heat.tests import utils
 
@@ -53,6 +58,8 @@ class DockerContainerTest(HeatTestCase):
         utils.setup_dummy_db()
         resource._register_class('OS::Docker::Container',
                                  docker_container.DockerContainer)
+        self.addCleanup(docker_container._clients.clear)
+        self.addCleanup(docker_container._watchers.clear)
 
     def create_container(self, resource_name):
         t = template_format.parse(template)
@@ -117,3 +124,59 @@ class DockerContainerTest(HeatTestCase):
         running = self.get_container_state(container)['Running']
         self.assertIs(True, running)
         self.m.VerifyAll()
+
+    def test_client_cached_per_endpoint(self):
+        t = template_format.parse(template)
+        stack = utils.parse_stack(t)
+        self.useFixture(mockpatch.PatchObject(docker_container,
+                                              'DOCKER_INSTALLED', new=True))
+        mock_docker = self.patchobject(docker_container, 'docker')
+        mock_docker.Client.side_effect = FakeDockerClient
+
+        local = docker_container.DockerContainer(
+            'Blog', t['Resources']['Blog'], stack)
+        client = local.get_client()
+        self.assertIs(client, local.get_client())
+
+        snippet = dict(t['Resources']['Blog'])
+        snippet['Properties'] = dict(snippet['Properties'],
+                                     docker_endpoint='tcp://remote:4243')
+        remote = docker_container.DockerContainer('Remote', snippet, stack)
+        remote_client = remote.get_client()
+        self.assertIsNot(client, remote_client)
+        self.assertEqual('tcp://remote:4243', remote_client._endpoint)
+        self.assertIs(client, docker_container.DockerContainer(
+            'Other', t['Resources']['Blog'], stack).get_client())
+        self.assertEqual(2, mock_docker.Client.call_count)
+        self.assertEqual({}, docker_container._watchers)
+
+    def test_event_watcher(self):
+        watcher = docker_container.ContainerEventWatcher(FakeDockerClient())
+        watcher.follow([json.dumps({'status': 'create', 'id': 'a'}),
+                        json.dumps({'status': 'start', 'id': 'a'}),
+                        {'status': 'start', 'id': 'b'},
+                        {'status': 'kill', 'id': 'b'}])
+        self.assertIs(True, watcher.running('a'))
+        self.assertIs(True, watcher.running('b'))
+        self.assertIsNone(watcher.running('c'))
+
+        watcher.follow([{'status': 'die', 'id': 'b'},
+                        {'status': 'destroy', 'id': 'a'}])
+        self.assertIsNone(watcher.running('a'))
+        self.assertIs(False, watcher.running('b'))
+
+    def test_resource_delete_tracks_events(self):
+        cfg.CONF.set_override('docker_track_events', True)
+        container = self.create_container('Blog')
+        watcher = docker_container.ContainerEventWatcher(FakeDockerClient())
+        docker_container._watchers[None] = watcher
+
+        # Without an event, fall back to inspecting the container
+        self.assertFalse(container.check_delete_complete(
+            container.resource_id))
+        watcher.follow([{'status': 'die', 'id': container.resource_id}])
+        self.assertTrue(container.check_delete_complete(
+            container.resource_id))
+        self.assertFalse(container.check_resume_complete(
+            container.resource_id))
+        self.m.VerifyAll()
@@ -10,9 +10,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import socket
-import tempfile
+import cStringIO
 
+from eventlet import tpool
 import json
 import paramiko
 from Crypto.PublicKey import RSA
@@ -206,6 +206,8 @@ zypper --non-interactive in cloud-init python-boto python-pip gcc python-devel
         self._private_ip = None
         self._flavor = None
         self._image = None
+        self._pkey = None
+        self._configure_task = None
 
     @property
     def server(self):
@@ -260,6 +262,7 @@ zypper --non-interactive in cloud-init python-boto python-pip gcc python-devel
     def private_key(self, private_key):
         """Save the resource's private SSH key to the database."""
         self._private_key = private_key
+        self._pkey = None
         if self.id is not None:
             db_api.resource_data_set(self, 'private_key', private_key, True)
 
@@ -307,50 +310,80 @@ zypper --non-interactive in cloud-init python-boto python-pip gcc python-devel
             return {'Error': "user_data/metadata are not supported for image"
                     " %s." % self.properties[self.IMAGE]}
 
-    def _run_ssh_command(self, command):
-        """Run a shell command on the Cloud Server via SSH."""
-        with tempfile.NamedTemporaryFile() as private_key_file:
-            private_key_file.write(self.private_key)
-            private_key_file.seek(0)
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.MissingHostKeyPolicy())
-            ssh.connect(self.public_ip,
-                        username="root",
-                        key_filename=private_key_file.name)
-            chan = ssh.get_transport().open_session()
-            chan.settimeout(self.stack.timeout_mins * 60.0)
-            chan.exec_command(command)
-            try:
-                # The channel timeout only works for read/write operations
-                chan.recv(1024)
-            except socket.timeout:
-                raise exception.Error("SSH command timed out after %s minutes"
-                                      % self.stack.timeout_mins)
-            else:
-                return chan.recv_exit_status()
-            finally:
-                ssh.close()
-                chan.close()
+    @property
+    def pkey(self):
+        """Return the private SSH key for the resource, parsed for paramiko.
 
-    def _sftp_files(self, files):
+        Parsing is CPU-bound, so it is done in a native thread to avoid
+        stalling the engine's other green threads.
+        """
+        if self._pkey is None:
+            self._pkey = tpool.execute(paramiko.RSAKey.from_private_key,
+                                       cStringIO.StringIO(self.private_key))
+        return self._pkey
+
+    def _ssh_connect(self):
+        """Open an SSH connection to the Cloud Server as root."""
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.MissingHostKeyPolicy())
+        ssh.connect(self.public_ip, username="root", pkey=self.pkey)
+        return ssh
+
+    def _sftp_files(self, ssh, files):
         """Transfer files to the Cloud Server via SFTP."""
-        with tempfile.NamedTemporaryFile() as private_key_file:
-            private_key_file.write(self.private_key)
-            private_key_file.seek(0)
-            pkey = paramiko.RSAKey.from_private_key_file(private_key_file.name)
-            transport = paramiko.Transport((self.public_ip, 22))
-            transport.connect(hostkey=None, username="root", pkey=pkey)
-            sftp = paramiko.SFTPClient.from_transport(transport)
+        sftp = ssh.open_sftp()
+        try:
+            for remote_file in files:
+                sftp_file = sftp.open(remote_file['path'], 'w')
+                sftp_file.write(remote_file['data'])
+                sftp_file.close()
+        finally:
+            sftp.close()
+
+    def _configure_server(self, files, command, check_exit_status):
+        """Transfer files to the Cloud Server and then run a command on it.
+
+        This is a task that uses a single SSH connection for both, and
+        yields while waiting for the command to complete rather than
+        blocking in a read from the channel. The command's exit status is
+        passed to check_exit_status().
+        """
+        ssh = self._ssh_connect()
+        try:
+            self._sftp_files(ssh, files)
+
+            chan = ssh.get_transport().open_session()
             try:
-                for remote_file in files:
-                    sftp_file = sftp.open(remote_file['path'], 'w')
-                    sftp_file.write(remote_file['data'])
-                    sftp_file.close()
-            except:
-                raise
+                chan.exec_command(command)
+                try:
+                    while not chan.exit_status_ready():
+                        yield
+                except scheduler.Timeout:
+                    raise exception.Error("SSH command timed out after %s "
+                                          "minutes" % self.stack.timeout_mins)
+                exit_code = chan.recv_exit_status()
             finally:
-                sftp.close()
-                transport.close()
+                chan.close()
+        finally:
+            ssh.close()
+
+        check_exit_status(exit_code)
+
+    def _check_heat_script_status(self, exit_code):
+        if exit_code == 42:
+            raise exception.Error(self.script_error_msg %
+                                  {'path': "cfn-userdata",
+                                   'log': "/root/cfn-userdata.log"})
+        elif exit_code != 0:
+            raise exception.Error(self.script_error_msg %
+                                  {'path': "heat-script.sh",
+                                   'log': "/root/heat-script.log"})
+
+    def _check_cfn_userdata_status(self, exit_code):
+        if exit_code != 0:
+            raise exception.Error(self.script_error_msg %
+                                  {'path': "cfn-userdata",
+                                   'log': "/root/cfn-userdata.log"})
 
     def handle_create(self):
         """Create a Rackspace Cloud Servers container.
@@ -359,11 +392,12 @@ zypper --non-interactive in cloud-init python-boto python-pip gcc python-devel
         running, so we have to transfer the user-data file to the
         server and then trigger cloud-init.
         """
-        # Generate SSH public/private keypair
+        # Generate SSH public/private keypair. This is CPU-bound, so it is
+        # done in a native thread to avoid stalling other green threads.
         if self._private_key is not None:
-            rsa = RSA.importKey(self._private_key)
+            rsa = tpool.execute(RSA.importKey, self._private_key)
         else:
-            rsa = RSA.generate(1024)
+            rsa = tpool.execute(RSA.generate, 1024)
         self.private_key = rsa.exportKey()
         public_keys = [rsa.publickey().exportKey('OpenSSH')]
         if self.properties.get(self.KEY_NAME):
@@ -423,6 +457,9 @@ zypper --non-interactive in cloud-init python-boto python-pip gcc python-devel
 
     def check_create_complete(self, cookie):
         """Check if server creation is complete and handle server configs."""
+        if self._configure_task is not None:
+            return self._configure_task.step()
+
         if not super(CloudServer, self).check_create_complete(cookie):
             return False
 
@@ -491,19 +528,14 @@ zypper --non-interactive in cloud-init python-boto python-pip gcc python-devel
 
             files = [{'path': "/tmp/userdata", 'data': userdata},
                      {'path': "/root/heat-script.sh", 'data': self.script}]
-            self._sftp_files(files)
 
             # Connect via SSH and run script
             cmd = "bash -ex /root/heat-script.sh > /root/heat-script.log 2>&1"
-            exit_code = self._run_ssh_command(cmd)
-            if exit_code == 42:
-                raise exception.Error(self.script_error_msg %
-                                      {'path': "cfn-userdata",
-                                       'log': "/root/cfn-userdata.log"})
-            elif exit_code != 0:
-                raise exception.Error(self.script_error_msg %
-                                      {'path': "heat-script.sh",
-                                       'log': "/root/heat-script.log"})
+            self._configure_task = scheduler.TaskRunner(
+                self._configure_server, files, cmd,
+                self._check_heat_script_status)
+            self._configure_task.start(timeout=self.stack.timeout_secs())
+            return self._configure_task.done()
 
         return True
 
@@ -537,15 +569,13 @@ zypper --non-interactive in cloud-init python-boto python-pip gcc python-devel
 
             files = [{'path': "/var/cache/heat-cfntools/last_metadata",
                       'data': metadata_string}]
-            self._sftp_files(files)
 
             command = "bash -x /var/lib/cloud/data/cfn-userdata > " + \
                       "/root/cfn-userdata.log 2>&1"
-            exit_code = self._run_ssh_command(command)
-            if exit_code != 0:
-                raise exception.Error(self.script_error_msg %
-                                      {'path': "cfn-userdata",
-                                       'log': "/root/cfn-userdata.log"})
+            configure = scheduler.TaskRunner(self._configure_server,
+                                             files, command,
+                                             self._check_cfn_userdata_status)
+            configure(timeout=self.stack.timeout_secs())
 
         if self.FLAVOR in prop_diff:
             flav = json_snippet['Properties'][self.FLAVOR]
@@ -103,35 +103,29 @@ class RackspaceCloudServerTest(HeatTestCase):
         paramiko.MissingHostKeyPolicy()
         ssh.set_missing_host_key_policy(None)
         ssh.connect(mox.IgnoreArg(),
-                    key_filename=mox.IgnoreArg(),
+                    pkey=mox.IsA(paramiko.RSAKey),
                     username='root')
+
+        # SFTP over the same connection
+        sftp = self.m.CreateMockAnything()
+        ssh.open_sftp().AndReturn(sftp)
+        sftp_file = self.m.CreateMockAnything()
+        sftp.open(mox.IgnoreArg(), 'w').MultipleTimes().AndReturn(sftp_file)
+        sftp_file.write(mox.IgnoreArg()).MultipleTimes()
+        sftp_file.close().MultipleTimes()
+        sftp.close()
+
         fake_chan = self.m.CreateMockAnything()
-        self.m.StubOutWithMock(paramiko.SSHClient, "get_transport")
         chan = ssh.get_transport().AndReturn(fake_chan)
         fake_chan_session = self.m.CreateMockAnything()
         chan_session = chan.open_session().AndReturn(fake_chan_session)
-        fake_chan_session.settimeout(3600.0)
         chan_session.exec_command(mox.IgnoreArg())
-        fake_chan_session.recv(1024)
+        chan_session.exit_status_ready().AndReturn(False)
+        chan_session.exit_status_ready().AndReturn(True)
         chan_session.recv_exit_status().AndReturn(exit_code)
         fake_chan_session.close()
         ssh.close()
 
-        # SFTP
-        self.m.StubOutWithMock(paramiko, "Transport")
-        transport = self.m.CreateMockAnything()
-        paramiko.Transport((mox.IgnoreArg(), 22)).AndReturn(transport)
-        transport.connect(hostkey=None, username="root", pkey=mox.IgnoreArg())
-        sftp = self.m.CreateMockAnything()
-        self.m.StubOutWithMock(paramiko, "SFTPClient")
-        paramiko.SFTPClient.from_transport(transport).AndReturn(sftp)
-        sftp_file = self.m.CreateMockAnything()
-        sftp.open(mox.IgnoreArg(), 'w').MultipleTimes().AndReturn(sftp_file)
-        sftp_file.write(mox.IgnoreArg()).MultipleTimes()
-        sftp_file.close().MultipleTimes()
-        sftp.close()
-        transport.close()
-
     def _setup_test_cs(self, return_server, name, exit_code=0):
         stack_name = '%s_stack' % name
         (t, stack) = self._setup_test_stack(stack_name)
@@ -458,6 +452,22 @@ class RackspaceCloudServerTest(HeatTestCase):
         # Test private_key property returns decrypted value
         self.assertEqual("fake private key", cs.private_key)
 
+    def test_pkey(self):
+        stack_name = 'test_pkey'
+        (t, stack) = self._setup_test_stack(stack_name)
+        cs = cloud_server.CloudServer('cs_pkey',
+                                      t['Resources']['WebServer'],
+                                      stack)
+        cs.private_key = rsa_key
+
+        pkey = cs.pkey
+        self.assertIsInstance(pkey, paramiko.RSAKey)
+        self.assertIs(pkey, cs.pkey)
+
+        # Setting a new private key discards the parsed one
+        cs.private_key = rsa_key
+        self.assertIsNot(pkey, cs.pkey)
+
     def test_rackconnect_deployed(self):
         return_server = self.fc.servers.list()[1]
         return_server.metadata = {'rackconnect_automation_status': 'DEPLOYED'}
@@ -25,6 +25,7 @@ from heat.common import wsgi
 from heat.openstack.common import jsonutils as json
 from oslo.config import cfg
 from heat.openstack.common import importutils
+from heat.openstack.common import timeutils
 
 import webob
 from heat.api.aws import exception
@@ -46,10 +47,24 @@ opts = [
                 default=[],
                 help=_('Allowed keystone endpoints for auth_uri when '
                        'multi_cloud is enabled. At least one endpoint needs '
-                       'to be specified.'))
+                       'to be specified.')),
+    cfg.IntOpt('cache_ttl',
+               default=30,
+               help=_('Number of seconds for which a successful validation '
+                      'of a signed request is cached, so that identical '
+                      'requests are not validated with keystone again. '
+                      'Set to 0 to disable caching.')),
+    cfg.IntOpt('negative_cache_ttl',
+               default=5,
+               help=_('Number of seconds for which a failed validation of a '
+                      'signed request is cached. Set to 0 to disable.'))
 ]
 cfg.CONF.register_opts(opts, group='ec2authtoken')
 
+# Maximum number of cached validation results, and of access keys for which
+# the auth_uri that last succeeded is remembered
+CACHE_SIZE = 1000
+
 
 class EC2Token(wsgi.Middleware):
     """Authenticate an EC2 request with keystone and convert to token."""
@@ -57,6 +72,10 @@ class EC2Token(wsgi.Middleware):
     def __init__(self, app, conf):
         self.conf = conf
         self.application = app
+        # Reuse connections to keystone between requests
+        self._session = requests.Session()
+        self._cache = {}
+        self._last_auth_uri = {}
 
     def _conf_get(self, name):
         # try config from paste-deploy first
@@ -127,7 +146,7 @@ class EC2Token(wsgi.Middleware):
             # 1. AWSAccessKeyId is a randomly generated sequence
             # 2. No secret is transferred to validate a request
             last_failure = None
-            for auth_uri in self._conf_get('allowed_auth_uris'):
+            for auth_uri in self._auth_uris(self._get_access(req)):
                 try:
                     logger.debug(_("Attempt authorize on %s") % auth_uri)
                     return self._authorize(req, auth_uri)
@@ -136,6 +155,94 @@ class EC2Token(wsgi.Middleware):
                     last_failure = e
             raise last_failure or exception.HeatAccessDeniedError()
 
+    def _auth_uris(self, access):
+        """
+        Return the allowed auth_uris in the order they should be tried for
+        the given access key, starting with the last one that succeeded.
+        """
+        auth_uris = list(self._conf_get('allowed_auth_uris'))
+        last = self._last_auth_uri.get(access)
+        if last in auth_uris:
+            auth_uris.remove(last)
+            auth_uris.insert(0, last)
+        return auth_uris
+
+    def _cache_result(self, key, ttl, result=None, error=None):
+        if ttl <= 0:
+            return
+        now = timeutils.utcnow_ts()
+        if len(self._cache) >= CACHE_SIZE:
+            for k, (expires, r, e) in self._cache.items():
+                if expires <= now:
+                    del self._cache[k]
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+        self._cache[key] = (now + ttl, result, error)
+
+    def _validate(self, keystone_ec2_uri, creds_json):
+        """
+        Validate the credentials with keystone and return a dict of the token
+        ID, tenant name, tenant ID and roles, or raise the appropriate AWS
+        error.
+
+        The outcome is cached for a short time, keyed by a digest of the
+        whole validation request, so that identical signed requests (as sent
+        repeatedly by in-instance tools) are not all checked with keystone.
+        """
+        key = hashlib.sha256('%s\n%s' % (keystone_ec2_uri,
+                                         creds_json)).hexdigest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires, result, error = cached
+            if expires > timeutils.utcnow_ts():
+                logger.info(_("Using cached AWS authentication result."))
+                if error is not None:
+                    raise error()
+                return result
+            del self._cache[key]
+
+        headers = {'Content-Type': 'application/json'}
+        logger.info(_('Authenticating with %s') % keystone_ec2_uri)
+        response = self._session.post(keystone_ec2_uri, data=creds_json,
+                                      headers=headers)
+        result = response.json()
+        try:
+            token = result['access']['token']
+            auth = {'token_id': token['id'],
+                    'tenant': token['tenant']['name'],
+                    'tenant_id': token['tenant']['id'],
+                    'roles': result['access'].get('metadata',
+                                                  {}).get('roles', [])}
+            logger.info(_("AWS authentication successful."))
+        except (AttributeError, KeyError):
+            logger.info(_("AWS authentication failure."))
+            # Try to extract the reason for failure so we can return the
+            # appropriate AWS error via raising an exception
+            try:
+                reason = result['error']['message']
+            except KeyError:
+                reason = None
+
+            if reason == "EC2 access key not found.":
+                error = exception.HeatInvalidClientTokenIdError
+            elif reason == "EC2 signature not supplied.":
+                error = exception.HeatSignatureError
+            else:
+                error = exception.HeatAccessDeniedError
+            self._cache_result(key, int(self._conf_get('negative_cache_ttl')),
+                               error=error)
+            raise error()
+
+        ttl = int(self._conf_get('cache_ttl'))
+        if token.get('expires'):
+            # Never use a token after it has expired
+            expires = timeutils.normalize_time(
+                timeutils.parse_isotime(token['expires']))
+            ttl = min(ttl, timeutils.delta_seconds(timeutils.utcnow(),
+                                                   expires))
+        self._cache_result(key, ttl, result=auth)
+        return auth
+
     def _authorize(self, req, auth_uri):
         # Read request signature and access id.
         # If we find X-Auth-User in the headers we ignore a key error
@@ -185,46 +292,22 @@ class EC2Token(wsgi.Middleware):
                                     'body_hash': body_hash
                                     }}
         creds_json = json.dumps(creds)
-        headers = {'Content-Type': 'application/json'}
 
         keystone_ec2_uri = self._conf_get_keystone_ec2_uri(auth_uri)
-        logger.info(_('Authenticating with %s') % keystone_ec2_uri)
-        response = requests.post(keystone_ec2_uri, data=creds_json,
-                                 headers=headers)
-        result = response.json()
-        try:
-            token_id = result['access']['token']['id']
-            tenant = result['access']['token']['tenant']['name']
-            tenant_id = result['access']['token']['tenant']['id']
-            logger.info(_("AWS authentication successful."))
-        except (AttributeError, KeyError):
-            logger.info(_("AWS authentication failure."))
-            # Try to extract the reason for failure so we can return the
-            # appropriate AWS error via raising an exception
-            try:
-                reason = result['error']['message']
-            except KeyError:
-                reason = None
-
-            if reason == "EC2 access key not found.":
-                raise exception.HeatInvalidClientTokenIdError()
-            elif reason == "EC2 signature not supplied.":
-                raise exception.HeatSignatureError()
-            else:
-                raise exception.HeatAccessDeniedError()
+        auth = self._validate(keystone_ec2_uri, creds_json)
+        if len(self._last_auth_uri) >= CACHE_SIZE:
+            self._last_auth_uri.clear()
+        self._last_auth_uri[access] = auth_uri
 
         # Authenticated!
         ec2_creds = {'ec2Credentials': {'access': access,
                                         'signature': signature}}
         req.headers['X-Auth-EC2-Creds'] = json.dumps(ec2_creds)
-        req.headers['X-Auth-Token'] = token_id
-        req.headers['X-Tenant-Name'] = tenant
-        req.headers['X-Tenant-Id'] = tenant_id
+        req.headers['X-Auth-Token'] = auth['token_id']
+        req.headers['X-Tenant-Name'] = auth['tenant']
+        req.headers['X-Tenant-Id'] = auth['tenant_id']
         req.headers['X-Auth-URL'] = auth_uri
-
-        metadata = result['access'].get('metadata', {})
-        roles = metadata.get('roles', [])
-        req.headers['X-Roles'] = ','.join(roles)
+        req.headers['X-Roles'] = ','.join(auth['roles'])
 
         return self.application
 
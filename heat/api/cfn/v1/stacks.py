@@ -20,6 +20,8 @@ Stack endpoint for Heat CloudFormation v1 API.
 import json
 import socket
 
+import webob.exc
+
 from heat.api.aws import exception
 from heat.api.aws import utils as api_utils
 from heat.common import wsgi
@@ -547,17 +549,26 @@ class StackController(object):
             return self._id_format(result)
 
         con = req.context
+        etag = req.if_none_match_etag()
 
         try:
             identity = self._get_identity(con, req.params['StackName'])
             resource_details = self.engine_rpcapi.describe_stack_resource(
                 con,
                 stack_identity=identity,
-                resource_name=req.params.get('LogicalResourceId'))
+                resource_name=req.params.get('LogicalResourceId'),
+                etag=etag)
 
         except Exception as ex:
             return exception.map_remote_error(ex)
 
+        if resource_details is None:
+            raise webob.exc.HTTPNotModified(headers=[('ETag', '"%s"' % etag)])
+
+        res_etag = resource_details.pop(engine_api.RES_ETAG, None)
+        if res_etag is not None:
+            req.add_response_header('ETag', '"%s"' % res_etag)
+
         result = format_resource_detail(resource_details)
 
         return api_utils.format_response('DescribeStackResource',
@@ -100,6 +100,10 @@ class API(wsgi.Router):
                                  "/stacks/{stack_name}/{stack_id}/template",
                                  action="template",
                                  conditions={'method': 'GET'})
+            stack_mapper.connect("stack_timings",
+                                 "/stacks/{stack_name}/{stack_id}/timings",
+                                 action="timings",
+                                 conditions={'method': 'GET'})
 
             # Stack update/delete
             stack_mapper.connect("stack_update",
@@ -14,11 +14,16 @@
 #    under the License.
 
 import itertools
+import time
+
+from oslo.config import cfg
+from webob import exc
 
 from heat.api.openstack.v1 import util
 from heat.common import wsgi
 from heat.rpc import api as engine_api
 from heat.common import identifier
+from heat.rpc import changes
 from heat.rpc import client as rpc_client
 
 
@@ -37,7 +42,8 @@ def format_resource(req, res, keys=[]):
               key == engine_api.RES_STACK_ID or
               key == engine_api.RES_ACTION):
             return
-        elif (key == engine_api.RES_METADATA):
+        elif (key == engine_api.RES_METADATA or
+              key == engine_api.RES_ETAG):
             return
         elif (key == engine_api.RES_STATUS and engine_api.RES_ACTION in res):
             # To avoid breaking API compatibility, we join RES_ACTION
@@ -94,11 +100,46 @@ class ResourceController(object):
     def metadata(self, req, identity, resource_name):
         """
         Gets metadata information for a resource
+
+        If the request carries the ETag of the current metadata in an
+        If-None-Match header, 304 Not Modified is returned instead. With a
+        "wait" parameter, the request is held for up to that many seconds
+        (limited by max_long_poll_wait) for the metadata to change before
+        doing so. While waiting, the engine is asked for the metadata again
+        only when it announces a change to it.
         """
+        etag = req.if_none_match_etag()
+        wait = req.params.get('wait')
+        try:
+            wait = int(wait or 0)
+        except ValueError:
+            raise exc.HTTPBadRequest(_("Invalid wait time %s") % wait)
+
+        def describe():
+            return self.engine.describe_stack_resource(req.context,
+                                                       identity,
+                                                       resource_name,
+                                                       etag=etag)
+
+        wait = min(wait, cfg.CONF.heat_api.max_long_poll_wait)
+        if etag is not None and wait > 0:
+            key = changes.resource_key(identity['stack_id'], resource_name)
+            deadline = time.time() + wait
+            while True:
+                with changes.watch(key) as wait_for_change:
+                    res = describe()
+                    remaining = deadline - time.time()
+                    if (res is not None or remaining <= 0 or
+                            not wait_for_change(remaining)):
+                        break
+        else:
+            res = describe()
 
-        res = self.engine.describe_stack_resource(req.context,
-                                                  identity,
-                                                  resource_name)
+        if res is None:
+            raise exc.HTTPNotModified(headers=[('ETag', '"%s"' % etag)])
+
+        if engine_api.RES_ETAG in res:
+            req.add_response_header('ETag', '"%s"' % res[engine_api.RES_ETAG])
 
         return {engine_api.RES_METADATA: res[engine_api.RES_METADATA]}
 
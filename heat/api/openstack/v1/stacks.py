@@ -17,6 +17,10 @@
 Stack endpoint for Heat v1 ReST API.
 """
 
+import hashlib
+import time
+
+from oslo.config import cfg
 from webob import exc
 
 from heat.api.openstack.v1 import util
@@ -33,6 +37,9 @@ from heat.openstack.common import log as logging
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of cached resource type listings, schemas and templates
+RESOURCE_TYPE_CACHE_SIZE = 1000
+
 
 class InstantiationData(object):
     """
@@ -148,6 +155,9 @@ class StackController(object):
     def __init__(self, options):
         self.options = options
         self.engine = rpc_client.EngineClient()
+        self._registry_version = None
+        self._registry_checked = None
+        self._registry_cache = {}
 
     def default(self, req, **args):
         raise exc.HTTPNotFound()
@@ -263,6 +273,14 @@ class StackController(object):
         # TODO(zaneb): always set Content-type to application/json
         return templ
 
+    @util.identified_stack
+    def timings(self, req, identity):
+        """
+        Get the time spent in each phase of recent operations on a stack
+        """
+        timings = self.engine.get_stack_timings(req.context, identity)
+        return {'timings': timings}
+
     @util.identified_stack
     def update(self, req, identity, body):
         """
@@ -320,29 +338,71 @@ class StackController(object):
 
         return result
 
+    def _cached_by_registry(self, req, key, fetch):
+        """
+        Return a response that depends only on the engine's resource registry,
+        from the cache if possible.
+
+        The registry version is only checked with the engine once every
+        resource_type_cache_ttl seconds. An ETag derived from the version is
+        added to the response, and if it matches the request's If-None-Match
+        header then HTTPNotModified is raised instead.
+        """
+        now = time.time()
+        if (self._registry_checked is None or
+                now - self._registry_checked >=
+                cfg.CONF.heat_api.resource_type_cache_ttl):
+            version = self.engine.resource_registry_version(req.context)
+            if version != self._registry_version:
+                self._registry_cache.clear()
+                self._registry_version = version
+            self._registry_checked = now
+
+        etag = hashlib.md5(repr((self._registry_version,
+                                 key))).hexdigest()
+        if req.if_none_match_etag() == etag:
+            raise exc.HTTPNotModified(headers=[('ETag', '"%s"' % etag)])
+
+        try:
+            result = self._registry_cache[key]
+        except KeyError:
+            result = fetch()
+            if len(self._registry_cache) >= RESOURCE_TYPE_CACHE_SIZE:
+                self._registry_cache.clear()
+            self._registry_cache[key] = result
+
+        req.add_response_header('ETag', '"%s"' % etag)
+        return result
+
     @util.policy_enforce
     def list_resource_types(self, req):
         """
         Returns a list of valid resource types that may be used in a template.
         """
         support_status = req.params.get('support_status', None)
-        return {
-            'resource_types':
-            self.engine.list_resource_types(req.context, support_status)}
+        types = self._cached_by_registry(
+            req, ('list_resource_types', support_status),
+            lambda: self.engine.list_resource_types(req.context,
+                                                    support_status))
+        return {'resource_types': types}
 
     @util.policy_enforce
     def resource_schema(self, req, type_name):
         """
         Returns the schema of the given resource type.
         """
-        return self.engine.resource_schema(req.context, type_name)
+        return self._cached_by_registry(
+            req, ('resource_schema', type_name),
+            lambda: self.engine.resource_schema(req.context, type_name))
 
     @util.policy_enforce
     def generate_template(self, req, type_name):
         """
         Generates a template based on the specified type.
         """
-        return self.engine.generate_template(req.context, type_name)
+        return self._cached_by_registry(
+            req, ('generate_template', type_name),
+            lambda: self.engine.generate_template(req.context, type_name))
 
 
 class StackSerializer(wsgi.JSONResponseSerializer):
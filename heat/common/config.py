@@ -117,7 +117,30 @@ engine_opts = [
     cfg.IntOpt('engine_life_check_timeout',
                default=2,
                help=_('RPC timeout for the engine liveness check that is used'
-                      ' for stack locking.'))]
+                      ' for stack locking.')),
+    cfg.IntOpt('max_validation_concurrency',
+               default=10,
+               help=_('Maximum number of resources of a stack that will be'
+                      ' validated concurrently.')),
+    cfg.IntOpt('deferred_task_retry_interval',
+               default=2,
+               help=_('Seconds to wait before retrying to acquire the stack'
+                      ' lock for a deferred task, such as a scaling'
+                      ' adjustment or caching the stack outputs.')),
+    cfg.IntOpt('deferred_task_max_retries',
+               default=30,
+               help=_('Maximum number of times to retry acquiring the stack'
+                      ' lock for a deferred task before abandoning the'
+                      ' task.')),
+    cfg.IntOpt('stack_timings_history',
+               default=10,
+               help=_('Number of recent operations on each stack for which'
+                      ' a record of the time spent in each phase is kept in'
+                      ' the database.')),
+    cfg.StrOpt('stack_profile_dir',
+               help=_('Directory in which to write cProfile output for each'
+                      ' stack operation. Profiling is disabled if this is'
+                      ' not set.'))]
 
 rpc_opts = [
     cfg.StrOpt('host',
@@ -65,6 +65,7 @@ class RequestContext(context.RequestContext):
         self._session = None
         self.trust_id = trust_id
         self.trustor_user_id = trustor_user_id
+        self._policy_decisions = {}
         self.policy = policy.Enforcer()
 
         if is_admin is None:
@@ -18,22 +18,96 @@
 # Based on glance/api/policy.py
 """Policy Engine For Heat"""
 
+import itertools
+import os.path
+import time
+
 from oslo.config import cfg
 
 from heat.common import exception
 
 import heat.openstack.common.log as logging
+from heat.openstack.common.gettextutils import _
+from heat.openstack.common import jsonutils
 from heat.openstack.common import policy
 
 logger = logging.getLogger(__name__)
 
+policy_opts = [
+    cfg.IntOpt('policy_check_interval',
+               default=10,
+               help=_('Minimum number of seconds between checks of the '
+                      'policy file for changes.'))]
 
 CONF = cfg.CONF
+CONF.register_opts(policy_opts)
 
 DEFAULT_RULES = {
     'default': policy.FalseCheck(),
 }
 
+# Parsed policy files, keyed by path. Each value is a tuple of the file's
+# mtime, the parsed rules and the time at which to next check for changes.
+_parsed_policies = {}
+
+
+def _load_policy_file(path, force_reload=False):
+    """
+    Return a dict of the parsed rules in a policy file.
+
+    The rules are parsed only when the file changes, and the same dict is
+    returned until then. The file is only checked for changes every
+    policy_check_interval seconds, unless force_reload is set.
+    """
+    now = time.time()
+    cached = _parsed_policies.get(path)
+    if cached is not None and not force_reload and now < cached[2]:
+        return cached[1]
+
+    mtime = os.path.getmtime(path)
+    if cached is not None and not force_reload and mtime == cached[0]:
+        rules = cached[1]
+    else:
+        logger.debug(_('Loading policy file %s') % path)
+        with open(path) as policy_file:
+            data = jsonutils.loads(policy_file.read())
+        rules = dict((k, policy.parse_rule(v)) for k, v in data.items())
+
+    _parsed_policies[path] = (mtime, rules, now + CONF.policy_check_interval)
+    return rules
+
+
+class _SharedRulesEnforcer(policy.Enforcer):
+    """
+    An Enforcer that shares the parsed rules from each policy file with all
+    other Enforcers, rather than reading and parsing the file itself.
+
+    Each time its rules are set, the Enforcer takes a new rules generation
+    number, unique across all Enforcers, which identifies the rules in force.
+    """
+
+    # Generations are unique across all Enforcers, so that decisions made
+    # under one set of rules are never mistaken for those made under another
+    _rules_generations = itertools.count()
+
+    def __init__(self, *args, **kwargs):
+        super(_SharedRulesEnforcer, self).__init__(*args, **kwargs)
+        self._loaded_rules = None
+        self.rules_generation = next(self._rules_generations)
+
+    def set_rules(self, rules, overwrite=True):
+        super(_SharedRulesEnforcer, self).set_rules(rules, overwrite)
+        self.rules_generation = next(self._rules_generations)
+
+    def load_rules(self, force_reload=False):
+        if not self.policy_path:
+            self.policy_path = self._get_policy_path()
+
+        rules = _load_policy_file(self.policy_path, force_reload)
+        if force_reload or rules is not self._loaded_rules or not self.rules:
+            self.set_rules(policy.Rules(rules, self.default_rule))
+            self._loaded_rules = rules
+
 
 class Enforcer(object):
     """Responsible for loading and enforcing rules."""
@@ -43,7 +117,7 @@ class Enforcer(object):
         self.scope = scope
         self.exc = exc
         self.default_rule = default_rule
-        self.enforcer = policy.Enforcer(default_rule=default_rule)
+        self.enforcer = _SharedRulesEnforcer(default_rule=default_rule)
 
     def set_rules(self, rules, overwrite=True):
         """Create a new Rules object based on the provided dict of rules."""
@@ -69,8 +143,26 @@ class Enforcer(object):
             'user': context.username,
             'tenant': context.tenant,
         }
-        return self.enforcer.enforce(rule, target, credentials,
-                                     do_raise, exc=exc, *args, **kwargs)
+
+        # Decisions that do not depend on a target are remembered for the
+        # rest of the request
+        decisions = getattr(context, '_policy_decisions', None)
+        if target or decisions is None:
+            return self.enforcer.enforce(rule, target, credentials,
+                                         do_raise, exc=exc, *args, **kwargs)
+
+        self.enforcer.load_rules()
+        key = (self.enforcer.rules_generation, rule,
+               tuple(context.roles or ()), context.username, context.tenant)
+        try:
+            result = decisions[key]
+        except KeyError:
+            result = self.enforcer.enforce(rule, target, credentials,
+                                           exc=exc)
+            decisions[key] = result
+        if do_raise and not result:
+            raise exc(*args, **kwargs)
+        return result
 
     def enforce(self, context, action, scope=None, target=None):
         """Verifies that the action is valid on the target in this context.
@@ -23,6 +23,7 @@ Utility methods for working with WSGI servers
 
 import datetime
 import errno
+import itertools
 import json
 import logging
 import os
@@ -50,6 +51,9 @@ from heat.openstack.common import importutils
 
 URL_LENGTH_LIMIT = 50000
 
+# Serialised response bodies are written to the client in chunks of this size
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
 api_opts = [
     cfg.StrOpt('bind_host', default='0.0.0.0',
                help=_('Address to bind the server.  Useful when '
@@ -73,6 +77,14 @@ api_opts = [
     cfg.IntOpt('workers', default=0,
                help=_("Number of workers for Heat service"),
                deprecated_group='DEFAULT'),
+    cfg.IntOpt('resource_type_cache_ttl', default=60,
+               help=_("Number of seconds for which resource type listings "
+                      "and schemas are cached before checking whether the "
+                      "engine's resource registry has changed")),
+    cfg.IntOpt('max_long_poll_wait', default=30,
+               help=_("Maximum number of seconds for which a request for "
+                      "resource metadata may be held waiting for the "
+                      "metadata to change")),
 ]
 api_group = cfg.OptGroup('heat_api')
 cfg.CONF.register_group(api_group)
@@ -498,6 +510,20 @@ class Request(webob.Request):
         all_languages = gettextutils.get_available_languages('heat')
         return self.accept_language.best_match(all_languages)
 
+    def if_none_match_etag(self):
+        """Return the first ETag in the If-None-Match header, if any."""
+        etags = getattr(self.if_none_match, 'etags', None)
+        return etags[0] if etags else None
+
+    def add_response_header(self, name, value):
+        """Add a header to the response that is serialized for this request.
+
+        This allows controllers that return a dict to the serializer to set
+        headers such as ETag on the eventual response.
+        """
+        headers = self.environ.setdefault('heat.response_headers', [])
+        headers.append((name, value))
+
 
 def is_json_content_type(request):
     if request.method == 'GET':
@@ -550,21 +576,88 @@ class JSONRequestDeserializer(object):
             return {}
 
 
+def _chunked(fragments, chunk_size=RESPONSE_CHUNK_SIZE):
+    """
+    Combine an iterable of strings into chunks of at least chunk_size bytes
+    (except for the last), so that a response body can be written without
+    holding all of it in memory.
+    """
+    chunk = []
+    size = 0
+    for fragment in fragments:
+        chunk.append(fragment)
+        size += len(fragment)
+        if size >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+def _set_body_chunks(response, chunks):
+    """
+    Set the body of a response to an iterable of chunks, which are generated
+    only as the body is written.
+
+    The first chunk is generated before returning, so that a result that
+    cannot be serialised at all raises an error while the response can still
+    be replaced by an error response, instead of after the status and
+    headers have been sent.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, '')
+    response.app_iter = itertools.chain([first], chunks)
+
+
 class JSONResponseSerializer(object):
 
-    def to_json(self, data):
-        def sanitizer(obj):
-            if isinstance(obj, datetime.datetime):
-                return obj.isoformat()
-            return obj
+    @staticmethod
+    def _sanitizer(obj):
+        if isinstance(obj, datetime.datetime):
+            return obj.isoformat()
+        return obj
 
-        response = json.dumps(data, default=sanitizer)
-        logging.debug("JSON response : %s" % response)
+    def to_json(self, data):
+        response = json.dumps(data, default=self._sanitizer)
+        logging.debug("JSON response : %s", response)
         return response
 
+    def _json_fragments(self, data):
+        """
+        Generate the JSON encoding of data in pieces.
+
+        The dicts and lists that enclose the data are encoded piecewise, but
+        each list item is encoded in one go; the result is identical to that
+        of to_json().
+        """
+        if (isinstance(data, dict) and
+                all(isinstance(k, basestring) for k in data)):
+            yield '{'
+            for i, (key, value) in enumerate(data.iteritems()):
+                yield '%s%s: ' % (', ' if i else '', json.dumps(key))
+                for fragment in self._json_fragments(value):
+                    yield fragment
+            yield '}'
+        elif isinstance(data, (list, tuple)):
+            yield '['
+            for i, item in enumerate(data):
+                if i:
+                    yield ', '
+                yield json.dumps(item, default=self._sanitizer)
+            yield ']'
+        else:
+            yield json.dumps(data, default=self._sanitizer)
+
+    def to_json_iter(self, data):
+        """Return an iterator over the JSON encoding of data, in chunks."""
+        for chunk in _chunked(self._json_fragments(data)):
+            logging.debug("JSON response : %s", chunk)
+            yield chunk
+
     def default(self, response, result):
         response.content_type = 'application/json'
-        response.body = self.to_json(result)
+        _set_body_chunks(response, self.to_json_iter(result))
 
 
 # Escape XML serialization for these keys, as the AWS API defines them as
@@ -601,12 +694,47 @@ class XMLResponseSerializer(object):
         eltree = etree.Element(root)
         self.object_to_element(data.get(root), eltree)
         response = etree.tostring(eltree)
-        logging.debug("XML response : %s" % response)
+        logging.debug("XML response : %s", response)
         return response
 
+    def _xml_fragments(self, tag, obj):
+        """
+        Generate the XML serialisation of obj as an element named tag in
+        pieces.
+
+        The dicts and lists that enclose the data are serialised piecewise,
+        but each list member is serialised in one go; the result is identical
+        to that of to_xml().
+        """
+        if (obj and isinstance(obj, (dict, list)) and
+                tag not in JSON_ONLY_KEYS):
+            yield '<%s>' % tag
+            if isinstance(obj, list):
+                for item in obj:
+                    member = etree.Element('member')
+                    self.object_to_element(item, member)
+                    yield etree.tostring(member)
+            else:
+                for key, value in obj.items():
+                    for fragment in self._xml_fragments(key, value):
+                        yield fragment
+            yield '</%s>' % tag
+        else:
+            parent = etree.Element('parent')
+            self.object_to_element({tag: obj}, parent)
+            yield etree.tostring(parent[0])
+
+    def to_xml_iter(self, data):
+        """Return an iterator over the XML serialisation of data, in chunks."""
+        # Assumption : root node is dict with single key
+        root = data.keys()[0]
+        for chunk in _chunked(self._xml_fragments(root, data.get(root))):
+            logging.debug("XML response : %s", chunk)
+            yield chunk
+
     def default(self, response, result):
         response.content_type = 'application/xml'
-        response.body = self.to_xml(result)
+        _set_body_chunks(response, self.to_xml_iter(result))
 
 
 class Resource(object):
@@ -699,6 +827,8 @@ class Resource(object):
 
             response = webob.Response(request=request)
             self.dispatch(serializer, action, response, action_result)
+            response.headerlist.extend(
+                request.environ.get('heat.response_headers', []))
             return response
 
         # return unserializable result (typically an exception)
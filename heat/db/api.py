@@ -55,6 +55,10 @@ def raw_template_create(context, values):
     return IMPL.raw_template_create(context, values)
 
 
+def raw_template_update(context, template_id, values):
+    return IMPL.raw_template_update(context, template_id, values)
+
+
 def resource_data_get_all(resource):
     return IMPL.resource_data_get_all(resource)
 
@@ -92,6 +96,14 @@ def resource_exchange_stacks(context, resource_id1, resource_id2):
     return IMPL.resource_exchange_stacks(context, resource_id1, resource_id2)
 
 
+def resource_attribute_values_set(context, resource_id, values):
+    return IMPL.resource_attribute_values_set(context, resource_id, values)
+
+
+def resource_attribute_values_clear(context, resource_id):
+    return IMPL.resource_attribute_values_clear(context, resource_id)
+
+
 def resource_get_all_by_stack(context, stack_id):
     return IMPL.resource_get_all_by_stack(context, stack_id)
 
@@ -148,6 +160,14 @@ def stack_update(context, stack_id, values):
     return IMPL.stack_update(context, stack_id, values)
 
 
+def stack_output_values_set(context, stack_id, values):
+    return IMPL.stack_output_values_set(context, stack_id, values)
+
+
+def stack_output_values_clear(context, stack_id):
+    return IMPL.stack_output_values_clear(context, stack_id)
+
+
 def stack_delete(context, stack_id):
     return IMPL.stack_delete(context, stack_id)
 
@@ -196,6 +216,14 @@ def event_create(context, values):
     return IMPL.event_create(context, values)
 
 
+def stack_timing_get_all_by_stack(context, stack_id):
+    return IMPL.stack_timing_get_all_by_stack(context, stack_id)
+
+
+def stack_timing_create(context, values):
+    return IMPL.stack_timing_create(context, values)
+
+
 def watch_rule_get(context, watch_rule_id):
     return IMPL.watch_rule_get(context, watch_rule_id)
 
@@ -248,6 +276,10 @@ def software_deployment_create(context, values):
     return IMPL.software_deployment_create(context, values)
 
 
+def software_deployment_create_all(context, values_list):
+    return IMPL.software_deployment_create_all(context, values_list)
+
+
 def software_deployment_get(context, deployment_id):
     return IMPL.software_deployment_get(context, deployment_id)
 
@@ -260,6 +292,10 @@ def software_deployment_update(context, deployment_id, values):
     return IMPL.software_deployment_update(context, deployment_id, values)
 
 
+def software_deployment_update_all(context, values_by_id):
+    return IMPL.software_deployment_update_all(context, values_by_id)
+
+
 def software_deployment_delete(context, deployment_id):
     return IMPL.software_deployment_delete(context, deployment_id)
 
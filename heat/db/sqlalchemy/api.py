@@ -23,6 +23,7 @@ import sqlalchemy
 from sqlalchemy.orm.session import Session
 
 cfg.CONF.import_opt('max_events_per_stack', 'heat.common.config')
+cfg.CONF.import_opt('stack_timings_history', 'heat.common.config')
 
 from heat.openstack.common.gettextutils import _
 
@@ -88,6 +89,13 @@ def raw_template_create(context, values):
     return raw_template_ref
 
 
+def raw_template_update(context, template_id, values):
+    raw_template_ref = raw_template_get(context, template_id)
+    raw_template_ref.update(values)
+    raw_template_ref.save(_session(context))
+    return raw_template_ref
+
+
 def resource_get(context, resource_id):
     result = model_query(context, models.Resource).get(resource_id)
 
@@ -234,6 +242,25 @@ def resource_create(context, values):
     return resource_ref
 
 
+def resource_attribute_values_set(context, resource_id, values):
+    # Caching attribute values is not a change to the resource, so leave
+    # its updated_at timestamp untouched
+    model_query(context, models.Resource).filter_by(id=resource_id).update(
+        {'attribute_values': values,
+         'updated_at': models.Resource.updated_at},
+        synchronize_session='evaluate')
+
+
+def resource_attribute_values_clear(context, resource_id):
+    # Only rows that actually hold cached values are written to
+    query = model_query(context, models.Resource).filter_by(id=resource_id)
+    query = query.filter(models.Resource.attribute_values !=
+                         sqlalchemy.null())
+    query.update({'attribute_values': None,
+                  'updated_at': models.Resource.updated_at},
+                 synchronize_session='fetch')
+
+
 def resource_get_all_by_stack(context, stack_id):
     results = model_query(context, models.Resource).\
         filter_by(stack_id=stack_id).all()
@@ -391,6 +418,23 @@ def stack_update(context, stack_id, values):
     stack.save(_session(context))
 
 
+def stack_output_values_set(context, stack_id, values):
+    # Caching output values is not a change to the stack, so leave its
+    # updated_at timestamp untouched
+    model_query(context, models.Stack).filter_by(id=stack_id).update(
+        {'output_values': values, 'updated_at': models.Stack.updated_at},
+        synchronize_session='evaluate')
+
+
+def stack_output_values_clear(context, stack_id):
+    # Only rows that actually hold cached values are written to
+    query = model_query(context, models.Stack).filter_by(id=stack_id)
+    query = query.filter(models.Stack.output_values != sqlalchemy.null())
+    query.update({'output_values': None,
+                  'updated_at': models.Stack.updated_at},
+                 synchronize_session='fetch')
+
+
 def stack_delete(context, stack_id):
     s = stack_get(context, stack_id)
     if not s:
@@ -546,6 +590,33 @@ def event_create(context, values):
     return event_ref
 
 
+def _query_timings_by_stack(context, stack_id):
+    return model_query(context, models.StackTiming).\
+        filter_by(stack_id=stack_id)
+
+
+def stack_timing_get_all_by_stack(context, stack_id):
+    return _query_timings_by_stack(context, stack_id).\
+        order_by(models.StackTiming.id.desc()).all()
+
+
+def stack_timing_create(context, values):
+    timing_ref = models.StackTiming()
+    timing_ref.update(values)
+    timing_ref.save(_session(context))
+
+    # Keep only the most recent stack_timings_history records of the stack
+    old_ids = [t.id for t in _query_timings_by_stack(
+        context, values['stack_id']).order_by(
+            models.StackTiming.id.desc()).offset(
+                max(cfg.CONF.stack_timings_history, 0))]
+    if old_ids:
+        _query_timings_by_stack(context, values['stack_id']).filter(
+            models.StackTiming.id.in_(old_ids)).delete(
+                synchronize_session='fetch')
+    return timing_ref
+
+
 def watch_rule_get(context, watch_rule_id):
     result = model_query(context, models.WatchRule).get(watch_rule_id)
     return result
@@ -651,6 +722,29 @@ def software_deployment_create(context, values):
     return obj_ref
 
 
+def software_deployment_create_all(context, values_list):
+    session = _session(context)
+    deployments = []
+    with session.begin(subtransactions=True):
+        config_ids = set(v['config_id'] for v in values_list)
+        configs = model_query(context, models.SoftwareConfig).\
+            filter_by(tenant=context.tenant_id).\
+            filter(models.SoftwareConfig.id.in_(config_ids)).all()
+        missing = config_ids - set(c.id for c in configs)
+        if missing:
+            raise exception.NotFound(
+                _('Attempt to create software deployments with '
+                  'config ids: %(ids)s %(msg)s') % {
+                      'ids': ', '.join(sorted(missing)),
+                      'msg': 'that do not exist'})
+        for values in values_list:
+            obj_ref = models.SoftwareDeployment()
+            obj_ref.update(values)
+            session.add(obj_ref)
+            deployments.append(obj_ref)
+    return deployments
+
+
 def software_deployment_get(context, deployment_id):
     result = model_query(context, models.SoftwareDeployment).get(deployment_id)
     if (result is not None and context is not None and
@@ -683,6 +777,23 @@ def software_deployment_update(context, deployment_id, values):
     return deployment
 
 
+def software_deployment_update_all(context, values_by_id):
+    session = _session(context)
+    with session.begin(subtransactions=True):
+        deployments = model_query(context, models.SoftwareDeployment).\
+            filter_by(tenant=context.tenant_id).\
+            filter(models.SoftwareDeployment.id.in_(values_by_id)).all()
+        missing = set(values_by_id) - set(d.id for d in deployments)
+        if missing:
+            raise exception.NotFound(
+                _('Attempt to update software deployments with '
+                  'ids: %(ids)s %(msg)s') % {'ids': ', '.join(sorted(missing)),
+                                             'msg': 'that do not exist'})
+        for deployment in deployments:
+            deployment.update(values_by_id[deployment.id])
+    return deployments
+
+
 def software_deployment_delete(context, deployment_id):
     deployment = software_deployment_get(context, deployment_id)
     if not deployment:
@@ -721,6 +832,7 @@ def purge_deleted(age, granularity='days'):
 
     stack = sqlalchemy.Table('stack', meta, autoload=True)
     event = sqlalchemy.Table('event', meta, autoload=True)
+    stack_timing = sqlalchemy.Table('stack_timing', meta, autoload=True)
     raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
     user_creds = sqlalchemy.Table('user_creds', meta, autoload=True)
 
@@ -733,6 +845,9 @@ def purge_deleted(age, granularity='days'):
     for s in deleted_stacks:
         event_del = event.delete().where(event.c.stack_id == s[0])
         engine.execute(event_del)
+        stack_timing_del = stack_timing.delete().\
+            where(stack_timing.c.stack_id == s[0])
+        engine.execute(stack_timing_del)
         stack_del = stack.delete().where(stack.c.id == s[0])
         engine.execute(stack_del)
         raw_template_del = raw_template.delete().\
@@ -0,0 +1,37 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sqlalchemy
+
+
+def _index(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    software_deployment = sqlalchemy.Table('software_deployment', meta,
+                                           autoload=True)
+    # Only index a prefix of the tenant on MySQL, to stay within the maximum
+    # key length
+    return sqlalchemy.Index('ix_software_deployment_tenant_server_id',
+                            software_deployment.c.tenant,
+                            software_deployment.c.server_id,
+                            software_deployment.c.created_at,
+                            mysql_length={'tenant': 64})
+
+
+def upgrade(migrate_engine):
+    _index(migrate_engine).create(migrate_engine)
+
+
+def downgrade(migrate_engine):
+    _index(migrate_engine).drop(migrate_engine)
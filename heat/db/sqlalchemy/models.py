@@ -88,6 +88,7 @@ class RawTemplate(BASE, HeatBase):
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     template = sqlalchemy.Column(Json)
     files = sqlalchemy.Column(Json)
+    dependencies = sqlalchemy.Column(Json)
 
 
 class Stack(BASE, HeatBase, SoftDelete):
@@ -118,6 +119,7 @@ class Stack(BASE, HeatBase, SoftDelete):
     disable_rollback = sqlalchemy.Column(sqlalchemy.Boolean, nullable=False)
     stack_user_project_id = sqlalchemy.Column(sqlalchemy.String(64),
                                               nullable=True)
+    output_values = sqlalchemy.Column('output_values', Json)
 
 
 class StackLock(BASE, HeatBase):
@@ -174,6 +176,23 @@ class Event(BASE, HeatBase):
     resource_properties = sqlalchemy.Column(sqlalchemy.PickleType)
 
 
+class StackTiming(BASE, HeatBase):
+    """Represents the time spent in each phase of an operation on a stack."""
+
+    __tablename__ = 'stack_timing'
+
+    id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
+    stack_id = sqlalchemy.Column(sqlalchemy.String(36),
+                                 sqlalchemy.ForeignKey('stack.id'),
+                                 nullable=False,
+                                 index=True)
+    action = sqlalchemy.Column(sqlalchemy.String(255))
+    status = sqlalchemy.Column(sqlalchemy.String(255))
+    started_at = sqlalchemy.Column(sqlalchemy.DateTime)
+    elapsed = sqlalchemy.Column(sqlalchemy.Float)
+    phases = sqlalchemy.Column(Json)
+
+
 class ResourceData(BASE, HeatBase):
     """Key/value store of arbitrary, resource-specific data."""
 
@@ -208,6 +227,7 @@ class Resource(BASE, HeatBase):
     status_reason = sqlalchemy.Column('status_reason', sqlalchemy.String(255))
     # odd name as "metadata" is reserved
     rsrc_metadata = sqlalchemy.Column('rsrc_metadata', Json)
+    attribute_values = sqlalchemy.Column('attribute_values', Json)
 
     stack_id = sqlalchemy.Column(sqlalchemy.String(36),
                                  sqlalchemy.ForeignKey('stack.id'),
@@ -277,6 +297,11 @@ class SoftwareDeployment(BASE, HeatBase):
     """
 
     __tablename__ = 'software_deployment'
+    __table_args__ = (
+        sqlalchemy.Index('ix_software_deployment_tenant_server_id',
+                         'tenant', 'server_id', 'created_at',
+                         mysql_length={'tenant': 64}),
+        {'mysql_engine': 'InnoDB'})
 
     id = sqlalchemy.Column('id', sqlalchemy.String(36), primary_key=True,
                            default=lambda: str(uuid.uuid4()))
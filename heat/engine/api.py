@@ -12,6 +12,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+import json
+import six
+
 from heat.rpc import api
 from heat.openstack.common import timeutils
 from heat.engine import constraints as constr
@@ -131,6 +135,45 @@ def format_stack_resource(resource, detail=True):
     return res
 
 
+_RES_ETAG_KEYS = (api.RES_UPDATED_TIME, api.RES_PHYSICAL_ID, api.RES_METADATA,
+                  api.RES_ACTION, api.RES_STATUS, api.RES_STATUS_DATA)
+
+
+def format_resource_etag(res, template_id):
+    '''
+    Return an ETag for a resource description returned by
+    format_stack_resource(), or None if the description includes data (the
+    members of a nested stack) that the ETag cannot account for.
+
+    The remaining data in the description is either covered by the
+    resource's stored state or determined by the stack's template.
+    '''
+    if api.RES_MEMBERS in res:
+        return None
+    values = dict((k, res[k]) for k in _RES_ETAG_KEYS)
+    # The physical resource ID is only stored as a string
+    values[api.RES_PHYSICAL_ID] = six.text_type(values[api.RES_PHYSICAL_ID])
+    values['template_id'] = template_id
+    return hashlib.md5(json.dumps(values, sort_keys=True)).hexdigest()
+
+
+def stored_resource_etag(rs, template_id):
+    '''
+    Return the ETag that format_resource_etag() gives for the description of
+    a stored resource, using only its database record.
+    '''
+    last_updated_time = rs.updated_at or rs.created_at
+    res = {
+        api.RES_UPDATED_TIME: timeutils.isotime(last_updated_time),
+        api.RES_PHYSICAL_ID: rs.nova_instance or '',
+        api.RES_METADATA: rs.rsrc_metadata,
+        api.RES_ACTION: rs.action,
+        api.RES_STATUS: rs.status,
+        api.RES_STATUS_DATA: rs.status_reason,
+    }
+    return format_resource_etag(res, template_id)
+
+
 def format_event(event):
     stack_identifier = event.stack.identifier()
 
@@ -318,3 +361,13 @@ def format_software_deployment(sd):
         api.SOFTWARE_CONFIG_OPTIONS: sd.config.io['options']
     }
     return result
+
+
+def format_software_deployments_etag(deployments):
+    '''
+    Return an ETag for a list of deployments returned by
+    format_software_deployment().
+    '''
+    ordered = sorted(deployments,
+                     key=lambda sd: sd[api.SOFTWARE_DEPLOYMENT_ID])
+    return hashlib.md5(json.dumps(ordered, sort_keys=True)).hexdigest()
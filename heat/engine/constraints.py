@@ -389,6 +389,11 @@ class AllowedValues(Constraint):
                 isinstance(allowed, basestring)):
             raise InvalidSchemaError(_('AllowedValues must be a list'))
         self.allowed = tuple(allowed)
+        try:
+            self._allowed_set = frozenset(self.allowed)
+        except TypeError:
+            # Unhashable allowed values must be searched linearly
+            self._allowed_set = None
 
     def _str(self):
         allowed = ', '.join(str(a) for a in self.allowed)
@@ -402,8 +407,16 @@ class AllowedValues(Constraint):
         # For list values, check if all elements of the list are contained
         # in allowed list.
         if isinstance(value, list):
-            return all(v in self.allowed for v in value)
+            return all(self._is_allowed(v) for v in value)
+
+        return self._is_allowed(value)
 
+    def _is_allowed(self, value):
+        if self._allowed_set is not None:
+            try:
+                return value in self._allowed_set
+            except TypeError:
+                pass
         return value in self.allowed
 
     def _constraint(self):
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
 import itertools
 
 from heat.openstack.common import log
@@ -147,6 +148,56 @@ class ResourceRegistry(object):
     def __init__(self, global_registry):
         self._registry = {'resources': {}}
         self.global_registry = global_registry
+        # Incremented on every change, to invalidate the lookup caches
+        self._version = 0
+        self._cache_version = None
+        self._info_cache = {}
+        self._glob_index = None
+        self._digest = None
+
+    def _registry_version(self):
+        '''
+        Return a value that changes whenever the result of any lookup in
+        this registry may change.
+        '''
+        if self.global_registry is None:
+            return self._version, None
+        return self._version, self.global_registry._registry_version()
+
+    def _check_cache(self):
+        version = self._registry_version()
+        if version != self._cache_version:
+            self._info_cache = {}
+            self._glob_index = None
+            self._digest = None
+            self._cache_version = version
+        return version
+
+    def digest(self):
+        '''
+        Return a digest of the contents of the registry.
+
+        Unlike the internal version number, this is the same in every process
+        that has the same resources registered, so it can be used to validate
+        copies of data derived from the registry held elsewhere.
+        '''
+        self._check_cache()
+        if self._digest is None:
+            def entries(level, path):
+                for k, v in level.iteritems():
+                    if isinstance(v, dict):
+                        for entry in entries(v, path + [k]):
+                            yield entry
+                    else:
+                        yield '%s: %s' % ('/'.join(path + [k]), v)
+
+            md5 = hashlib.md5()
+            if self.global_registry is not None:
+                md5.update(self.global_registry.digest())
+            for entry in sorted(entries(self._registry, [])):
+                md5.update(entry + '\n')
+            self._digest = md5.hexdigest()
+        return self._digest
 
     def load(self, json_snippet):
         self._load_registry([], json_snippet)
@@ -171,6 +222,7 @@ class ResourceRegistry(object):
         """
         descriptive_path = '/'.join(path)
         name = path[-1]
+        self._version += 1
         # create the structure if needed
         registry = self._registry
         for key in path[:-1]:
@@ -232,12 +284,24 @@ class ResourceRegistry(object):
             yield impl
 
         # handle: "OS::*" -> "Dreamhost::*"
-        def is_a_glob(resource_type):
-            return resource_type.endswith('*')
-        globs = itertools.ifilter(is_a_glob, self._registry.keys())
-        for glob in globs:
-            if self._registry[glob].matches(resource_type):
-                yield self._registry[glob]
+        prefix_lengths, globs = self._globs()
+        for length in prefix_lengths:
+            info = globs.get(resource_type[:length])
+            if info is not None:
+                yield info
+
+    def _globs(self):
+        '''
+        Return the glob mappings, as a dict indexed by the prefix that they
+        match, and a list of the distinct lengths of those prefixes.
+        '''
+        self._check_cache()
+        if self._glob_index is None:
+            globs = dict((name[:-1], info)
+                         for name, info in self._registry.items()
+                         if name.endswith('*'))
+            self._glob_index = (sorted(set(len(p) for p in globs)), globs)
+        return self._glob_index
 
     def get_resource_info(self, resource_type, resource_name=None,
                           registry_type=None):
@@ -258,6 +322,23 @@ class ResourceRegistry(object):
         #    - filter_by(is_user=False)
         # 4) as_dict() to write to the db
         #    - filter_by(is_user=True)
+        version = self._check_cache()
+        key = (resource_type, resource_name, registry_type)
+        try:
+            return self._info_cache[key]
+        except KeyError:
+            pass
+
+        info = self._find_resource_info(resource_type, resource_name,
+                                        registry_type)
+        # Looking up a template type can register it, so don't cache the
+        # result if the registry changed meanwhile
+        if self._registry_version() == version:
+            self._info_cache[key] = info
+        return info
+
+    def _find_resource_info(self, resource_type, resource_name,
+                            registry_type):
         if self.global_registry is not None:
             giter = self.global_registry.iterable_by(resource_type,
                                                      resource_name)
@@ -16,15 +16,22 @@
 import collections
 import copy
 import functools
+import hashlib
+import itertools
+import json
 import re
 import six
 
+import eventlet
+from eventlet import event
+
 from oslo.config import cfg
 
 from heat.engine import environment
 from heat.common import exception
 from heat.engine import dependencies
 from heat.common import identifier
+from heat.engine import profiler
 from heat.engine import resource
 from heat.engine import resources
 from heat.engine import scheduler
@@ -44,6 +51,72 @@ from heat.common.exception import StackValidationFailed
 logger = logging.getLogger(__name__)
 
 
+class ResourceMap(collections.MutableMapping):
+    '''
+    A mapping of names to the resources of a stack, in which each Resource
+    object is created from its definition only when it is first accessed.
+    '''
+
+    _UNLOADED = object()
+
+    def __init__(self, stack, definitions):
+        self.stack = stack
+        self._definitions = dict(definitions)
+        self._resources = dict.fromkeys(self._definitions, self._UNLOADED)
+        self.from_template = True
+
+    def __getitem__(self, name):
+        res = self._resources[name]
+        if res is self._UNLOADED:
+            res = self._load(name)
+        return res
+
+    def _load(self, name):
+        with self.stack.timings.phase('resource_init'):
+            res = resource.Resource(name, self._definitions[name],
+                                    self.stack)
+        self._resources[name] = res
+        return res
+
+    def loaded(self):
+        '''
+        Return a list of the (name, resource) pairs of the resources that have
+        already been created, without creating any others.
+        '''
+        return [(name, res) for name, res in self._resources.items()
+                if res is not self._UNLOADED]
+
+    def load_matching(self, predicate):
+        '''
+        Create every resource not yet loaded whose class satisfies the
+        predicate, without creating any others.
+        '''
+        for name, res in self._resources.items():
+            if res is not self._UNLOADED:
+                continue
+            res_type = self._definitions[name].get('Type')
+            if predicate(self.stack.env.get_class(res_type,
+                                                  resource_name=name)):
+                self._load(name)
+
+    def __setitem__(self, name, res):
+        self._resources[name] = res
+        self.from_template = False
+
+    def __delitem__(self, name):
+        del self._resources[name]
+        self.from_template = False
+
+    def __iter__(self):
+        return iter(self._resources)
+
+    def __len__(self):
+        return len(self._resources)
+
+    def __contains__(self, name):
+        return name in self._resources
+
+
 class Stack(collections.Mapping):
 
     ACTIONS = (CREATE, DELETE, UPDATE, ROLLBACK, SUSPEND, RESUME, ADOPT
@@ -62,11 +135,16 @@ class Stack(collections.Mapping):
 
     _zones = None
 
+    # Resolution epochs are unique across all stacks, so that a value
+    # resolved in one stack is never mistaken for one resolved in another
+    _resolution_epochs = itertools.count()
+
     def __init__(self, context, stack_name, tmpl, env=None,
                  stack_id=None, action=None, status=None,
                  status_reason='', timeout_mins=60, resolve_data=True,
                  disable_rollback=True, parent_resource=None, owner_id=None,
-                 adopt_stack_data=None, stack_user_project_id=None):
+                 adopt_stack_data=None, stack_user_project_id=None,
+                 output_values=None, timings=None):
         '''
         Initialise from a context, name, Template object and (optionally)
         Environment object. The database ID may also be initialised, if the
@@ -94,7 +172,15 @@ class Stack(collections.Mapping):
         self.parent_resource = parent_resource
         self._resources = None
         self._dependencies = None
+        self.resolution_epoch = next(self._resolution_epochs)
+        self._validation_lookups = None
+        self._validated = frozenset()
+        self._output_values = output_values
+        self._refid_index = None
+        self._resolve_data = resolve_data
         self._access_allowed_handlers = {}
+        self.deferred_task_runner = None
+        self.timings = timings or profiler.Timings()
         self.adopt_stack_data = adopt_stack_data
         self.stack_user_project_id = stack_user_project_id
 
@@ -107,29 +193,156 @@ class Stack(collections.Mapping):
         self._set_param_stackid()
 
         if resolve_data:
-            self.outputs = self.resolve_static_data(self.t[self.t.OUTPUTS])
+            with self.timings.phase('resolve_static'):
+                self.outputs = self.resolve_static_data(
+                    self.t[self.t.OUTPUTS])
         else:
             self.outputs = {}
 
     @property
     def resources(self):
         if self._resources is None:
-            template_resources = self.t[self.t.RESOURCES]
-            self._resources = dict((name, resource.Resource(name, data, self))
-                                   for (name, data) in
-                                   template_resources.items())
+            self._resources = ResourceMap(self, self.t[self.t.RESOURCES])
         return self._resources
 
     @property
     def dependencies(self):
         if self._dependencies is None:
-            self._dependencies = self._get_dependencies(
-                self.resources.itervalues())
+            with self.timings.phase('dependencies'):
+                if self.resources.from_template:
+                    self._dependencies = self._template_dependencies()
+                else:
+                    self._dependencies = self._get_dependencies(
+                        self.resources.itervalues())
         return self._dependencies
 
+    def _dependencies_key(self):
+        '''
+        Return a hash of the template and environment, which together
+        determine the dependencies between the template's resources.
+        '''
+        data = json.dumps([self.t.t, self.env.user_env_as_dict()],
+                          sort_keys=True)
+        return hashlib.sha1(data).hexdigest()
+
+    def _template_dependencies(self):
+        '''
+        Return the dependency graph for the resources defined in the
+        template, reusing the edges stored with the template if they were
+        calculated for the same template and environment.
+
+        Newly calculated edges are only recorded in the Template; they are
+        written to the database by the next operation on the stack, not
+        while merely loading it.
+        '''
+        if not self._dependencies_static():
+            return self._get_dependencies(self.resources.itervalues())
+
+        key = self._dependencies_key()
+        stored = self.t.dependencies
+        if stored is not None and stored.get('key') == key:
+            try:
+                return dependencies.Dependencies(
+                    (self[rqr], rqd is not None and self[rqd] or None)
+                    for rqr, rqd in stored['edges'])
+            except KeyError:
+                logger.warning(_('Ignoring stored dependencies for stack '
+                                 '%s that do not match its resources') %
+                               self.name)
+
+        deps = self._get_dependencies(self.resources.itervalues())
+        edges = [(rqr.name, rqd is not None and rqd.name or None)
+                 for rqr, rqd in deps.graph().edges()]
+        self.t.set_dependencies({'key': key, 'edges': edges})
+        return deps
+
+    def _dependencies_static(self):
+        '''
+        Return whether the dependencies of the resources are determined by
+        the template and environment alone. Resource types that override
+        add_dependencies() (e.g. Neutron Port or VPCGatewayAttachment) may
+        add dependencies according to the resolved values of properties, or
+        to other resources in the stack, so their graph is never stored.
+        '''
+        base = six.get_unbound_function(resource.Resource.add_dependencies)
+        return all(six.get_unbound_function(type(r).add_dependencies) is base
+                   for r in self.resources.itervalues())
+
     def reset_dependencies(self):
         self._dependencies = None
 
+    def runtime_data_changed(self, changed_resource=None):
+        '''
+        Record that resolving runtime data (e.g. resource references) may
+        now produce a different result than before, optionally because of a
+        change (e.g. in state or physical ID) to the given resource.
+        '''
+        self.resolution_epoch = next(self._resolution_epochs)
+        if changed_resource is not None:
+            self._index_refid(changed_resource.name)
+        else:
+            self._refid_index = None
+        self.invalidate_outputs()
+        if self.parent_resource is not None:
+            self.parent_resource.invalidate_attributes()
+
+    def run_deferred(self, task, cleanup=None):
+        '''
+        Run a task that need not complete before the current request does.
+
+        The task is a callable taking a Stack as its only argument. If a
+        deferred task runner has been set (as the engine does for stack
+        operations and resource signals), the task is passed to it to be run
+        later in the background; otherwise it is run immediately on this
+        stack.
+
+        The optional cleanup is a callable taking no arguments. It is called
+        once the task has run, or once it is known that the task will not be
+        run (e.g. because the stack has been deleted in the meantime).
+        '''
+        if self.deferred_task_runner is None:
+            try:
+                task(self)
+            finally:
+                if cleanup is not None:
+                    cleanup()
+        else:
+            self.deferred_task_runner(task, cleanup)
+
+    def validation_lookup(self, func, *args):
+        '''
+        Return the result of func(*args) for use in validating a resource.
+
+        While the stack is being validated, identical lookups made by
+        different resources (e.g. of the same image or keypair) share a
+        single call, and its result or exception. At any other time func is
+        simply called, so lookups made while creating resources (e.g. of
+        Neutron networks) are not shared.
+        '''
+        lookups = self._validation_lookups
+        key = (func,) + args
+        try:
+            pending = lookups is not None and lookups.get(key)
+        except TypeError:
+            lookups = None
+        if lookups is None:
+            return func(*args)
+
+        if pending:
+            result, exc = pending.wait()
+            if exc is not None:
+                raise exc
+            return result
+
+        lookups[key] = pending = event.Event()
+        try:
+            result = func(*args)
+        except Exception as exc:
+            pending.send((None, exc))
+            raise
+        pending.send((result, None))
+        return result
+
     @property
     def root_stack(self):
         '''
@@ -175,20 +388,24 @@ class Stack(collections.Mapping):
     def load(cls, context, stack_id=None, stack=None, resolve_data=True,
              parent_resource=None, show_deleted=True):
         '''Retrieve a Stack from the database.'''
-        if stack is None:
-            stack = db_api.stack_get(context, stack_id,
-                                     show_deleted=show_deleted)
-        if stack is None:
-            message = _('No stack exists with id "%s"') % str(stack_id)
-            raise exception.NotFound(message)
-
-        template = Template.load(context, stack.raw_template_id)
+        timings = profiler.Timings()
+        with timings.phase('load'):
+            if stack is None:
+                stack = db_api.stack_get(context, stack_id,
+                                         show_deleted=show_deleted)
+            if stack is None:
+                message = _('No stack exists with id "%s"') % str(stack_id)
+                raise exception.NotFound(message)
+
+            template = Template.load(context, stack.raw_template_id)
+
         env = environment.Environment(stack.parameters)
         stack = cls(context, stack.name, template, env,
                     stack.id, stack.action, stack.status, stack.status_reason,
                     stack.timeout, resolve_data, stack.disable_rollback,
                     parent_resource, owner_id=stack.owner_id,
-                    stack_user_project_id=stack.stack_user_project_id)
+                    stack_user_project_id=stack.stack_user_project_id,
+                    output_values=stack.output_values, timings=timings)
 
         return stack
 
@@ -259,10 +476,12 @@ class Stack(collections.Mapping):
         '''Set the resource with the specified name to a specific value.'''
         resource.stack = self
         self.resources[key] = resource
+        self.runtime_data_changed(resource)
 
     def __delitem__(self, key):
         '''Remove the resource with the specified name.'''
-        del self.resources[key]
+        resource = self.resources.pop(key)
+        self.runtime_data_changed(resource)
 
     def __contains__(self, key):
         '''Determine whether the stack contains the specified resource.'''
@@ -285,15 +504,43 @@ class Stack(collections.Mapping):
         Return the resource in this stack with the specified
         refid, or None if not found
         '''
-        for r in self.values():
-            if r.state in (
-                    (r.CREATE, r.IN_PROGRESS),
-                    (r.CREATE, r.COMPLETE),
-                    (r.RESUME, r.IN_PROGRESS),
-                    (r.RESUME, r.COMPLETE),
-                    (r.UPDATE, r.IN_PROGRESS),
-                    (r.UPDATE, r.COMPLETE)) and r.FnGetRefId() == refid:
-                return r
+        if self._refid_index is None:
+            self._refid_index = {}
+            self._refids = {}
+            for name in self.resources:
+                self._index_refid(name)
+
+        name = self._refid_index.get(refid)
+        return self.resources[name] if name is not None else None
+
+    def _index_refid(self, name):
+        '''
+        Update the refid index for the resource with the specified name.
+        Only resources in a state where they may be referenced are indexed.
+        '''
+        if self._refid_index is None:
+            return
+
+        old_refid = self._refids.pop(name, None)
+        if old_refid is not None and self._refid_index.get(old_refid) == name:
+            del self._refid_index[old_refid]
+            # Fall back to any other resource with the same refid
+            for other, other_refid in self._refids.items():
+                if other_refid == old_refid:
+                    self._refid_index[old_refid] = other
+                    break
+
+        r = self.resources.get(name)
+        if r is not None and r.state in (
+                (r.CREATE, r.IN_PROGRESS),
+                (r.CREATE, r.COMPLETE),
+                (r.RESUME, r.IN_PROGRESS),
+                (r.RESUME, r.COMPLETE),
+                (r.UPDATE, r.IN_PROGRESS),
+                (r.UPDATE, r.COMPLETE)):
+            refid = r.FnGetRefId()
+            self._refids[name] = refid
+            self._refid_index.setdefault(refid, name)
 
     def register_access_allowed_handler(self, credential_id, handler):
         '''
@@ -308,18 +555,37 @@ class Stack(collections.Mapping):
         Returns True if the credential_id is authorised to access the
         resource with the specified resource_name.
         '''
-        if not self.resources:
-            # this also triggers lazy-loading of resources
-            # so is required for register_access_allowed_handler
-            # to be called
-            return False
+        if credential_id not in self._access_allowed_handlers:
+            # Handlers are registered (by calling
+            # register_access_allowed_handler) as credential resources are
+            # loaded, so load only those
+            self.resources.load_matching(
+                lambda cls: cls.registers_access_allowed_handler)
 
         handler = self._access_allowed_handlers.get(credential_id)
-        return handler and handler(resource_name)
+        return bool(handler and handler(resource_name))
+
+    def reuse_validation(self, current):
+        '''
+        Record that resources given the very same definitions (i.e. the same
+        objects) as resources already loaded in the current version of the
+        stack were validated when those were created, so that validate() need
+        not validate them again. No other resources are loaded to check.
+
+        This saves only the validation of the unchanged resources; the whole
+        template of this stack is still parsed and stored, so e.g. resizing a
+        scaling group still costs time in proportion to the size of the group.
+        '''
+        resources = self.t[self.t.RESOURCES]
+        self._validated = frozenset(name for name, res
+                                    in current.resources.loaded()
+                                    if resources.get(name) is res.t)
 
     def validate(self):
         '''
         Validates the template.
+
+        Resources recorded by reuse_validation() are not validated again.
         '''
         # TODO(sdake) Should return line number of invalid reference
 
@@ -331,18 +597,39 @@ class Stack(collections.Mapping):
             raise StackValidationFailed(message=_("Duplicate names %s") %
                                         dup_names)
 
-        for res in self.dependencies:
+        def validate_resource(res):
             try:
                 result = res.validate()
-            except exception.Error as ex:
-                logger.exception(ex)
-                raise ex
             except Exception as ex:
                 logger.exception(ex)
-                raise StackValidationFailed(message=strutils.safe_decode(
-                                            six.text_type(ex)))
+                return ex
             if result:
-                raise StackValidationFailed(message=result)
+                return StackValidationFailed(message=result)
+
+        # Validate resources concurrently, so that remote lookups overlap
+        resources = [res for res in self.dependencies
+                     if res.name not in self._validated]
+        pool = eventlet.GreenPool(max(cfg.CONF.max_validation_concurrency, 1))
+        self._validation_lookups = {}
+        try:
+            with self.timings.phase('validate'):
+                errors = [(res, ex) for res, ex in
+                          zip(resources,
+                              pool.imap(validate_resource, resources))
+                          if ex is not None]
+        finally:
+            self._validation_lookups = None
+
+        if len(errors) == 1:
+            ex = errors[0][1]
+            if isinstance(ex, exception.Error):
+                raise ex
+            raise StackValidationFailed(message=strutils.safe_decode(
+                                        six.text_type(ex)))
+        elif errors:
+            raise StackValidationFailed(message='\n'.join(
+                '%s: %s' % (res.name, strutils.safe_decode(six.text_type(ex)))
+                for res, ex in errors))
 
     def requires_deferred_auth(self):
         '''
@@ -367,13 +654,18 @@ class Stack(collections.Mapping):
         if self.id is None:
             return
 
+        self._output_values = None
         stack = db_api.stack_get(self.context, self.id)
         if stack is not None:
             stack.update_and_save({'action': action,
                                    'status': status,
-                                   'status_reason': reason})
+                                   'status_reason': reason,
+                                   'output_values': None})
             notification.send(self)
 
+            if self._outputs_cacheable():
+                self.run_deferred(Stack.cache_outputs)
+
     @property
     def state(self):
         '''Returns state, tuple of action, status.'''
@@ -412,6 +704,7 @@ class Stack(collections.Mapping):
         return {'resource_data': data['resources'].get(resource.name)}
 
     @scheduler.wrappertask
+    @profiler.records_operation
     def stack_task(self, action, reverse=False, post_func=None):
         '''
         A task to perform an action on the stack and all of the resources
@@ -437,6 +730,7 @@ class Stack(collections.Mapping):
         action_task = scheduler.DependencyTaskGroup(self.dependencies,
                                                     resource_action,
                                                     reverse)
+        self.t.store_dependencies(self.context)
 
         try:
             yield action_task()
@@ -506,6 +800,7 @@ class Stack(collections.Mapping):
         updater()
 
     @scheduler.wrappertask
+    @profiler.records_operation
     def update_task(self, newstack, action=UPDATE):
         if action not in (self.UPDATE, self.ROLLBACK):
             logger.error(_("Unexpected action %s passed to update!") % action)
@@ -568,8 +863,6 @@ class Stack(collections.Mapping):
             logger.debug(_('Deleting backup stack'))
             backup_stack.delete(backup=True)
 
-        self.state_set(action, stack_status, reason)
-
         # flip the template to the newstack values
         # Note we do this on success and failure, so the current
         # stack resources are stored, even if one is in a failed
@@ -579,6 +872,11 @@ class Stack(collections.Mapping):
         self.outputs = self.resolve_static_data(template_outputs)
         self.store()
 
+        # Set the state only once the new outputs are in place, so that
+        # they are what gets cached
+        self.state_set(action, stack_status, reason)
+
+    @profiler.records_operation
     def delete(self, action=DELETE, backup=False):
         '''
         Delete all of the resources, and then the stack itself.
@@ -681,9 +979,90 @@ class Stack(collections.Mapping):
         '''
         Get the value of the specified stack output.
         '''
+        if self._output_values is not None and key in self._output_values:
+            return self._output_values[key]
+
         value = self.outputs[key].get('Value', '')
         return self.resolve_runtime_data(value)
 
+    def _outputs_cacheable(self):
+        '''
+        Return whether the outputs may be cached in the current state, i.e.
+        no operation which could change the resources is in progress.
+        '''
+        return (self.action != self.DELETE and self.status == self.COMPLETE
+                and self.id is not None and self._resolve_data)
+
+    def cache_outputs(self):
+        '''
+        Resolve the values of all of the stack outputs and store them in the
+        database, so they need not be resolved again (possibly calling out to
+        other services) until the resources change.
+
+        This is done when the stack reaches a COMPLETE state, as a deferred
+        task (see run_deferred()). It does nothing if the values are already
+        cached or if an operation on the stack is in progress. Outputs that
+        refer to volatile attributes are always resolved afresh. Failures are
+        logged and otherwise ignored.
+        '''
+        if self._output_values is not None or not self._outputs_cacheable():
+            return
+
+        try:
+            values = {}
+            for key, output in self.outputs.items():
+                value = output.get('Value', '')
+                if not self._refers_to_volatile(value):
+                    values[key] = self.resolve_runtime_data(value)
+            if values:
+                db_api.stack_output_values_set(self.context, self.id, values)
+        except Exception as ex:
+            logger.warning(_('Unable to cache outputs of stack '
+                             '%(name)s: %(ex)s') % {'name': self.name,
+                                                    'ex': ex})
+        else:
+            self._output_values = values or None
+
+    def _refers_to_volatile(self, snippet):
+        '''
+        Return whether a template snippet refers (with Fn::GetAtt or
+        get_attr) to an attribute that is volatile, i.e. whose value may
+        change while its resource does not. Attributes named by a function
+        are assumed to be volatile.
+        '''
+        if isinstance(snippet, dict):
+            for key, value in snippet.items():
+                if (key in ('Fn::GetAtt', 'get_attr') and
+                        isinstance(value, list) and len(value) >= 2 and
+                        isinstance(value[0], basestring) and
+                        value[0] in self.resources):
+                    attr = value[1]
+                    if (not isinstance(attr, basestring) or
+                            self[value[0]].attribute_volatile(attr)):
+                        return True
+                if self._refers_to_volatile(value):
+                    return True
+        elif isinstance(snippet, list):
+            return any(self._refers_to_volatile(v) for v in snippet)
+        return False
+
+    def invalidate_outputs(self):
+        '''
+        Discard any cached output values.
+
+        The database is only written to if values were cached when the stack
+        was loaded, or have been cached through this copy since. A stack
+        operation clears the values when it starts (see state_set()), so the
+        resource state changes during the operation do not touch the
+        database at all, and any other change clears them at most once.
+        '''
+        if self._output_values is None:
+            return
+
+        self._output_values = None
+        if self.id is not None:
+            db_api.stack_output_values_clear(self.context, self.id)
+
     def restart_resource(self, resource_name):
         '''
         stop resource_name and all that depend on it
@@ -0,0 +1,232 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import contextlib
+import cProfile
+import datetime
+import functools
+import inspect
+import os
+import time
+
+from eventlet import greenthread
+import greenlet
+from oslo.config import cfg
+
+from heat.db import api as db_api
+from heat.engine import scheduler
+from heat.openstack.common.gettextutils import _
+from heat.openstack.common import log as logging
+from heat.openstack.common import timeutils
+
+logger = logging.getLogger(__name__)
+
+# The Stack objects on which an operation is being recorded in each green
+# thread, outermost first
+_recording = {}
+
+# The profiler of the operation being profiled in each green thread
+_profiles = {}
+
+
+class Timings(object):
+    '''
+    A record of the time spent in each phase of the work done on a stack.
+    '''
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, phase, duration):
+        '''Record one occurrence of a phase that took the given time.'''
+        count, total, longest = self.phases.get(phase, (0, 0.0, 0.0))
+        self.phases[phase] = (count + 1, total + duration,
+                              max(longest, duration))
+
+    @contextlib.contextmanager
+    def phase(self, phase):
+        '''
+        Return a context manager that records the time spent within it as
+        an occurrence of the given phase.
+
+        The context must not span a yield in a task, as the time spent
+        running other tasks would then be counted as part of the phase.
+        '''
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(phase, time.time() - start)
+
+    def as_dict(self):
+        '''Return the recorded phases in a form suitable for serialisation.'''
+        return dict((phase, {'count': count,
+                             'total': total,
+                             'max': longest})
+                    for phase, (count, total, longest) in self.phases.items())
+
+
+def history(context, stack_id):
+    '''
+    Return the recorded timings of recent operations on the given stack,
+    most recent first.
+    '''
+    return [{'stack_id': t.stack_id,
+             'action': t.action,
+             'status': t.status,
+             'started_at': timeutils.isotime(t.started_at),
+             'elapsed': t.elapsed,
+             'phases': t.phases}
+            for t in db_api.stack_timing_get_all_by_stack(context, stack_id)]
+
+
+def _store(stack, stack_id, action, started_at, elapsed, timings):
+    if stack_id is None:
+        return
+    try:
+        db_api.stack_timing_create(stack.context, {
+            'stack_id': stack_id,
+            'action': action,
+            'status': stack.status,
+            'started_at': started_at,
+            'elapsed': elapsed,
+            'phases': timings.as_dict()})
+    except Exception as ex:
+        logger.warning(_('Unable to store timings of %(action)s on stack '
+                         '%(stack)s: %(ex)s') % {'action': action,
+                                                 'stack': stack_id,
+                                                 'ex': str(ex)})
+
+
+def _trace_switch(event, args):
+    '''
+    Trace switches between green threads, so that each profiler is enabled
+    only while the green thread carrying out its operation is running.
+    '''
+    if event in ('switch', 'throw'):
+        origin, target = args
+        profile = _profiles.get(origin)
+        if profile is not None:
+            profile.disable()
+        profile = _profiles.get(target)
+        if profile is not None:
+            profile.enable()
+
+
+def _start_profile(thread):
+    if not hasattr(greenlet, 'settrace'):
+        logger.warning(_('Stack operations cannot be profiled separately '
+                         'with this version of greenlet'))
+        return None
+
+    if not _profiles:
+        greenlet.settrace(_trace_switch)
+    profile = cProfile.Profile()
+    _profiles[thread] = profile
+    profile.enable()
+    return profile
+
+
+def _stop_profile(thread):
+    profile = _profiles.pop(thread)
+    profile.disable()
+    if not _profiles:
+        greenlet.settrace(None)
+
+
+def _profile_path(stack_id, action):
+    filename = '%s-%s-%s.prof' % (stack_id, action.lower(),
+                                  timeutils.utcnow().strftime('%Y%m%d%H%M%S'))
+    return os.path.join(cfg.CONF.stack_profile_dir, filename)
+
+
+@contextlib.contextmanager
+def operation(stack, action):
+    '''
+    Return a context manager that records the timings of an action on the
+    given stack, including any phases (such as loading the stack) that were
+    recorded before the action began.
+
+    An action started on the same Stack object in the same green thread
+    while another is being recorded (such as a rollback) is recorded as part
+    of the outer action.
+
+    If the stack_profile_dir option is set, the action is also profiled with
+    cProfile. Each action has its own profiler, which is enabled only while
+    the green thread carrying out the action runs. Actions started within
+    another in the same green thread (such as those on nested stacks) are
+    included in the outer action's profile rather than profiled separately.
+    '''
+    thread = greenthread.getcurrent()
+    recording = _recording.setdefault(thread, [])
+    if any(s is stack for s in recording):
+        yield
+        return
+
+    recording.append(stack)
+    profile = None
+    if cfg.CONF.stack_profile_dir and thread not in _profiles:
+        profile = _start_profile(thread)
+
+    # A delete clears the ID of the stack, so remember it
+    stack_id = stack.id
+    start = time.time()
+    try:
+        yield
+    finally:
+        recording.pop()
+        if not recording:
+            del _recording[thread]
+        elapsed = time.time() - start
+        timings, stack.timings = stack.timings, Timings()
+        _store(stack, stack_id, action,
+               datetime.datetime.utcfromtimestamp(start), elapsed, timings)
+
+        if profile is not None:
+            _stop_profile(thread)
+            path = _profile_path(stack_id, action)
+            try:
+                profile.dump_stats(path)
+            except (IOError, OSError) as ex:
+                logger.warning(_('Unable to write profile to %(path)s: '
+                                 '%(ex)s') % {'path': path, 'ex': str(ex)})
+
+
+def records_operation(func):
+    '''
+    Decorator for a Stack method that carries out an action on the stack,
+    which records the timings of the action (see operation()). The action is
+    taken from the method's action argument.
+
+    A method that is a task (i.e. a generator function) must also be
+    decorated with scheduler.wrappertask, outside this decorator.
+    '''
+    def get_action(stack, args, kwargs):
+        return inspect.getcallargs(func, stack, *args, **kwargs)['action']
+
+    if inspect.isgeneratorfunction(func):
+        task = scheduler.wrappertask(func)
+
+        @functools.wraps(func)
+        def wrapper(stack, *args, **kwargs):
+            with operation(stack, get_action(stack, args, kwargs)):
+                yield task(stack, *args, **kwargs)
+    else:
+        @functools.wraps(func)
+        def wrapper(stack, *args, **kwargs):
+            with operation(stack, get_action(stack, args, kwargs)):
+                return func(stack, *args, **kwargs)
+
+    return wrapper
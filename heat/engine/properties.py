@@ -14,6 +14,7 @@
 #    under the License.
 
 import collections
+import copy
 
 from heat.common import exception
 from heat.engine import parameters
@@ -166,6 +167,14 @@ class Property(object):
         self.schema = Schema.from_legacy(schema)
         self.name = name
         self.context = context
+        self._type_validator = {
+            Schema.STRING: self._validate_string,
+            Schema.INTEGER: self._validate_integer,
+            Schema.NUMBER: self._validate_number,
+            Schema.MAP: self._validate_map,
+            Schema.LIST: self._validate_list,
+            Schema.BOOLEAN: self._validate_bool,
+        }.get(self.schema.type)
 
     def required(self):
         return self.schema.required
@@ -249,19 +258,8 @@ class Property(object):
         return normalised == 'true'
 
     def _validate_data_type(self, value):
-        t = self.type()
-        if t == Schema.STRING:
-            return self._validate_string(value)
-        elif t == Schema.INTEGER:
-            return self._validate_integer(value)
-        elif t == Schema.NUMBER:
-            return self._validate_number(value)
-        elif t == Schema.MAP:
-            return self._validate_map(value)
-        elif t == Schema.LIST:
-            return self._validate_list(value)
-        elif t == Schema.BOOLEAN:
-            return self._validate_bool(value)
+        if self._type_validator is not None:
+            return self._type_validator(value)
 
     def validate_data(self, value):
         value = self._validate_data_type(value)
@@ -269,10 +267,71 @@ class Property(object):
         return value
 
 
+RUNTIME_DEPENDENCIES = (STATIC, REFERENCE, ATTRIBUTE) = range(3)
+
+REFERENCE_FUNCTIONS = ('Ref', 'get_resource')
+ATTRIBUTE_FUNCTIONS = ('Fn::GetAtt', 'get_attr')
+
+_NOT_MEMOISED = object()
+
+
+def runtime_dependency(snippet):
+    """
+    Return the kind of runtime data that a template snippet refers to.
+
+    The result is STATIC if the snippet can be resolved without reference to
+    any resources, REFERENCE if it refers only to resource references (which
+    change only when resources change state) and ATTRIBUTE if it refers to
+    resource attributes (which may change at any time).
+    """
+    if isinstance(snippet, dict):
+        if any(k in ATTRIBUTE_FUNCTIONS for k in snippet):
+            return ATTRIBUTE
+        dependency = STATIC
+        if any(k in REFERENCE_FUNCTIONS for k in snippet):
+            dependency = REFERENCE
+        values = snippet.itervalues()
+    elif isinstance(snippet, list):
+        dependency = STATIC
+        values = iter(snippet)
+    else:
+        return STATIC
+
+    for value in values:
+        dependency = max(dependency, runtime_dependency(value))
+        if dependency == ATTRIBUTE:
+            break
+    return dependency
+
+
+def _snapshot(snippet):
+    """
+    Return a copy of a template snippet that is unaffected by any changes
+    subsequently made to the snippet in place.
+
+    Snippets consist only of dicts, lists and immutable values, so this is
+    much cheaper than a deepcopy().
+    """
+    if isinstance(snippet, dict):
+        return dict((k, _snapshot(v)) for k, v in snippet.iteritems())
+    if isinstance(snippet, list):
+        return [_snapshot(v) for v in snippet]
+    return snippet
+
+
 class Properties(collections.Mapping):
 
     def __init__(self, schema, data, resolver=lambda d: d, parent_name=None,
-                 context=None):
+                 context=None, epoch=None):
+        """
+        Initialise from a schema, the (unresolved) property data and a
+        function to resolve runtime data.
+
+        If an epoch function is supplied, validated values are memoised. The
+        epoch function should return a value that changes whenever resolving
+        resource references could produce a different result; values that
+        refer to resource attributes are never memoised.
+        """
         self.props = dict((k, Property(s, k, context))
                           for k, s in schema.items())
         self.resolve = resolver
@@ -282,6 +341,8 @@ class Properties(collections.Mapping):
         else:
             self.error_prefix = '%s: ' % parent_name
         self.context = context
+        self._epoch = epoch
+        self._memo = {}
 
     @staticmethod
     def schema_from_params(params_snippet):
@@ -323,19 +384,50 @@ class Properties(collections.Mapping):
         prop = self.props[key]
 
         if key in self.data:
-            try:
-                value = self.resolve(self.data[key])
-                return prop.validate_data(value)
-            # the resolver function could raise any number of exceptions,
-            # so handle this generically
-            except Exception as e:
-                raise ValueError(self.error_prefix + '%s %s' % (key, str(e)))
+            if self._epoch is None:
+                return self._get_value(prop, key)
+            return self._get_memoised_value(prop, key)
         elif prop.has_default():
             return prop.default()
         elif prop.required():
             raise ValueError(self.error_prefix +
                              _('Property %s not assigned') % key)
 
+    def _get_value(self, prop, key):
+        try:
+            value = self.resolve(self.data[key])
+            return prop.validate_data(value)
+        # the resolver function could raise any number of exceptions,
+        # so handle this generically
+        except Exception as e:
+            raise ValueError(self.error_prefix + '%s %s' % (key, str(e)))
+
+    def _get_memoised_value(self, prop, key):
+        data = self.data[key]
+        memo = self._memo.get(key)
+        if memo is None or memo[0] != data:
+            # Keep a snapshot of the data, so that the memoised value is
+            # discarded if the snippet is replaced or modified in place.
+            # Comparing with it is a single native equality check.
+            memo = [_snapshot(data), runtime_dependency(data),
+                    _NOT_MEMOISED, None]
+            self._memo[key] = memo
+
+        dependency = memo[1]
+        if dependency == ATTRIBUTE:
+            return self._get_value(prop, key)
+
+        epoch = self._epoch() if dependency == REFERENCE else STATIC
+        if memo[2] != epoch:
+            memo[3] = self._get_value(prop, key)
+            memo[2] = epoch
+
+        value = memo[3]
+        if isinstance(value, (dict, list)):
+            # Don't allow callers to modify the memoised value
+            return copy.deepcopy(value)
+        return value
+
     def __len__(self):
         return len(self.props)
 
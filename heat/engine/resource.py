@@ -22,9 +22,11 @@ from heat.openstack.common import excutils
 from heat.db import api as db_api
 from heat.common import identifier
 from heat.common import short_id
+from heat.engine import properties
 from heat.engine import scheduler
 from heat.engine import resources
 from heat.engine import timestamp
+from heat.rpc import changes
 # import class to avoid name collisions and ugly aliasing
 from heat.engine.attributes import Attributes
 from heat.engine.properties import Properties
@@ -88,6 +90,8 @@ class Metadata(object):
             raise exception.ResourceNotAvailable(resource_name=resource.name)
         rs = db_api.resource_get(resource.stack.context, resource.id)
         rs.update_and_save({'rsrc_metadata': metadata})
+        changes.ChangeNotifier().resource_metadata_changed(
+            resource.stack.context, rs.stack_id, rs.name)
 
 
 class SupportStatus(object):
@@ -141,6 +145,15 @@ class Resource(object):
     # that describes the appropriate resource attributes
     attributes_schema = {}
 
+    # Resource implementations set this to the names of any attributes whose
+    # values may change while the resource itself does not (e.g. a status
+    # reported by another service), so that they are never cached
+    volatile_attributes = ()
+
+    # If True, this resource registers a handler with its stack (by calling
+    # register_access_allowed_handler) when it is loaded
+    registers_access_allowed_handler = False
+
     # If True, this resource may perform authenticated API requests
     # throughout its lifecycle
     requires_deferred_auth = False
@@ -172,14 +185,15 @@ class Resource(object):
         self.name = name
         self.json_snippet = json_snippet
         self.t = stack.resolve_static_data(json_snippet)
-        self.properties = Properties(self.properties_schema,
+        self.properties = Properties(self._properties_schemata(),
                                      self.t.get('Properties', {}),
                                      self._resolve_runtime_data,
                                      self.name,
-                                     self.context)
+                                     self.context,
+                                     self._resolution_epoch)
         self.attributes = Attributes(self.name,
                                      self.attributes_schema,
-                                     self._resolve_attribute)
+                                     self._attribute_value)
 
         if stack.id:
             resource = db_api.resource_get_by_name_and_stack(self.context,
@@ -194,6 +208,7 @@ class Resource(object):
             self.status_reason = resource.status_reason
             self.id = resource.id
             self.data = resource.data
+            self._attribute_values = dict(resource.attribute_values or {})
         else:
             self.resource_id = None
             # if the stack is being deleted, assume we've already been deleted
@@ -205,6 +220,7 @@ class Resource(object):
             self.status_reason = ''
             self.id = None
             self.data = []
+            self._attribute_values = {}
 
     def __eq__(self, other):
         '''Allow == comparison of two resources.'''
@@ -236,6 +252,31 @@ class Resource(object):
     def _resolve_runtime_data(self, snippet):
         return self.stack.resolve_runtime_data(snippet)
 
+    def _resolution_epoch(self):
+        return self.stack.resolution_epoch
+
+    @classmethod
+    def properties_schemata(cls):
+        '''
+        Return the properties schema of this resource class as Schema objects.
+
+        The conversion from the legacy schema format (which also compiles any
+        constraints) is performed only once for each resource class.
+        '''
+        compiled = cls.__dict__.get('_compiled_properties_schema')
+        if compiled is None or compiled[0] is not cls.properties_schema:
+            compiled = (cls.properties_schema,
+                        properties.schemata(cls.properties_schema))
+            cls._compiled_properties_schema = compiled
+        return compiled[1]
+
+    def _properties_schemata(self):
+        cls_schema = getattr(type(self), 'properties_schema', None)
+        if self.properties_schema is cls_schema:
+            return self.properties_schemata()
+        # The schema was generated for this resource (e.g. from a template)
+        return self.properties_schema
+
     def has_interface(self, resource_type):
         """Check to see if this resource is either mapped to resource_type
         or is a "resource_type".
@@ -429,11 +470,17 @@ class Resource(object):
 
             handle_data = None
             if callable(handle):
-                handle_data = (handle(resource_data) if resource_data else
-                               handle())
+                with self.stack.timings.phase('handle_%s' % action_l):
+                    handle_data = (handle(resource_data) if resource_data else
+                                   handle())
                 yield
                 if callable(check):
-                    while not check(handle_data):
+                    check_phase = 'check_%s_complete' % action_l
+                    while True:
+                        with self.stack.timings.phase(check_phase):
+                            complete = check(handle_data)
+                        if complete:
+                            break
                         yield
         except Exception as ex:
             logger.exception('%s : %s' % (action, str(self)))
@@ -461,18 +508,19 @@ class Resource(object):
                                   % str(self.state))
             raise exception.ResourceFailure(exc, self, action)
 
-        logger.info('creating %s' % str(self))
+        logger.info('creating %s', self)
 
         # Re-resolve the template, since if the resource Ref's
         # the StackId pseudo parameter, it will change after
         # the parser.Stack is stored (which is after the resources
         # are __init__'d, but before they are create()'d)
         self.t = self.stack.resolve_static_data(self.json_snippet)
-        self.properties = Properties(self.properties_schema,
+        self.properties = Properties(self._properties_schemata(),
                                      self.t.get('Properties', {}),
                                      self._resolve_runtime_data,
                                      self.name,
-                                     self.context)
+                                     self.context,
+                                     self._resolution_epoch)
         return self._do_action(action, self.properties.validate)
 
     def set_deletion_policy(self, policy):
@@ -550,11 +598,11 @@ class Resource(object):
             exc = Exception(_('Resource update already requested'))
             raise exception.ResourceFailure(exc, self, action)
 
-        logger.info('updating %s' % str(self))
+        logger.info('updating %s', self)
 
         try:
             self.state_set(action, self.IN_PROGRESS)
-            properties = Properties(self.properties_schema,
+            properties = Properties(self._properties_schemata(),
                                     after.get('Properties', {}),
                                     self._resolve_runtime_data,
                                     self.name,
@@ -570,7 +618,7 @@ class Resource(object):
                         yield
         except UpdateReplace:
             with excutils.save_and_reraise_exception():
-                logger.debug(_("Resource %s update requires replacement") %
+                logger.debug('Resource %s update requires replacement',
                              self.name)
         except Exception as ex:
             logger.exception('update %s : %s' % (str(self), str(ex)))
@@ -594,7 +642,7 @@ class Resource(object):
                                   % str(self.state))
             raise exception.ResourceFailure(exc, self, action)
 
-        logger.info(_('suspending %s') % str(self))
+        logger.info(_('suspending %s'), self)
         return self._do_action(action)
 
     def resume(self):
@@ -610,7 +658,7 @@ class Resource(object):
                                   % str(self.state))
             raise exception.ResourceFailure(exc, self, action)
 
-        logger.info(_('resuming %s') % str(self))
+        logger.info(_('resuming %s'), self)
         return self._do_action(action)
 
     def physical_resource_name(self):
@@ -652,7 +700,7 @@ class Resource(object):
         return name[0:2] + '-' + name[-postfix_length:]
 
     def validate(self):
-        logger.info(_('Validating %s') % str(self))
+        logger.info(_('Validating %s'), self)
 
         self.validate_deletion_policy(self.t)
         return self.properties.validate()
@@ -683,25 +731,33 @@ class Resource(object):
 
         initial_state = self.state
 
-        logger.info(_('deleting %s') % str(self))
+        logger.info(_('deleting %s'), self)
 
         try:
             self.state_set(action, self.IN_PROGRESS)
 
+            timings = self.stack.timings
             deletion_policy = self.t.get('DeletionPolicy', DELETE)
             handle_data = None
             if deletion_policy == DELETE:
                 if callable(getattr(self, 'handle_delete', None)):
-                    handle_data = self.handle_delete()
+                    with timings.phase('handle_delete'):
+                        handle_data = self.handle_delete()
                     yield
             elif deletion_policy == SNAPSHOT:
                 if callable(getattr(self, 'handle_snapshot_delete', None)):
-                    handle_data = self.handle_snapshot_delete(initial_state)
+                    with timings.phase('handle_snapshot_delete'):
+                        handle_data = self.handle_snapshot_delete(
+                            initial_state)
                     yield
 
             if (deletion_policy != RETAIN and
                     callable(getattr(self, 'check_delete_complete', None))):
-                while not self.check_delete_complete(handle_data):
+                while True:
+                    with timings.phase('check_delete_complete'):
+                        complete = self.check_delete_complete(handle_data)
+                    if complete:
+                        break
                     yield
 
         except Exception as ex:
@@ -738,13 +794,17 @@ class Resource(object):
             pass
 
         self.id = None
+        self.stack.runtime_data_changed(self)
 
     def resource_id_set(self, inst):
         self.resource_id = inst
+        self._attribute_values = {}
+        self.stack.runtime_data_changed(self)
         if self.id is not None:
             try:
                 rs = db_api.resource_get(self.context, self.id)
-                rs.update_and_save({'nova_instance': self.resource_id})
+                rs.update_and_save({'nova_instance': self.resource_id,
+                                    'attribute_values': None})
             except Exception as ex:
                 logger.warn(_('db error %s') % str(ex))
 
@@ -784,6 +844,7 @@ class Resource(object):
         self.action = action
         self.status = status
         self.status_reason = reason
+        self._attribute_values = {}
 
         if self.id is not None:
             try:
@@ -792,7 +853,8 @@ class Resource(object):
                                     'status': self.status,
                                     'status_reason': reason,
                                     'stack_id': self.stack.id,
-                                    'nova_instance': self.resource_id})
+                                    'nova_instance': self.resource_id,
+                                    'attribute_values': None})
 
                 self.stack.updated_time = datetime.utcnow()
             except Exception as ex:
@@ -816,12 +878,72 @@ class Resource(object):
         # By default, no attributes resolve
         pass
 
+    def _attributes_cacheable(self):
+        return (self.id is not None and self.status == self.COMPLETE and
+                self.action in (self.CREATE, self.UPDATE, self.RESUME,
+                                self.ADOPT))
+
+    def attribute_volatile(self, name):
+        '''
+        Return whether the value of the named attribute may change while the
+        resource does not, so that it must never be cached.
+
+        Resources whose attributes are derived from the attributes of other
+        resources should report them as volatile if any of those are.
+        '''
+        return name in self.volatile_attributes
+
+    def _attribute_value(self, name):
+        '''
+        Return the value of the named attribute, from the cache if possible.
+
+        Values are cached (including in the database) only while the
+        resource is in a stable state, and only if they are not None.
+        '''
+        if (self.attribute_volatile(name) or
+                not self._attributes_cacheable()):
+            return self._resolve_attribute(name)
+
+        if name in self._attribute_values:
+            return self._attribute_values[name]
+
+        value = self._resolve_attribute(name)
+        if value is not None:
+            self._attribute_values[name] = value
+            try:
+                db_api.resource_attribute_values_set(
+                    self.context, self.id, dict(self._attribute_values))
+            except Exception as ex:
+                logger.warn(_('Unable to cache attribute %(name)s of '
+                              '%(resource)s: %(ex)s') % {'name': name,
+                                                         'resource': self,
+                                                         'ex': ex})
+                del self._attribute_values[name]
+        return value
+
+    def invalidate_attributes(self):
+        '''
+        Discard any cached attribute values, because the physical resource
+        may have changed without the resource changing state.
+
+        The database is only written to if values were cached when the
+        resource was loaded, or have been cached through this copy since.
+        The change is passed on to the stack (and so to any parent stacks) in
+        memory, and each only clears what it has cached in turn.
+        '''
+        if self._attribute_values:
+            self._attribute_values = {}
+            if self.id is not None:
+                db_api.resource_attribute_values_clear(self.context, self.id)
+        self.stack.runtime_data_changed(self)
+
     def state_reset(self):
         """
         Reset state to (INIT, COMPLETE)
         """
         self.action = self.INIT
         self.status = self.COMPLETE
+        self.stack.runtime_data_changed(self)
 
     def state_set(self, action, status, reason="state changed"):
         if action not in self.ACTIONS:
@@ -833,6 +955,7 @@ class Resource(object):
         old_state = (self.action, self.status)
         new_state = (action, status)
         self._store_or_update(action, status, reason)
+        self.stack.runtime_data_changed(self)
 
         if new_state != old_state:
             self._add_event(action, status, reason)
@@ -910,6 +1033,7 @@ class Resource(object):
 
             self._add_event('signal', self.status, get_string_details())
             self.handle_signal(details)
+            self.invalidate_attributes()
         except Exception as ex:
             logger.exception(_('signal %(name)s : %(msg)s') %
                              {'name': str(self), 'msg': str(ex)})
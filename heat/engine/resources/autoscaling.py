@@ -15,7 +15,6 @@
 
 import copy
 import functools
-import json
 import math
 
 from heat.engine import environment
@@ -40,20 +39,95 @@ logger = logging.getLogger(__name__)
 
 (SCALED_RESOURCE_TYPE,) = ('OS::Heat::ScaledResource',)
 
+# Scaling adjustments waiting to be made by this engine, keyed by the stack
+# ID and name of the scaling group. A group has an entry only while a task
+# to make its adjustments is pending or running; the entry is removed by the
+# task, or by its cleanup if the task is never run.
+_pending_adjustments = {}
+
+
+def _coalesce_adjustment(pending, adjustment, adjustment_type,
+                         policies=(), mergeable=True):
+    '''
+    Add an adjustment to a list of pending (adjustment, type, policies,
+    mergeable) entries, where policies are the (name, reason) pairs of the
+    scaling policies that requested the adjustment.
+
+    A mergeable adjustment is not subject to any cooldown, so it is merged
+    with the mergeable adjustments pending before it where the outcome is
+    the same. Any other adjustment is kept separate, so that the cooldowns
+    started by those before it are checked when it is made.
+    '''
+    if mergeable and adjustment_type == 'ExactCapacity':
+        # An exact capacity supersedes anything that was to happen before
+        while pending and pending[-1][3]:
+            policies = pending.pop()[2] + policies
+    elif (mergeable and adjustment_type == 'ChangeInCapacity' and pending and
+          pending[-1][3] and pending[-1][1] == 'ChangeInCapacity'):
+        last_adjustment, last_type, last_policies, last_mergeable = pending[-1]
+        pending[-1] = (last_adjustment + adjustment, adjustment_type,
+                       last_policies + policies, True)
+        return
+    pending.append((adjustment, adjustment_type, policies, mergeable))
+
+
+def _discard_pending_adjustments(key, pending):
+    '''
+    Remove the entry for a scaling group from the pending adjustments, if it
+    is still the given list (and not one queued for a later task).
+    '''
+    if _pending_adjustments.get(key) is pending:
+        del _pending_adjustments[key]
+
+
+def _run_pending_adjustments(group_name, pending, stack):
+    '''
+    Make all of the adjustments pending for a scaling group, including any
+    that are queued while doing so.
+
+    The cooldown of a scaling policy is started only once the adjustment it
+    requested has been made. The policies requesting adjustments queued
+    behind the first may have started their cooldowns since, so they are
+    checked again before those adjustments are made.
+    '''
+    try:
+        group = stack[group_name]
+        first = True
+        while pending:
+            adjustment, adjustment_type, policies, mergeable = pending.pop(0)
+            policies = [(stack.get(name), reason) for name, reason in policies]
+            recheck, first = not first, False
+            if recheck and any(policy is not None and
+                               policy._cooldown_inprogress()
+                               for policy, reason in policies):
+                logger.info(_("%(name)s NOT performing scaling adjustment, "
+                              "policy cooldown in progress") % {
+                                  'name': group_name})
+                continue
+            group.adjust(adjustment, adjustment_type)
+            for policy, reason in policies:
+                if policy is not None:
+                    policy._cooldown_timestamp(reason)
+    finally:
+        _discard_pending_adjustments((stack.id, group_name), pending)
+
 
 class CooldownMixin(object):
     '''
     Utility class to encapsulate Cooldown related logic which is shared
     between AutoScalingGroup and ScalingPolicy
     '''
-    def _cooldown_inprogress(self):
-        inprogress = False
+    def _cooldown_period(self):
         try:
             # Negative values don't make sense, so they are clamped to zero
-            cooldown = max(0, int(self.properties['Cooldown']))
+            return max(0, int(self.properties['Cooldown']))
         except TypeError:
             # If not specified, it will be None, same as cooldown == 0
-            cooldown = 0
+            return 0
+
+    def _cooldown_inprogress(self):
+        inprogress = False
+        cooldown = self._cooldown_period()
 
         metadata = self.metadata
         if metadata and cooldown != 0:
@@ -134,6 +208,9 @@ class InstanceGroup(stack_resource.StackResource):
         "InstanceList": _("A comma-delimited list of server ip addresses. "
                           "(Heat extension).")
     }
+
+    # The list is built from the PublicIp of each member, which is volatile
+    volatile_attributes = ('InstanceList',)
     rolling_update_schema = {
         'MinInstancesInService': properties.Schema(properties.Schema.NUMBER,
                                                    default=0),
@@ -280,13 +357,15 @@ class InstanceGroup(stack_resource.StackResource):
         # resolve references within the context of this stack.
         return self.stack.resolve_runtime_data(instance_definition)
 
-    def _create_template(self, num_instances, num_replace=0):
+    def _create_template(self, num_instances, num_replace=0,
+                         instance_definition=None):
         """
         Create a template to represent autoscaled instances.
 
         Also see heat.scaling.template.resource_templates.
         """
-        instance_definition = self._get_instance_definition()
+        if instance_definition is None:
+            instance_definition = self._get_instance_definition()
         old_resources = [(instance.name, instance.t)
                          for instance in self.get_instances()]
         templates = template.resource_templates(
@@ -296,16 +375,23 @@ class InstanceGroup(stack_resource.StackResource):
     def _replace(self, min_in_service, batch_size, pause_time):
         """
         Replace the instances in the group using updated launch configuration
+
+        Batches are replaced one after another, each in its own update of the
+        nested stack, and the load balancers are reloaded between updates
+        rather than alongside them. There is no max-unavailable mode; only
+        MaxBatchSize and MinInstancesInService bound each batch.
         """
+        instance_definition = self._get_instance_definition()
+
         def changing_instances(tmpl):
-            instances = self.get_instances()
-            serialize_template = functools.partial(json.dumps, sort_keys=True)
-            current = set((i.name, serialize_template(i.t)) for i in instances)
-            updated = set((k, serialize_template(v))
-                          for k, v in tmpl['Resources'].items())
-            # includes instances to be updated and deleted
-            affected = set(k for k, v in current ^ updated)
-            return set(i.FnGetRefId() for i in instances if i.name in affected)
+            # Instances that are kept unchanged retain their own template,
+            # so those being replaced or deleted are the ones given the new
+            # instance definition itself, or no template at all.
+            resources = tmpl['Resources']
+            return set(i.FnGetRefId() for i in self.get_instances()
+                       if resources.get(i.name,
+                                        instance_definition) is
+                       instance_definition)
 
         def pause_between_batch():
             while True:
@@ -333,7 +419,8 @@ class InstanceGroup(stack_resource.StackResource):
             while remainder > 0 or efft_capacity > capacity:
                 if capacity - remainder >= efft_min_sz:
                     efft_capacity = capacity
-                template = self._create_template(efft_capacity, efft_bat_sz)
+                template = self._create_template(efft_capacity, efft_bat_sz,
+                                                 instance_definition)
                 self._lb_reload(exclude=changing_instances(template))
                 updater = self.update_with_template(template,
                                                     self._environment())
@@ -373,10 +460,18 @@ class InstanceGroup(stack_resource.StackResource):
         otherwise the instances' IP addresses may not be available.
         '''
         if self.properties[self.LOAD_BALANCER_NAMES]:
-            id_list = [inst.FnGetRefId() for inst in self.get_instances()
-                       if inst.FnGetRefId() not in exclude]
+            instances = [inst for inst in self.get_instances()
+                         if inst.FnGetRefId() not in exclude]
+            id_list = [inst.FnGetRefId() for inst in instances]
+            # Pass on the addresses we already know, to save the load
+            # balancer looking them up
+            addresses = dict((inst.FnGetRefId(), inst.ipaddress)
+                             for inst in instances
+                             if getattr(inst, 'ipaddress', None))
             for lb in self.properties[self.LOAD_BALANCER_NAMES]:
                 lb_resource = self.stack[lb]
+                if hasattr(lb_resource, 'record_member_addresses'):
+                    lb_resource.record_member_addresses(addresses)
                 if 'Instances' in lb_resource.properties_schema:
                     lb_resource.json_snippet['Properties']['Instances'] = (
                         id_list)
@@ -576,6 +671,40 @@ class AutoScalingGroup(InstanceGroup, CooldownMixin):
             if new_capacity is not None:
                 self.adjust(new_capacity, adjustment_type='ExactCapacity')
 
+    def queue_adjustment(self, adjustment,
+                         adjustment_type='ChangeInCapacity', policy=None):
+        """
+        Adjust the size of the scaling group once any adjustments already
+        queued have been made, combining it with them where no cooldown
+        applies.
+
+        If the adjustment is requested by a scaling policy, the policy's
+        cooldown is started once the adjustment has been made. Where the
+        stack defers tasks, this returns before the adjustment is made.
+        """
+        policies = ()
+        mergeable = not self._cooldown_period()
+        if policy is not None:
+            policies = ((policy.name,
+                         "%s : %s" % (adjustment_type, adjustment)),)
+            mergeable = mergeable and not policy._cooldown_period()
+
+        key = (self.stack.id, self.name)
+        pending = _pending_adjustments.get(key)
+        if pending is not None:
+            _coalesce_adjustment(pending, adjustment, adjustment_type,
+                                 policies, mergeable)
+            logger.info(_('%(name)s queued scaling adjustment, now pending: '
+                          '%(pending)s') % {'name': self.name,
+                                            'pending': pending})
+            return
+
+        pending = [(adjustment, adjustment_type, policies, mergeable)]
+        _pending_adjustments[key] = pending
+        self.stack.run_deferred(
+            functools.partial(_run_pending_adjustments, self.name, pending),
+            functools.partial(_discard_pending_adjustments, key, pending))
+
     def adjust(self, adjustment, adjustment_type='ChangeInCapacity'):
         """
         Adjust the size of the scaling group if the cooldown permits.
@@ -882,12 +1011,9 @@ class ScalingPolicy(signal_responder.SignalResponder, CooldownMixin):
                         'name': self.name, 'group': group.name,
                         'asgn_id': asgn_id,
                         'filter': self.properties[self.SCALING_ADJUSTMENT]})
-        group.adjust(int(self.properties[self.SCALING_ADJUSTMENT]),
-                     self.properties[self.ADJUSTMENT_TYPE])
-
-        self._cooldown_timestamp("%s : %s" %
-                                 (self.properties[self.ADJUSTMENT_TYPE],
-                                  self.properties[self.SCALING_ADJUSTMENT]))
+        group.queue_adjustment(int(self.properties[self.SCALING_ADJUSTMENT]),
+                               self.properties[self.ADJUSTMENT_TYPE],
+                               policy=self)
 
     def _resolve_attribute(self, name):
         '''
@@ -293,6 +293,10 @@ class Instance(resource.Resource):
                          'PublicIp': _('Public IP address of the specified '
                                        'instance.')}
 
+    # The addresses change when an EIP is associated with the instance
+    volatile_attributes = ('PrivateDnsName', 'PublicDnsName', 'PrivateIp',
+                           'PublicIp')
+
     update_allowed_keys = ('Metadata', 'Properties')
 
     # Server host name limit to 53 characters by due to typical default
@@ -547,7 +551,8 @@ class Instance(resource.Resource):
         # check validity of key
         key_name = self.properties.get(self.KEY_NAME)
         if key_name:
-            nova_utils.get_keypair(self.nova(), key_name)
+            self.stack.validation_lookup(nova_utils.get_keypair,
+                                         self.nova(), key_name)
 
         # check validity of security groups vs. network interfaces
         security_groups = self._get_security_groups()
@@ -557,7 +562,8 @@ class Instance(resource.Resource):
                 self.NETWORK_INTERFACES)
 
         # make sure the image exists.
-        nova_utils.get_image_id(self.nova(), self.properties[self.IMAGE_ID])
+        self.stack.validation_lookup(nova_utils.get_image_id, self.nova(),
+                                     self.properties[self.IMAGE_ID])
 
     @scheduler.wrappertask
     def _delete_server(self, server):
@@ -356,8 +356,42 @@ class LoadBalancer(stack_resource.StackResource):
         "SourceSecurityGroup.OwnerAlias": "Owner of the source security group."
     }
 
+    # The DNSName is the PublicIp of the nested instance, which is volatile
+    volatile_attributes = ('DNSName',)
+
     update_allowed_keys = ('Properties',)
 
+    def __init__(self, name, json_snippet, stack):
+        super(LoadBalancer, self).__init__(name, json_snippet, stack)
+        self._member_addresses = {}
+
+    def record_member_addresses(self, addresses):
+        '''
+        Record the IP addresses of servers, keyed by server ID, that are (or
+        are about to become) members, so that they need not be fetched from
+        Nova when the configuration is generated.
+        '''
+        self._member_addresses.update((server, address)
+                                      for server, address in addresses.items()
+                                      if address)
+
+    def _member_ipaddresses(self, instances):
+        '''
+        Return the IP addresses of the given member servers, fetching any
+        that are not already known from Nova in a single request.
+        '''
+        unknown = [i for i in instances if i not in self._member_addresses]
+        if unknown:
+            self._member_addresses.update(
+                nova_utils.servers_to_ipaddresses(self.nova(), unknown))
+
+        # Forget about servers that are no longer members
+        self._member_addresses = dict((i, self._member_addresses[i])
+                                      for i in instances
+                                      if i in self._member_addresses)
+        return [self._member_addresses.get(i) or '0.0.0.0'
+                for i in instances]
+
     def _haproxy_config(self, templ, instances):
         # initial simplifications:
         # - only one Listener
@@ -411,9 +445,7 @@ class LoadBalancer(stack_resource.StackResource):
 
         servers = []
         n = 1
-        client = self.nova()
-        for i in instances:
-            ip = nova_utils.server_to_ipaddress(client, i) or '0.0.0.0'
+        for ip in self._member_ipaddresses(instances):
             logger.debug(_('haproxy server:%s') % ip)
             servers.append('%sserver server%d %s:%s %s' % (spaces, n,
                                                            ip, inst_port,
@@ -464,6 +496,10 @@ class LoadBalancer(stack_resource.StackResource):
 
             md = self.nested()['LB_instance'].metadata
             files = md['AWS::CloudFormation::Init']['config']['files']
+            if files['/etc/haproxy/haproxy.cfg'].get('content') == cfg:
+                logger.debug(_('haproxy configuration of %s is unchanged')
+                             % self.name)
+                return
             files['/etc/haproxy/haproxy.cfg']['content'] = cfg
 
             self.nested()['LB_instance'].metadata = md
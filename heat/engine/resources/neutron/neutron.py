@@ -28,6 +28,8 @@ logger = logging.getLogger(__name__)
 
 class NeutronResource(resource.Resource):
 
+    volatile_attributes = ('show', 'status')
+
     def validate(self):
         '''
         Validate any of the provided params
@@ -20,7 +20,9 @@ from email.mime.text import MIMEText
 import json
 import os
 import pkgutil
+import random
 import six
+import sys
 
 from oslo.config import cfg
 
@@ -127,58 +129,52 @@ def get_keypair(nova_client, key_name):
     raise exception.UserKeyPairMissing(key_name=key_name)
 
 
-def build_userdata(resource, userdata=None, instance_user=None,
-                   user_data_format='HEAT_CFNTOOLS'):
-    '''
-    Build multipart data blob for CloudInit which includes user-supplied
-    Metadata, user data, and the required Heat in-instance configuration.
+# Flattened MIME parts of the user data which do not depend on the resource,
+# keyed by the instance user and the configuration they were built from
+_prepared_userdata = {}
+_PREPARED_USERDATA_LIMIT = 64
 
-    :param resource: the resource implementation
-    :type resource: heat.engine.Resource
-    :param userdata: user data string
-    :type userdata: str or None
-    :param instance_user: the user to create on the server
-    :type instance_user: string
-    :param user_data_format: Format of user data to return
-    :type user_data_format: string
-    :returns: multipart mime as a string
-    '''
+_BOUNDARY_FORMAT = '%s%%0%dd==' % ('=' * 15, len(repr(sys.maxsize - 1)))
 
-    if user_data_format == 'RAW':
-        return userdata
 
-    def make_subpart(content, filename, subtype=None):
-        if subtype is None:
-            subtype = os.path.splitext(filename)[0]
-        msg = MIMEText(content, _subtype=subtype)
-        msg.add_header('Content-Disposition', 'attachment',
-                       filename=filename)
-        return msg
+def _make_subpart(content, filename, subtype=None):
+    if subtype is None:
+        subtype = os.path.splitext(filename)[0]
+    msg = MIMEText(content, _subtype=subtype)
+    msg.add_header('Content-Disposition', 'attachment',
+                   filename=filename)
+    return msg.as_string()
 
-    def read_cloudinit_file(fn):
-        data = pkgutil.get_data('heat', 'cloudinit/%s' % fn)
-        data = data.replace('@INSTANCE_USER@',
-                            instance_user or cfg.CONF.instance_user)
-        return data
 
-    attachments = [(read_cloudinit_file('config'), 'cloud-config'),
-                   (read_cloudinit_file('boothook.sh'), 'boothook.sh',
-                    'cloud-boothook'),
-                   (read_cloudinit_file('part_handler.py'),
-                    'part-handler.py'),
-                   (userdata, 'cfn-userdata', 'x-cfninitdata'),
-                   (read_cloudinit_file('loguserdata.py'),
-                    'loguserdata.py', 'x-shellscript')]
+def _prepare_userdata(instance_user):
+    '''
+    Return the flattened MIME parts of the user data that are the same for
+    every resource, as a tuple of the parts preceding the user-supplied
+    user data, the part following it and the parts ending the message.
 
-    if 'Metadata' in resource.t:
-        attachments.append((json.dumps(resource.metadata),
-                            'cfn-init-data', 'x-cfninitdata'))
+    These are built only once for each instance user and configuration.
+    '''
+    key = (instance_user,
+           cfg.CONF.heat_watch_server_url,
+           cfg.CONF.heat_metadata_server_url,
+           cfg.CONF.instance_connection_is_secure,
+           cfg.CONF.instance_connection_https_validate_certificates)
+    prepared = _prepared_userdata.get(key)
+    if prepared is not None:
+        return prepared
 
-    attachments.append((cfg.CONF.heat_watch_server_url,
-                        'cfn-watch-server', 'x-cfninitdata'))
+    def read_cloudinit_file(fn):
+        data = pkgutil.get_data('heat', 'cloudinit/%s' % fn)
+        data = data.replace('@INSTANCE_USER@', instance_user)
+        return data
 
-    attachments.append((cfg.CONF.heat_metadata_server_url,
-                        'cfn-metadata-server', 'x-cfninitdata'))
+    heading = (_make_subpart(read_cloudinit_file('config'), 'cloud-config'),
+               _make_subpart(read_cloudinit_file('boothook.sh'),
+                             'boothook.sh', 'cloud-boothook'),
+               _make_subpart(read_cloudinit_file('part_handler.py'),
+                             'part-handler.py'))
+    loguserdata = _make_subpart(read_cloudinit_file('loguserdata.py'),
+                                'loguserdata.py', 'x-shellscript')
 
     # Create a boto config which the cfntools on the host use to know
     # where the cfn and cw API's are to be accessed
@@ -196,11 +192,59 @@ def build_userdata(resource, userdata=None, instance_user=None,
                           "cloudwatch_region_name = heat",
                           "cloudwatch_region_endpoint = %s" %
                           cw_url.hostname])
-    attachments.append((boto_cfg,
-                        'cfn-boto-cfg', 'x-cfninitdata'))
+    trailing = (_make_subpart(cfg.CONF.heat_watch_server_url,
+                              'cfn-watch-server', 'x-cfninitdata'),
+                _make_subpart(cfg.CONF.heat_metadata_server_url,
+                              'cfn-metadata-server', 'x-cfninitdata'),
+                _make_subpart(boto_cfg, 'cfn-boto-cfg', 'x-cfninitdata'))
+
+    if len(_prepared_userdata) >= _PREPARED_USERDATA_LIMIT:
+        _prepared_userdata.clear()
+    prepared = _prepared_userdata[key] = (heading, loguserdata, trailing)
+    return prepared
+
+
+def build_userdata(resource, userdata=None, instance_user=None,
+                   user_data_format='HEAT_CFNTOOLS'):
+    '''
+    Build multipart data blob for CloudInit which includes user-supplied
+    Metadata, user data, and the required Heat in-instance configuration.
 
-    subparts = [make_subpart(*args) for args in attachments]
-    mime_blob = MIMEMultipart(_subparts=subparts)
+    :param resource: the resource implementation
+    :type resource: heat.engine.Resource
+    :param userdata: user data string
+    :type userdata: str or None
+    :param instance_user: the user to create on the server
+    :type instance_user: string
+    :param user_data_format: Format of user data to return
+    :type user_data_format: string
+    :returns: multipart mime as a string
+    '''
+
+    if user_data_format == 'RAW':
+        return userdata
+
+    heading, loguserdata, trailing = _prepare_userdata(
+        instance_user or cfg.CONF.instance_user)
+
+    subparts = list(heading)
+    subparts.append(_make_subpart(userdata, 'cfn-userdata', 'x-cfninitdata'))
+    subparts.append(loguserdata)
+
+    if 'Metadata' in resource.t:
+        subparts.append(_make_subpart(json.dumps(resource.metadata),
+                                      'cfn-init-data', 'x-cfninitdata'))
+
+    subparts.extend(trailing)
+
+    # Join the already flattened parts exactly as the email package would
+    # when flattening them as part of the multipart message
+    boundary = _BOUNDARY_FORMAT % random.randrange(sys.maxsize)
+    mime_blob = MIMEMultipart(boundary=boundary)
+    separator = '\n--%s\n' % boundary
+    mime_blob.set_payload('--%s\n%s\n--%s--\n' % (boundary,
+                                                  separator.join(subparts),
+                                                  boundary))
 
     return mime_blob.as_string()
 
@@ -303,6 +347,43 @@ def server_to_ipaddress(client, server):
                 return server.networks[n][0]
 
 
+def servers_to_ipaddresses(client, servers):
+    '''
+    Return a dict of the IP addresses of the given servers, keyed by server
+    ID, fetching them from Nova by listing the servers rather than with a
+    request for each one.
+
+    Nova returns the list in pages (of at most osapi_max_limit servers), so
+    pages are fetched until all of the servers have been found or the list
+    is exhausted. Servers that are not found, or have no address, are
+    omitted.
+    '''
+    servers = set(servers)
+    if len(servers) == 1:
+        server = next(iter(servers))
+        address = server_to_ipaddress(client, server)
+        return {server: address} if address else {}
+
+    addresses = {}
+    remaining = set(servers)
+    marker = None
+    while remaining:
+        page = client.servers.list(search_opts={'marker': marker})
+        # Stop if the marker was ignored, rather than loop forever
+        if not page or page[-1].id == marker:
+            break
+        for server in page:
+            if server.id not in remaining:
+                continue
+            remaining.discard(server.id)
+            for n in server.networks:
+                if len(server.networks[n]) > 0:
+                    addresses[server.id] = server.networks[n][0]
+                    break
+        marker = page[-1].id
+    return addresses
+
+
 def absolute_limits(nova_client):
     """Return the absolute limits as a dictionary."""
     limits = nova_client.limits.get()
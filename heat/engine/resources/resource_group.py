@@ -15,9 +15,13 @@
 
 import copy
 
+import six
+
+from heat.db import api as db_api
 from heat.engine import parser
 from heat.engine import properties
 from heat.engine import constraints
+from heat.engine import resource
 from heat.engine import stack_resource
 from heat.common import exception
 
@@ -120,29 +124,98 @@ class ResourceGroup(stack_resource.StackResource):
     def handle_delete(self):
         return self.delete_nested()
 
+    def _stored_member_values(self, names, attr_name=None):
+        '''
+        Return a dict of the reference IDs (or, if attr_name is given, the
+        cached values of that attribute) of the named members, read from
+        their stored resource rows in a single query.
+
+        Members whose values cannot be determined without loading them are
+        omitted. Nothing is read if the nested stack is already loaded.
+        '''
+        if self._nested is not None or self.resource_id is None:
+            return {}
+
+        res_def = self.properties[self.RESOURCE_DEF]
+        res_class = self.stack.env.get_class(res_def[self.RESOURCE_DEF_TYPE])
+        if attr_name is None:
+            method = 'FnGetRefId'
+        elif self.attribute_volatile(attr_name):
+            return {}
+        else:
+            method = 'FnGetAtt'
+        if (six.get_unbound_function(getattr(res_class, method)) is not
+                six.get_unbound_function(getattr(resource.Resource, method))):
+            return {}
+
+        try:
+            rows = db_api.resource_get_all_by_stack(self.context,
+                                                    self.resource_id)
+        except exception.NotFound:
+            return {}
+
+        names = set(names)
+        values = {}
+        for row in rows:
+            if row.name not in names:
+                continue
+            if attr_name is None:
+                values[row.name] = unicode(row.name
+                                           if row.nova_instance is None
+                                           else row.nova_instance)
+            elif (row.status == resource.Resource.COMPLETE and
+                  row.action in (resource.Resource.CREATE,
+                                 resource.Resource.UPDATE,
+                                 resource.Resource.RESUME,
+                                 resource.Resource.ADOPT) and
+                  attr_name in (row.attribute_values or {})):
+                values[row.name] = row.attribute_values[attr_name]
+        return values
+
+    def _member_values(self, names, attr_name=None):
+        '''
+        Return a list of the reference IDs (or, if attr_name is given, the
+        values of that attribute) of the named members, in order.
+
+        Values are read from the database where possible, and the nested
+        stack is loaded only for those that are not available there.
+        '''
+        values = self._stored_member_values(names, attr_name)
+
+        def member_value(name):
+            if name in values:
+                return values[name]
+            res = self.nested()[name]
+            return (res.FnGetRefId() if attr_name is None
+                    else res.FnGetAtt(attr_name))
+
+        return [member_value(name) for name in names]
+
+    def attribute_volatile(self, key):
+        if key.startswith("resource."):
+            parts = key.split(".", 2)
+            attr_name = parts[-1] if len(parts) > 2 else None
+        else:
+            attr_name = None if "refs" == key else key
+        if attr_name is None:
+            return False
+        res_def = self.properties[self.RESOURCE_DEF]
+        res_class = self.stack.env.get_class(res_def[self.RESOURCE_DEF_TYPE])
+        return attr_name in res_class.volatile_attributes
+
     def FnGetAtt(self, key):
         if key.startswith("resource."):
             parts = key.split(".", 2)
             attr_name = parts[-1] if len(parts) > 2 else None
             try:
-                res = self.nested()[parts[1]]
+                return self._member_values([parts[1]], attr_name)[0]
             except KeyError:
                 raise exception.InvalidTemplateAttribute(resource=self.name,
                                                          key=key)
-            else:
-                return (res.FnGetRefId() if attr_name is None
-                        else res.FnGetAtt(attr_name))
         else:
-
-            def get_aggregated_attr(func, *args):
-                for n in range(self.properties[self.COUNT]):
-                    resource_method = getattr(self.nested()[str(n)], func)
-                    yield resource_method(*args)
-
-            method_name, method_call = (("FnGetRefId", []) if "refs" == key
-                                        else ("FnGetAtt", [key]))
-            return [val for val in get_aggregated_attr(method_name,
-                                                       *method_call)]
+            names = [str(n) for n in range(self.properties[self.COUNT])]
+            return self._member_values(names,
+                                       None if "refs" == key else key)
 
     def _assemble_nested(self, count, include_all=False):
         child_template = copy.deepcopy(template_template)
@@ -258,6 +258,9 @@ class Server(resource.Resource):
                         'address of the server.'),
     }
 
+    # The addresses change when a floating IP is associated with the server
+    volatile_attributes = ('show', 'addresses', 'networks', 'first_address')
+
     update_allowed_keys = ('Metadata', 'Properties')
 
     # Server host name limit to 53 characters by due to typical default
@@ -527,7 +530,8 @@ class Server(resource.Resource):
         # check validity of key
         key_name = self.properties.get(self.KEY_NAME)
         if key_name:
-            nova_utils.get_keypair(self.nova(), key_name)
+            self.stack.validation_lookup(nova_utils.get_keypair,
+                                         self.nova(), key_name)
 
         # either volume_id or snapshot_id needs to be specified, but not both
         # for block device mapping.
@@ -552,7 +556,8 @@ class Server(resource.Resource):
         # make sure the image exists if specified.
         image = self.properties.get(self.IMAGE)
         if image:
-            nova_utils.get_image_id(self.nova(), image)
+            self.stack.validation_lookup(nova_utils.get_image_id,
+                                         self.nova(), image)
         elif not image and not bootable_vol:
             msg = _('Neither image nor bootable volume is specified for'
                     ' instance %s') % self.name
@@ -585,7 +590,8 @@ class Server(resource.Resource):
         metadata = self.properties.get(self.METADATA)
         personality = self._personality()
         if metadata is not None or personality is not None:
-            limits = nova_utils.absolute_limits(self.nova())
+            limits = self.stack.validation_lookup(nova_utils.absolute_limits,
+                                                  self.nova())
 
         # verify that the number of metadata entries is not greater
         # than the maximum number allowed in the provider's absolute
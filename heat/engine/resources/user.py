@@ -188,6 +188,8 @@ class AccessKey(resource.Resource):
         ),
     }
 
+    registers_access_allowed_handler = True
+
     def __init__(self, name, json_snippet, stack):
         super(AccessKey, self).__init__(name, json_snippet, stack)
         self._secret = None
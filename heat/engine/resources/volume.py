@@ -432,6 +432,8 @@ class CinderVolume(Volume):
                       'not.'),
     }
 
+    volatile_attributes = ('status',)
+
     _volume_creating_status = ['creating', 'restoring-backup', 'downloading']
 
     def _display_name(self):
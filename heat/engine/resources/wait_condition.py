@@ -86,6 +86,8 @@ class WaitConditionHandle(signal_responder.SignalResponder):
             # is a Metadata descriptor object which only supports get/set
             rsrc_metadata.update({new_metadata['UniqueId']: safe_metadata})
             self.metadata = rsrc_metadata
+            # The Data of the WaitCondition has changed
+            self.invalidate_attributes()
         else:
             logger.error(_("Metadata failed validation for %s") % self.name)
             raise ValueError(_("Metadata format invalid"))
@@ -185,6 +187,9 @@ class WaitCondition(resource.Resource):
 
     update_allowed_keys = ('Properties',)
 
+    # The Data changes as signals arrive at the handle
+    volatile_attributes = ('Data',)
+
     def __init__(self, name, json_snippet, stack):
         super(WaitCondition, self).__init__(name, json_snippet, stack)
 
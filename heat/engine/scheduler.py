@@ -119,7 +119,14 @@ class TaskRunner(object):
         self._runner = None
         self._done = False
         self._timeout = None
-        self.name = task_description(task)
+        self._name = None
+
+    @property
+    def name(self):
+        """Return a description of the task, generated when first needed."""
+        if self._name is None:
+            self._name = task_description(self._task)
+        return self._name
 
     def __str__(self):
         """Return a human-readable string representation of the task."""
@@ -128,7 +135,7 @@ class TaskRunner(object):
     def _sleep(self, wait_time):
         """Sleep for the specified number of seconds."""
         if ENABLE_SLEEP and wait_time is not None:
-            logger.debug(_('%s sleeping') % str(self))
+            logger.debug('%s sleeping', self)
             eventlet.sleep(wait_time)
 
     def __call__(self, wait_time=1, timeout=None):
@@ -151,7 +158,7 @@ class TaskRunner(object):
         """
         assert self._runner is None, "Task already started"
 
-        logger.debug(_('%s starting') % str(self))
+        logger.debug('%s starting', self)
 
         if timeout is not None:
             self._timeout = Timeout(self, timeout)
@@ -163,7 +170,7 @@ class TaskRunner(object):
         else:
             self._runner = False
             self._done = True
-            logger.debug(_('%s done (not resumable)') % str(self))
+            logger.debug('%s done (not resumable)', self)
 
     def step(self):
         """
@@ -174,7 +181,7 @@ class TaskRunner(object):
             assert self._runner is not None, "Task not started"
 
             if self._timeout is not None and self._timeout.expired():
-                logger.info(_('%s timed out') % str(self))
+                logger.info(_('%s timed out'), self)
 
                 try:
                     self._runner.throw(self._timeout)
@@ -184,13 +191,13 @@ class TaskRunner(object):
                     # Clean up in case task swallows exception without exiting
                     self.cancel()
             else:
-                logger.debug(_('%s running') % str(self))
+                logger.debug('%s running', self)
 
                 try:
                     next(self._runner)
                 except StopIteration:
                     self._done = True
-                    logger.debug(_('%s complete') % str(self))
+                    logger.debug('%s complete', self)
 
         return self._done
 
@@ -207,7 +214,7 @@ class TaskRunner(object):
     def cancel(self):
         """Cancel the task and mark it as done."""
         if not self.done():
-            logger.debug(_('%s cancelled') % str(self))
+            logger.debug('%s cancelled', self)
             try:
                 if self.started():
                     self._runner.close()
@@ -310,12 +317,18 @@ class DependencyTaskGroup(object):
         self._runners = dict((o, TaskRunner(task, o)) for o in dependencies)
         self._graph = dependencies.graph(reverse=reverse)
         self.aggregate_exceptions = aggregate_exceptions
-
-        if name is None:
-            name = '(%s) %s' % (getattr(task, '__name__',
-                                        task_description(task)),
-                                str(dependencies))
-        self.name = name
+        self._task = task
+        self._dependencies = dependencies
+        self._name = name
+
+    @property
+    def name(self):
+        """Return a description of the task, generated when first needed."""
+        if self._name is None:
+            self._name = '(%s) %s' % (getattr(self._task, '__name__',
+                                              task_description(self._task)),
+                                      str(self._dependencies))
+        return self._name
 
     def __repr__(self):
         """Return a string representation of the task."""
@@ -392,9 +405,14 @@ class PollingTaskGroup(object):
     def __init__(self, tasks, name=None):
         """Initialise with a list of tasks."""
         self._tasks = list(tasks)
-        if name is None:
-            name = ', '.join(task_description(t) for t in self._tasks)
-        self.name = name
+        self._name = name
+
+    @property
+    def name(self):
+        """Return a description of the task, generated when first needed."""
+        if self._name is None:
+            self._name = ', '.join(task_description(t) for t in self._tasks)
+        return self._name
 
     @staticmethod
     def _args(arg_lists):
@@ -16,9 +16,12 @@
 import functools
 import json
 
+import eventlet
 from oslo.config import cfg
 import webob
 
+cfg.CONF.import_opt('deferred_task_retry_interval', 'heat.common.config')
+cfg.CONF.import_opt('deferred_task_max_retries', 'heat.common.config')
 cfg.CONF.import_opt('engine_life_check_timeout', 'heat.common.config')
 cfg.CONF.import_opt('max_resources_per_stack', 'heat.common.config')
 cfg.CONF.import_opt('max_stacks_per_tenant', 'heat.common.config')
@@ -28,6 +31,7 @@ from heat.common import context
 from heat.db import api as db_api
 from heat.engine import api
 from heat.rpc import api as rpc_api
+from heat.rpc import changes
 from heat.engine import attributes
 from heat.engine import clients
 from heat.engine.event import Event
@@ -36,6 +40,7 @@ from heat.common import exception
 from heat.common import identifier
 from heat.common import heat_keystoneclient as hkc
 from heat.engine import parser
+from heat.engine import profiler
 from heat.engine import properties
 from heat.engine import resource
 from heat.engine import resources
@@ -53,6 +58,10 @@ from heat.openstack.common import uuidutils
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of (stack state, stack user, resource) combinations for
+# which authorisation to describe the resource is remembered
+STACK_USER_ACCESS_CACHE_SIZE = 1000
+
 
 def request_context(func):
     @functools.wraps(func)
@@ -190,7 +199,7 @@ class EngineService(service.Service):
     by the RPC caller.
     """
 
-    RPC_API_VERSION = '1.1'
+    RPC_API_VERSION = '1.5'
 
     def __init__(self, host, topic, manager=None):
         super(EngineService, self).__init__(host, topic)
@@ -198,6 +207,7 @@ class EngineService(service.Service):
 
         self.engine_id = stack_lock.StackLock.generate_engine_id()
         self.thread_group_mgr = ThreadGroupManager()
+        self._stack_user_access = {}
         self.listener = EngineListener(host, self.engine_id,
                                        self.thread_group_mgr)
         logger.debug(_("Starting listener for engine %s") % self.engine_id)
@@ -413,6 +423,7 @@ class EngineService(service.Service):
 
         stack.store()
 
+        self._defer_tasks(cnxt, stack)
         self.thread_group_mgr.start_with_lock(cnxt, stack, self.engine_id,
                                               _stack_create, stack)
 
@@ -465,6 +476,7 @@ class EngineService(service.Service):
         self._validate_deferred_auth_context(cnxt, updated_stack)
         updated_stack.validate()
 
+        self._defer_tasks(cnxt, current_stack)
         self.thread_group_mgr.start_with_lock(cnxt, current_stack,
                                               self.engine_id,
                                               current_stack.update,
@@ -492,6 +504,7 @@ class EngineService(service.Service):
         if not tmpl_resources:
             return {'Error': 'At least one Resources member must be defined.'}
 
+        errors = []
         for res in tmpl_resources.values():
             try:
                 if not res.get('Type'):
@@ -520,7 +533,10 @@ class EngineService(service.Service):
                 ResourceClass.validate_deletion_policy(res)
                 props.validate(with_value=False)
             except Exception as ex:
-                return {'Error': str(ex)}
+                errors.append(str(ex))
+
+        if errors:
+            return {'Error': '\n'.join(errors)}
 
         tmpl_params = tmpl.parameters(None, {}, validate_value=False)
         is_real_param = lambda p: p.name not in tmpl_params.PSEUDO_PARAMETERS
@@ -553,6 +569,17 @@ class EngineService(service.Service):
             return s.raw_template.template
         return None
 
+    @request_context
+    def get_stack_timings(self, cnxt, stack_identity):
+        """
+        Get the time spent in each phase of the recent operations on a stack.
+
+        :param cnxt: RPC context.
+        :param stack_identity: Name of the stack you want to see.
+        """
+        s = self._get_stack(cnxt, stack_identity, show_deleted=True)
+        return profiler.history(cnxt, s.id)
+
     @request_context
     def delete_stack(self, cnxt, stack_identity):
         """
@@ -640,6 +667,19 @@ class EngineService(service.Service):
         """
         return resource.get_types(support_status)
 
+    def resource_registry_version(self, cnxt):
+        """
+        Return a digest that changes whenever the available resource types
+        may have changed.
+
+        The results of list_resource_types, resource_schema and
+        generate_template depend only on the resource types registered, so
+        they can be cached until this changes.
+
+        :param cnxt: RPC context.
+        """
+        return resources.global_env().registry.digest()
+
     def resource_schema(self, cnxt, type_name):
         """
         Return the schema of the specified type.
@@ -710,12 +750,8 @@ class EngineService(service.Service):
                                             get_stack(e.stack_id)))
                 for e in events]
 
-    def _authorize_stack_user(self, cnxt, stack, resource_name):
-        '''
-        Filter access to describe_stack_resource for stack in-instance users
-        - The user must map to a User resource defined in the requested stack
-        - The user resource must validate OK against any Policy specified
-        '''
+    @staticmethod
+    def _stack_user_access_key(cnxt):
         # We're expecting EC2 credentials because all in-instance credentials
         # are deployed as ec2 keypairs
         try:
@@ -724,21 +760,58 @@ class EngineService(service.Service):
             ec2_creds = None
 
         if not ec2_creds:
+            return None
+
+        return ec2_creds.get('access')
+
+    def _authorize_stack_user(self, cnxt, stack, resource_name):
+        '''
+        Filter access to describe_stack_resource for stack in-instance users
+        - The user must map to a User resource defined in the requested stack
+        - The user resource must validate OK against any Policy specified
+        '''
+        access_key = self._stack_user_access_key(cnxt)
+        if access_key is None:
             return False
 
-        access_key = ec2_creds.get('access')
         return stack.access_allowed(access_key, resource_name)
 
     @request_context
-    def describe_stack_resource(self, cnxt, stack_identity, resource_name):
+    def describe_stack_resource(self, cnxt, stack_identity, resource_name,
+                                etag=None):
+        '''
+        Return a description of a stack resource, including an ETag for it
+        where possible.
+
+        If an ETag is passed and it matches the current description, None is
+        returned instead. This is determined from the stored resource,
+        without loading the stack, whenever the requester has already been
+        authorised to access the resource in the stack's current state.
+        '''
         s = self._get_stack(cnxt, stack_identity)
+
+        stack_user = cfg.CONF.heat_stack_user_role in cnxt.roles
+        access = (s.id, s.raw_template_id, s.updated_at,
+                  self._stack_user_access_key(cnxt), resource_name)
+
+        if etag is not None and (not stack_user or
+                                 access in self._stack_user_access):
+            rs = db_api.resource_get_by_name_and_stack(cnxt, resource_name,
+                                                       s.id)
+            if (rs is not None and
+                    api.stored_resource_etag(rs, s.raw_template_id) == etag):
+                return None
+
         stack = parser.Stack.load(cnxt, stack=s)
 
-        if cfg.CONF.heat_stack_user_role in cnxt.roles:
+        if stack_user:
             if not self._authorize_stack_user(cnxt, stack, resource_name):
                 logger.warning(_("Access denied to resource %s")
                                % resource_name)
                 raise exception.Forbidden()
+            if len(self._stack_user_access) >= STACK_USER_ACCESS_CACHE_SIZE:
+                self._stack_user_access.clear()
+            self._stack_user_access[access] = True
 
         if resource_name not in stack:
             raise exception.ResourceNotFound(resource_name=resource_name,
@@ -748,7 +821,13 @@ class EngineService(service.Service):
         if resource.id is None:
             raise exception.ResourceNotAvailable(resource_name=resource_name)
 
-        return api.format_stack_resource(stack[resource_name])
+        res = api.format_stack_resource(stack[resource_name])
+        res_etag = api.format_resource_etag(res, s.raw_template_id)
+        if res_etag is not None:
+            if res_etag == etag:
+                return None
+            res[rpc_api.RES_ETAG] = res_etag
+        return res
 
     @request_context
     def resource_signal(self, cnxt, stack_identity, resource_name, details):
@@ -770,8 +849,65 @@ class EngineService(service.Service):
             raise exception.ResourceNotAvailable(resource_name=resource_name)
 
         if callable(stack[resource_name].signal):
+            # Work deferred by the signal (e.g. a scaling adjustment) is done
+            # in the background, so that the signal is not kept waiting
+            self._defer_tasks(stack_context, stack)
             stack[resource_name].signal(details)
 
+            # The signal may have changed the output values
+            stack.run_deferred(parser.Stack.cache_outputs)
+
+    def _defer_tasks(self, cnxt, stack):
+        '''
+        Arrange for tasks deferred by the given stack (see
+        Stack.run_deferred()) to be run in the background.
+        '''
+        stack.deferred_task_runner = functools.partial(
+            self.thread_group_mgr.start, stack.id,
+            self._run_deferred_task, cnxt, stack.id)
+
+    def _run_deferred_task(self, cnxt, stack_id, task, cleanup=None):
+        '''
+        Run a deferred task (e.g. a scaling adjustment requested by a
+        resource signal) on a freshly loaded copy of the stack, waiting for
+        the stack lock to become available first.
+
+        The cleanup callable, if any, is always called at the end, whether or
+        not the task could be run.
+        '''
+        try:
+            s = db_api.stack_get(cnxt, stack_id)
+            if s is None:
+                return
+            lock = stack_lock.StackLock(cnxt,
+                                        parser.Stack.load(cnxt, stack=s),
+                                        self.engine_id)
+            retries = 0
+            while True:
+                try:
+                    lock.acquire()
+                    break
+                except rpc_common.ClientException:
+                    if retries >= cfg.CONF.deferred_task_max_retries:
+                        logger.warning(_("Stack %s is still locked, "
+                                         "abandoning deferred task")
+                                       % stack_id)
+                        return
+                    retries += 1
+                    logger.debug(_("Stack %s is locked, deferring task")
+                                 % stack_id)
+                    eventlet.sleep(cfg.CONF.deferred_task_retry_interval)
+
+            try:
+                s = db_api.stack_get(cnxt, stack_id)
+                if s is not None:
+                    task(parser.Stack.load(cnxt, stack=s))
+            finally:
+                lock.release(stack_id)
+        finally:
+            if cleanup is not None:
+                cleanup()
+
     @request_context
     def find_physical_resource(self, cnxt, physical_resource_id):
         """
@@ -823,6 +959,7 @@ class EngineService(service.Service):
         s = self._get_stack(cnxt, stack_identity)
 
         stack = parser.Stack.load(cnxt, stack=s)
+        self._defer_tasks(cnxt, stack)
         self.thread_group_mgr.start_with_lock(cnxt, stack, self.engine_id,
                                               _stack_suspend, stack)
 
@@ -838,6 +975,7 @@ class EngineService(service.Service):
         s = self._get_stack(cnxt, stack_identity)
 
         stack = parser.Stack.load(cnxt, stack=s)
+        self._defer_tasks(cnxt, stack)
         self.thread_group_mgr.start_with_lock(cnxt, stack, self.engine_id,
                                               _stack_resume, stack)
 
@@ -1057,9 +1195,19 @@ class EngineService(service.Service):
         db_api.software_config_delete(cnxt, config_id)
 
     @request_context
-    def list_software_deployments(self, cnxt, server_id):
+    def list_software_deployments(self, cnxt, server_id, etag=None):
+        '''
+        Return the software deployments, optionally only those of a server.
+
+        If the ETag of a previously returned list (as calculated by
+        format_software_deployments_etag()) is passed and the list is
+        unchanged, None is returned instead.
+        '''
         all_sd = db_api.software_deployment_get_all(cnxt, server_id)
         result = [api.format_software_deployment(sd) for sd in all_sd]
+        if (etag is not None and
+                api.format_software_deployments_etag(result) == etag):
+            return None
         return result
 
     @rpc_common.client_exceptions(exception.NotFound)
@@ -1081,31 +1229,91 @@ class EngineService(service.Service):
             'action': action,
             'status': status,
             'status_reason': status_reason})
+        self._notify_deployments_changed(cnxt, [sd])
         return api.format_software_deployment(sd)
 
+    @rpc_common.client_exceptions(exception.NotFound)
+    @request_context
+    def create_software_deployments(self, cnxt, deployments):
+        '''
+        Create a number of software deployments in a single transaction.
+
+        Each deployment is a dict of the arguments to
+        create_software_deployment(), of which the server_id and config_id
+        are required. If any of the configs does not exist, no deployments
+        are created.
+        '''
+        values_list = [{
+            'config_id': d[rpc_api.SOFTWARE_DEPLOYMENT_CONFIG_ID],
+            'server_id': d[rpc_api.SOFTWARE_DEPLOYMENT_SERVER_ID],
+            'input_values': d.get(rpc_api.SOFTWARE_DEPLOYMENT_INPUT_VALUES,
+                                  {}),
+            'signal_id': d.get(rpc_api.SOFTWARE_DEPLOYMENT_SIGNAL_ID),
+            'tenant': cnxt.tenant_id,
+            'action': d.get(rpc_api.SOFTWARE_DEPLOYMENT_ACTION, 'INIT'),
+            'status': d.get(rpc_api.SOFTWARE_DEPLOYMENT_STATUS, 'COMPLETE'),
+            'status_reason': d.get(
+                rpc_api.SOFTWARE_DEPLOYMENT_STATUS_REASON, '')}
+            for d in deployments]
+        all_sd = db_api.software_deployment_create_all(cnxt, values_list)
+        self._notify_deployments_changed(cnxt, all_sd)
+        return [api.format_software_deployment(sd) for sd in all_sd]
+
+    @staticmethod
+    def _notify_deployments_changed(cnxt, deployments):
+        notifier = changes.ChangeNotifier()
+        for server_id in set(sd.server_id for sd in deployments):
+            notifier.software_deployments_changed(cnxt, server_id)
+
+    @staticmethod
+    def _software_deployment_update_data(values):
+        # Only the values that are set are updated
+        keys = (rpc_api.SOFTWARE_DEPLOYMENT_CONFIG_ID,
+                rpc_api.SOFTWARE_DEPLOYMENT_INPUT_VALUES,
+                rpc_api.SOFTWARE_DEPLOYMENT_OUTPUT_VALUES,
+                rpc_api.SOFTWARE_DEPLOYMENT_ACTION,
+                rpc_api.SOFTWARE_DEPLOYMENT_STATUS,
+                rpc_api.SOFTWARE_DEPLOYMENT_STATUS_REASON)
+        return dict((k, values[k]) for k in keys if values.get(k))
+
     @rpc_common.client_exceptions(exception.NotFound)
     @request_context
     def update_software_deployment(self, cnxt, deployment_id, config_id,
                                    input_values, output_values, action,
                                    status, status_reason):
-        update_data = {}
-        if config_id:
-            update_data['config_id'] = config_id
-        if input_values:
-            update_data['input_values'] = input_values
-        if output_values:
-            update_data['output_values'] = output_values
-        if action:
-            update_data['action'] = action
-        if status:
-            update_data['status'] = status
-        if status_reason:
-            update_data['status_reason'] = status_reason
+        update_data = self._software_deployment_update_data({
+            'config_id': config_id,
+            'input_values': input_values,
+            'output_values': output_values,
+            'action': action,
+            'status': status,
+            'status_reason': status_reason})
         sd = db_api.software_deployment_update(cnxt,
                                                deployment_id, update_data)
+        self._notify_deployments_changed(cnxt, [sd])
         return api.format_software_deployment(sd)
 
+    @rpc_common.client_exceptions(exception.NotFound)
+    @request_context
+    def update_software_deployments(self, cnxt, deployments):
+        '''
+        Update a number of software deployments in a single transaction.
+
+        Each deployment is a dict containing its id and any of the values
+        that may be passed to update_software_deployment(). If any of the
+        deployments does not exist, none are updated.
+        '''
+        values_by_id = dict(
+            (d[rpc_api.SOFTWARE_DEPLOYMENT_ID],
+             self._software_deployment_update_data(d))
+            for d in deployments)
+        all_sd = db_api.software_deployment_update_all(cnxt, values_by_id)
+        self._notify_deployments_changed(cnxt, all_sd)
+        return [api.format_software_deployment(sd) for sd in all_sd]
+
     @rpc_common.client_exceptions(exception.NotFound)
     @request_context
     def delete_software_deployment(self, cnxt, deployment_id):
+        sd = db_api.software_deployment_get(cnxt, deployment_id)
         db_api.software_deployment_delete(cnxt, deployment_id)
+        self._notify_deployments_changed(cnxt, [sd])
@@ -154,6 +154,7 @@ class StackResource(resource.Resource):
                              parent_resource=self,
                              owner_id=self.stack.id)
         stack.parameters.set_stack_id(nested_stack.identifier())
+        stack.reuse_validation(nested_stack)
         stack.validate()
 
         if not hasattr(type(self), 'attributes_schema'):
@@ -44,32 +44,57 @@ class Template(collections.Mapping):
 
         return super(Template, cls).__new__(cls)
 
-    def __init__(self, template, template_id=None, files=None):
+    def __init__(self, template, template_id=None, files=None,
+                 dependencies=None):
         '''
         Initialise the template with a JSON object and a set of Parameters
         '''
         self.id = template_id
         self.t = template
         self.files = files or {}
+        self.dependencies = dependencies
+        self._dependencies_stored = True
         self.maps = self[self.MAPPINGS]
 
     @classmethod
     def load(cls, context, template_id):
         '''Retrieve a Template with the given ID from the database.'''
         t = db_api.raw_template_get(context, template_id)
-        return cls(t.template, template_id=template_id, files=t.files)
+        return cls(t.template, template_id=template_id, files=t.files,
+                   dependencies=t.dependencies)
 
     def store(self, context=None):
         '''Store the Template in the database and return its ID.'''
         if self.id is None:
             rt = {
                 'template': self.t,
-                'files': self.files
+                'files': self.files,
+                'dependencies': self.dependencies
             }
             new_rt = db_api.raw_template_create(context, rt)
             self.id = new_rt.id
+            self._dependencies_stored = True
         return self.id
 
+    def set_dependencies(self, dependencies):
+        '''
+        Record the dependency edges calculated for this template. They are
+        written to the database along with the template, or by
+        store_dependencies() if the template is already stored.
+        '''
+        self.dependencies = dependencies
+        self._dependencies_stored = False
+
+    def store_dependencies(self, context):
+        '''
+        Write the dependency edges recorded by set_dependencies() to the
+        stored template, if they have not been written already.
+        '''
+        if self.id is not None and not self._dependencies_stored:
+            db_api.raw_template_update(context, self.id,
+                                       {'dependencies': self.dependencies})
+            self._dependencies_stored = True
+
     def __getitem__(self, section):
         '''Get the relevant section in the template.'''
         if section not in self.SECTIONS:
@@ -13,6 +13,7 @@
 #    under the License.
 
 ENGINE_TOPIC = 'engine'
+CHANGES_TOPIC = 'changes'
 
 PARAM_KEYS = (
     PARAM_TIMEOUT, PARAM_DISABLE_ROLLBACK, PARAM_ADOPT_STACK_DATA
@@ -51,13 +52,13 @@ RES_KEYS = (
     RES_NAME, RES_PHYSICAL_ID, RES_METADATA,
     RES_ACTION, RES_STATUS, RES_STATUS_DATA,
     RES_TYPE, RES_ID, RES_STACK_ID, RES_STACK_NAME,
-    RES_REQUIRED_BY, RES_MEMBERS,
+    RES_REQUIRED_BY, RES_MEMBERS, RES_ETAG,
 ) = (
     'description', 'updated_time',
     'resource_name', 'physical_resource_id', 'metadata',
     'resource_action', 'resource_status', 'resource_status_reason',
     'resource_type', 'resource_identity', STACK_ID, STACK_NAME,
-    'required_by', 'members',
+    'required_by', 'members', 'etag',
 )
 
 RES_SCHEMA_KEYS = (
@@ -0,0 +1,134 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+'''
+Notification of changes to data that is polled by in-instance agents.
+
+The engine announces each change with a fanout cast, which is received by
+every API server process that has something waiting for a change. Waiters
+are woken as soon as the change is received, so nothing need poll the engine
+while waiting.
+'''
+
+import contextlib
+
+import eventlet
+from eventlet import event
+
+from heat.openstack.common import rpc
+from heat.openstack.common.rpc import dispatcher
+from heat.rpc import api
+
+import heat.openstack.common.rpc.proxy
+
+_watchers = {}
+_connection = None
+
+
+def resource_key(stack_id, resource_name):
+    '''Return the key for changes to the metadata of a resource.'''
+    return ('resource', stack_id, resource_name)
+
+
+def deployments_key(server_id):
+    '''Return the key for changes to the software deployments of a server.'''
+    return ('deployments', server_id)
+
+
+class ChangeNotifier(heat.openstack.common.rpc.proxy.RpcProxy):
+    '''Client side of the change notification rpc API.
+
+    API version history::
+
+        1.0 - Initial version.
+    '''
+
+    BASE_RPC_API_VERSION = '1.0'
+
+    def __init__(self):
+        super(ChangeNotifier, self).__init__(
+            topic=api.CHANGES_TOPIC,
+            default_version=self.BASE_RPC_API_VERSION)
+
+    def resource_metadata_changed(self, ctxt, stack_id, resource_name):
+        self.fanout_cast(ctxt, self.make_msg('resource_metadata_changed',
+                                             stack_id=stack_id,
+                                             resource_name=resource_name))
+
+    def software_deployments_changed(self, ctxt, server_id):
+        self.fanout_cast(ctxt, self.make_msg('software_deployments_changed',
+                                             server_id=server_id))
+
+
+class ChangeListener(object):
+    '''Server side of the change notification rpc API.'''
+
+    RPC_API_VERSION = '1.0'
+
+    def resource_metadata_changed(self, ctxt, stack_id, resource_name):
+        notify(resource_key(stack_id, resource_name))
+
+    def software_deployments_changed(self, ctxt, server_id):
+        notify(deployments_key(server_id))
+        notify(deployments_key(None))
+
+
+def _listen():
+    '''Start receiving change notifications in this process, if not already.'''
+    global _connection
+    if _connection is None:
+        connection = rpc.create_connection(new=True)
+        connection.create_consumer(
+            api.CHANGES_TOPIC,
+            dispatcher.RpcDispatcher([ChangeListener()]),
+            fanout=True)
+        connection.consume_in_thread()
+        _connection = connection
+
+
+def notify(key):
+    '''Wake up everything in this process waiting for a change to the key.'''
+    for watcher in _watchers.pop(key, ()):
+        watcher.send()
+
+
+@contextlib.contextmanager
+def watch(key):
+    '''
+    Return a context manager that watches for changes to the given key.
+
+    The context manager returns a function that waits for up to a given
+    number of seconds and returns True if a change was notified at any time
+    since the watch began, or False if it timed out. To avoid missing changes,
+    start watching before checking the current state of the data.
+    '''
+    _listen()
+
+    watcher = event.Event()
+    _watchers.setdefault(key, set()).add(watcher)
+
+    def wait(timeout):
+        with eventlet.Timeout(timeout, False):
+            watcher.wait()
+        return watcher.ready()
+
+    try:
+        yield wait
+    finally:
+        watchers = _watchers.get(key)
+        if watchers is not None:
+            watchers.discard(watcher)
+            if not watchers:
+                del _watchers[key]
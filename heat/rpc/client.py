@@ -30,6 +30,12 @@ class EngineClient(heat.openstack.common.rpc.proxy.RpcProxy):
 
         1.0 - Initial version.
         1.1 - Add support_status argument to list_resource_types()
+        1.2 - Add get_stack_timings()
+        1.3 - Add etag argument to describe_stack_resource() and
+              list_software_deployments()
+        1.4 - Add create_software_deployments() and
+              update_software_deployments()
+        1.5 - Add resource_registry_version()
     '''
 
     BASE_RPC_API_VERSION = '1.0'
@@ -161,6 +167,17 @@ class EngineClient(heat.openstack.common.rpc.proxy.RpcProxy):
         return self.call(ctxt, self.make_msg('get_template',
                                              stack_identity=stack_identity))
 
+    def get_stack_timings(self, ctxt, stack_identity):
+        """
+        Get the timings of recent operations on a stack.
+
+        :param ctxt: RPC context.
+        :param stack_identity: Name of the stack you want to see.
+        """
+        return self.call(ctxt, self.make_msg('get_stack_timings',
+                                             stack_identity=stack_identity),
+                         version='1.2')
+
     def delete_stack(self, ctxt, stack_identity, cast=True):
         """
         The delete_stack method deletes a given stack.
@@ -196,6 +213,15 @@ class EngineClient(heat.openstack.common.rpc.proxy.RpcProxy):
                                              support_status=support_status),
                          version='1.1')
 
+    def resource_registry_version(self, ctxt):
+        """
+        Get a digest of the resource types registered in the engine.
+
+        :param ctxt: RPC context.
+        """
+        return self.call(ctxt, self.make_msg('resource_registry_version'),
+                         version='1.5')
+
     def resource_schema(self, ctxt, type_name):
         """
         Get the schema for a resource type.
@@ -225,16 +251,21 @@ class EngineClient(heat.openstack.common.rpc.proxy.RpcProxy):
         return self.call(ctxt, self.make_msg('list_events',
                                              stack_identity=stack_identity))
 
-    def describe_stack_resource(self, ctxt, stack_identity, resource_name):
+    def describe_stack_resource(self, ctxt, stack_identity, resource_name,
+                                etag=None):
         """
         Get detailed resource information about a particular resource.
         :param ctxt: RPC context.
         :param stack_identity: Name of the stack.
         :param resource_name: the Resource.
+        :param etag: ETag of a previously fetched description; if it is still
+                     current, None is returned instead of the description.
         """
         return self.call(ctxt, self.make_msg('describe_stack_resource',
                                              stack_identity=stack_identity,
-                                             resource_name=resource_name))
+                                             resource_name=resource_name,
+                                             etag=etag),
+                         version='1.3')
 
     def find_physical_resource(self, ctxt, physical_resource_id):
         """
@@ -369,9 +400,11 @@ class EngineClient(heat.openstack.common.rpc.proxy.RpcProxy):
         return self.call(cnxt, self.make_msg('delete_software_config',
                                              config_id=config_id))
 
-    def list_software_deployments(self, cnxt, server_id=None):
+    def list_software_deployments(self, cnxt, server_id=None, etag=None):
         return self.call(cnxt, self.make_msg('list_software_deployments',
-                                             server_id=server_id))
+                                             server_id=server_id,
+                                             etag=etag),
+                         version='1.3')
 
     def show_software_deployment(self, cnxt, deployment_id):
         return self.call(cnxt, self.make_msg('show_software_deployment',
@@ -390,6 +423,11 @@ class EngineClient(heat.openstack.common.rpc.proxy.RpcProxy):
                                              status=status,
                                              status_reason=status_reason))
 
+    def create_software_deployments(self, cnxt, deployments):
+        return self.call(cnxt, self.make_msg('create_software_deployments',
+                                             deployments=deployments),
+                         version='1.4')
+
     def update_software_deployment(self, cnxt, deployment_id,
                                    config_id=None, input_values=None,
                                    output_values=None, action=None,
@@ -403,6 +441,11 @@ class EngineClient(heat.openstack.common.rpc.proxy.RpcProxy):
                                              status=status,
                                              status_reason=status_reason))
 
+    def update_software_deployments(self, cnxt, deployments):
+        return self.call(cnxt, self.make_msg('update_software_deployments',
+                                             deployments=deployments),
+                         version='1.4')
+
     def delete_software_deployment(self, cnxt, deployment_id):
         return self.call(cnxt, self.make_msg('delete_software_deployment',
                                              deployment_id=deployment_id))
@@ -25,6 +25,7 @@ import testtools
 from oslo.config import cfg
 
 from heat.openstack.common.fixture import mockpatch
+from heat.openstack.common.rpc import impl_fake
 
 from heat.engine import environment
 from heat.engine import resources
@@ -44,6 +45,9 @@ class HeatTestCase(testscenarios.WithScenarios, testtools.TestCase):
         self.useFixture(fixtures.MonkeyPatch(
             'heat.common.exception._FATAL_EXCEPTION_FORMAT_ERRORS',
             True))
+        # Casts (e.g. change notifications) must never try to reach a broker
+        self.useFixture(fixtures.MonkeyPatch(
+            'heat.openstack.common.rpc._RPCIMPL', impl_fake))
 
         def enable_sleep():
             scheduler.ENABLE_SLEEP = True
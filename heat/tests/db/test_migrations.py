@@ -234,3 +234,20 @@ class TestHeatMigrations(test_migrations.BaseMigrationTestCase,
 
     def _check_036(self, engine, data):
         self.assertColumnExists(engine, 'stack', 'stack_user_project_id')
+
+    def _check_037(self, engine, data):
+        self.assertColumnExists(engine, 'stack', 'output_values')
+
+    def _check_038(self, engine, data):
+        self.assertColumnExists(engine, 'resource', 'attribute_values')
+
+    def _check_039(self, engine, data):
+        self.assertColumnExists(engine, 'raw_template', 'dependencies')
+
+    def _check_040(self, engine, data):
+        self.assertIndexMembers(engine, 'software_deployment',
+                                'ix_software_deployment_tenant_server_id',
+                                ['tenant', 'server_id', 'created_at'])
+
+    def _check_041(self, engine, data):
+        self.assertColumnExists(engine, 'stack_timing', 'phases')
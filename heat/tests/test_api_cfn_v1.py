@@ -17,6 +17,7 @@ import mock
 import os
 
 from oslo.config import cfg
+import webob.exc
 
 from heat.common import exception as heat_exception
 from heat.common import identifier
@@ -1351,12 +1352,13 @@ class CfnStackControllerTest(HeatTestCase):
         args = {
             'stack_identity': identity,
             'resource_name': dummy_req.params.get('LogicalResourceId'),
+            'etag': None,
         }
         rpc.call(dummy_req.context, self.topic,
                  {'namespace': None,
                   'method': 'describe_stack_resource',
                   'args': args,
-                  'version': self.api_version}, None).AndReturn(engine_resp)
+                  'version': '1.3'}, None).AndReturn(engine_resp)
 
         self.m.ReplayAll()
 
@@ -1379,6 +1381,42 @@ class CfnStackControllerTest(HeatTestCase):
 
         self.assertEqual(expected, response)
 
+    def test_describe_stack_resource_not_modified(self):
+        # Format a dummy request
+        stack_name = "wordpress"
+        identity = dict(identifier.HeatIdentifier('t', stack_name, '6'))
+        params = {'Action': 'DescribeStackResource',
+                  'StackName': stack_name,
+                  'LogicalResourceId': "WikiDatabase"}
+        dummy_req = self._dummy_GET_request(params)
+        dummy_req.headers['If-None-Match'] = '"abc123"'
+        self._stub_enforce(dummy_req, 'DescribeStackResource')
+
+        self.m.StubOutWithMock(rpc, 'call')
+        rpc.call(dummy_req.context, self.topic,
+                 {'namespace': None,
+                  'method': 'identify_stack',
+                  'args': {'stack_name': stack_name},
+                  'version': self.api_version}, None).AndReturn(identity)
+        args = {
+            'stack_identity': identity,
+            'resource_name': dummy_req.params.get('LogicalResourceId'),
+            'etag': 'abc123',
+        }
+        rpc.call(dummy_req.context, self.topic,
+                 {'namespace': None,
+                  'method': 'describe_stack_resource',
+                  'args': args,
+                  'version': '1.3'}, None).AndReturn(None)
+
+        self.m.ReplayAll()
+
+        ex = self.assertRaises(webob.exc.HTTPNotModified,
+                               self.controller.describe_stack_resource,
+                               dummy_req)
+        self.assertEqual('"abc123"', ex.headers['ETag'])
+        self.m.VerifyAll()
+
     def test_describe_stack_resource_nonexistent_stack(self):
         # Format a dummy request
         stack_name = "wibble"
@@ -1422,12 +1460,13 @@ class CfnStackControllerTest(HeatTestCase):
         args = {
             'stack_identity': identity,
             'resource_name': dummy_req.params.get('LogicalResourceId'),
+            'etag': None,
         }
         rpc.call(dummy_req.context, self.topic,
                  {'namespace': None,
                   'method': 'describe_stack_resource',
                   'args': args,
-                  'version': self.api_version},
+                  'version': '1.3'},
                  None).AndRaise(heat_exception.ResourceNotFound(
                                 resource_name='test', stack_name='test'))
 
@@ -24,6 +24,7 @@ from heat.common.wsgi import Request
 from heat.api.aws import ec2token
 
 from heat.openstack.common import importutils
+from heat.openstack.common import timeutils
 
 
 class Ec2TokenTest(HeatTestCase):
@@ -33,7 +34,8 @@ class Ec2TokenTest(HeatTestCase):
 
     def setUp(self):
         super(Ec2TokenTest, self).setUp()
-        self.m.StubOutWithMock(requests, 'post')
+        self.m.StubOutWithMock(requests.Session, 'post',
+                               use_mock_anything=True)
 
     def _dummy_GET_request(self, params={}, environ={}):
         # Mangle the params dict into a query string
@@ -202,8 +204,9 @@ class Ec2TokenTest(HeatTestCase):
                                  "path": "/v1",
                                  "body_hash": body_hash}})
         req_headers = {'Content-Type': 'application/json'}
-        requests.post(req_url, data=req_creds,
-                      headers=req_headers).AndReturn(DummyHTTPResponse())
+        requests.Session.post(
+            req_url, data=req_creds,
+            headers=req_headers).AndReturn(DummyHTTPResponse())
 
     def test_call_ok(self):
         dummy_conf = {'auth_uri': 'http://123:5000/v2.0'}
@@ -380,6 +383,45 @@ class Ec2TokenTest(HeatTestCase):
 
         self.m.VerifyAll()
 
+    def test_call_multicloud_last_auth_uri_first(self):
+        dummy_conf = {
+            'allowed_auth_uris': [
+                'http://123:5000/v2.0', 'http://456:5000/v2.0'],
+            'multi_cloud': True,
+            'cache_ttl': 0,
+            'negative_cache_ttl': 0,
+        }
+        ec2 = ec2token.EC2Token(app='woot', conf=dummy_conf)
+        params = {'AWSAccessKeyId': 'foo', 'Signature': 'xyz'}
+        req_env = {'SERVER_NAME': 'heat',
+                   'SERVER_PORT': '8000',
+                   'PATH_INFO': '/v1'}
+
+        ok_resp = json.dumps({'access': {'metadata': {}, 'token': {
+            'id': 123,
+            'tenant': {'name': 'tenant', 'id': 'abcd1234'}}}})
+        err_resp = json.dumps({'error': {
+            'message': "EC2 access key not found."}})
+
+        self._stub_http_connection(
+            req_url='http://123:5000/v2.0/ec2tokens',
+            response=err_resp,
+            params={'AWSAccessKeyId': 'foo'})
+        for i in range(2):
+            self._stub_http_connection(
+                req_url='http://456:5000/v2.0/ec2tokens',
+                response=ok_resp,
+                params={'AWSAccessKeyId': 'foo'})
+
+        self.m.ReplayAll()
+        for i in range(2):
+            dummy_req = self._dummy_GET_request(params, dict(req_env))
+            self.assertEqual('woot', ec2.__call__(dummy_req))
+            self.assertEqual('http://456:5000/v2.0',
+                             dummy_req.headers['X-Auth-URL'])
+
+        self.m.VerifyAll()
+
     def test_call_err_multicloud(self):
         dummy_conf = {
             'allowed_auth_uris': [
@@ -493,3 +535,86 @@ class Ec2TokenTest(HeatTestCase):
         self.assertEqual('woot', ec2.__call__(dummy_req))
 
         self.m.VerifyAll()
+
+    def _cache_test_request(self):
+        params = {'AWSAccessKeyId': 'foo', 'Signature': 'xyz'}
+        req_env = {'SERVER_NAME': 'heat',
+                   'SERVER_PORT': '8000',
+                   'PATH_INFO': '/v1'}
+        return self._dummy_GET_request(params, req_env)
+
+    def test_call_ok_cached(self):
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        cfg.CONF.set_override('cache_ttl', 30, group='ec2authtoken')
+        dummy_conf = {'auth_uri': 'http://123:5000/v2.0'}
+        ec2 = ec2token.EC2Token(app='woot', conf=dummy_conf)
+
+        ok_resp = json.dumps({'access': {
+            'token': {
+                'id': 123,
+                'tenant': {'name': 'tenant', 'id': 'abcd1234'}
+            },
+            'metadata': {'roles': ['aa', 'bb']}}})
+        for i in range(2):
+            self._stub_http_connection(response=ok_resp,
+                                       params={'AWSAccessKeyId': 'foo'})
+        self.m.ReplayAll()
+
+        for i in range(2):
+            dummy_req = self._cache_test_request()
+            self.assertEqual('woot', ec2.__call__(dummy_req))
+            self.assertEqual(123, dummy_req.headers['X-Auth-Token'])
+            self.assertEqual('tenant', dummy_req.headers['X-Tenant-Name'])
+            self.assertEqual('abcd1234', dummy_req.headers['X-Tenant-Id'])
+            self.assertEqual('aa,bb', dummy_req.headers['X-Roles'])
+            timeutils.advance_time_seconds(29)
+
+        # The cached result has expired, so keystone is asked again
+        timeutils.advance_time_seconds(2)
+        self.assertEqual('woot', ec2.__call__(self._cache_test_request()))
+        self.m.VerifyAll()
+
+    def test_call_ok_not_cached_past_token_expiry(self):
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        dummy_conf = {'auth_uri': 'http://123:5000/v2.0'}
+        ec2 = ec2token.EC2Token(app='woot', conf=dummy_conf)
+
+        expires = timeutils.isotime(timeutils.utcnow())
+        ok_resp = json.dumps({'access': {'metadata': {}, 'token': {
+            'id': 123,
+            'expires': expires,
+            'tenant': {'name': 'tenant', 'id': 'abcd1234'}}}})
+        for i in range(2):
+            self._stub_http_connection(response=ok_resp,
+                                       params={'AWSAccessKeyId': 'foo'})
+        self.m.ReplayAll()
+
+        for i in range(2):
+            self.assertEqual('woot', ec2.__call__(self._cache_test_request()))
+        self.m.VerifyAll()
+
+    def test_call_err_cached(self):
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        dummy_conf = {'auth_uri': 'http://123:5000/v2.0',
+                      'negative_cache_ttl': '5'}
+        ec2 = ec2token.EC2Token(app='woot', conf=dummy_conf)
+
+        err_resp = json.dumps({'error': {
+            'message': "EC2 access key not found."}})
+        for i in range(2):
+            self._stub_http_connection(response=err_resp,
+                                       params={'AWSAccessKeyId': 'foo'})
+        self.m.ReplayAll()
+
+        for i in range(2):
+            self.assertRaises(exception.HeatInvalidClientTokenIdError,
+                              ec2.__call__, self._cache_test_request())
+            timeutils.advance_time_seconds(4)
+
+        timeutils.advance_time_seconds(2)
+        self.assertRaises(exception.HeatInvalidClientTokenIdError,
+                          ec2.__call__, self._cache_test_request())
+        self.m.VerifyAll()
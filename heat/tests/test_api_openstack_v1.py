@@ -27,6 +27,7 @@ from heat.common.wsgi import Request
 from heat.common import urlfetch
 from heat.openstack.common.rpc import common as rpc_common
 from heat.rpc import api as rpc_api
+from heat.rpc import changes
 from heat.rpc import client as rpc_client
 from heat.tests.common import HeatTestCase
 
@@ -43,7 +44,7 @@ import heat.api.middleware.fault as fault
 
 def request_with_middleware(middleware, func, req, *args, **kwargs):
 
-    @webob.dec.wsgify
+    @webob.dec.wsgify(RequestClass=Request)
     def _app(req):
         return func(req, *args, **kwargs)
 
@@ -1157,6 +1158,48 @@ class StackControllerTest(ControllerTest, HeatTestCase):
         self.assertIn('403 Forbidden', str(resp))
         self.m.VerifyAll()
 
+    def test_get_timings(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'timings', True)
+        identity = identifier.HeatIdentifier(self.tenant, 'wordpress', '6')
+        req = self._get('/stacks/%(stack_name)s/%(stack_id)s/timings' %
+                        identity)
+        timings = [{'stack_id': '6', 'action': 'CREATE', 'elapsed': 1.5,
+                    'phases': {'handle_create': {'count': 1, 'total': 1.0,
+                                                 'max': 1.0}}}]
+
+        self.m.StubOutWithMock(rpc, 'call')
+        rpc.call(req.context, self.topic,
+                 {'namespace': None,
+                  'method': 'get_stack_timings',
+                  'args': {'stack_identity': dict(identity)},
+                  'version': '1.2'},
+                 None).AndReturn(timings)
+        self.m.ReplayAll()
+
+        response = self.controller.timings(req, tenant_id=identity.tenant,
+                                           stack_name=identity.stack_name,
+                                           stack_id=identity.stack_id)
+
+        self.assertEqual({'timings': timings}, response)
+        self.m.VerifyAll()
+
+    def test_get_timings_err_denied_policy(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'timings', False)
+        identity = identifier.HeatIdentifier(self.tenant, 'wordpress', '6')
+        req = self._get('/stacks/%(stack_name)s/%(stack_id)s/timings'
+                        % identity)
+
+        self.m.ReplayAll()
+        resp = request_with_middleware(fault.FaultWrapper,
+                                       self.controller.timings,
+                                       req, tenant_id=identity.tenant,
+                                       stack_name=identity.stack_name,
+                                       stack_id=identity.stack_id)
+
+        self.assertEqual(403, resp.status_int)
+        self.assertIn('403 Forbidden', str(resp))
+        self.m.VerifyAll()
+
     def test_get_template_err_notfound(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'template', True)
         identity = identifier.HeatIdentifier(self.tenant, 'wordpress', '6')
@@ -1452,6 +1495,14 @@ class StackControllerTest(ControllerTest, HeatTestCase):
         self.assertEqual(403, resp.status_int)
         self.assertIn('403 Forbidden', str(resp))
 
+    def _stub_registry_version(self, req, version='registry_version'):
+        rpc.call(req.context, self.topic,
+                 {'namespace': None,
+                  'method': 'resource_registry_version',
+                  'args': {},
+                  'version': '1.5'},
+                 None).AndReturn(version)
+
     def test_list_resource_types(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'list_resource_types', True)
         req = self._get('/resource_types')
@@ -1461,6 +1512,7 @@ class StackControllerTest(ControllerTest, HeatTestCase):
                            'AWS::EC2::EIPAssociation']
 
         self.m.StubOutWithMock(rpc, 'call')
+        self._stub_registry_version(req)
         rpc.call(req.context, self.topic,
                  {'namespace': None,
                   'method': 'list_resource_types',
@@ -1479,6 +1531,7 @@ class StackControllerTest(ControllerTest, HeatTestCase):
 
         error = heat_exc.ResourceTypeNotFound(type_name='')
         self.m.StubOutWithMock(rpc, 'call')
+        self._stub_registry_version(req)
         rpc.call(req.context, self.topic,
                  {'namespace': None,
                   'method': 'list_resource_types',
@@ -1520,6 +1573,7 @@ class StackControllerTest(ControllerTest, HeatTestCase):
             },
         }
         self.m.StubOutWithMock(rpc, 'call')
+        self._stub_registry_version(req)
         rpc.call(req.context, self.topic,
                  {'namespace': None,
                   'method': 'resource_schema',
@@ -1540,6 +1594,7 @@ class StackControllerTest(ControllerTest, HeatTestCase):
 
         error = heat_exc.ResourceTypeNotFound(type_name='BogusResourceType')
         self.m.StubOutWithMock(rpc, 'call')
+        self._stub_registry_version(req)
         rpc.call(req.context, self.topic,
                  {'namespace': None,
                   'method': 'resource_schema',
@@ -1575,6 +1630,7 @@ class StackControllerTest(ControllerTest, HeatTestCase):
         engine_response = {'Type': 'TEST_TYPE'}
 
         self.m.StubOutWithMock(rpc, 'call')
+        self._stub_registry_version(req)
         rpc.call(req.context, self.topic,
                  {'namespace': None,
                   'method': 'generate_template',
@@ -1592,6 +1648,7 @@ class StackControllerTest(ControllerTest, HeatTestCase):
 
         error = heat_exc.ResourceTypeNotFound(type_name='a')
         self.m.StubOutWithMock(rpc, 'call')
+        self._stub_registry_version(req)
         rpc.call(req.context, self.topic,
                  {'namespace': None,
                   'method': 'generate_template',
@@ -1607,6 +1664,79 @@ class StackControllerTest(ControllerTest, HeatTestCase):
         self.assertEqual('ResourceTypeNotFound', resp.json['error']['type'])
         self.m.VerifyAll()
 
+    def test_resource_schema_cached(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'resource_schema', True,
+                                 expected_request_count=3)
+        type_name = 'ResourceWithProps'
+        engine_response = {'resource_type': type_name,
+                           'properties': {},
+                           'attributes': {}}
+        req = self._get('/resource_types/ResourceWithProps')
+
+        self.m.StubOutWithMock(rpc, 'call')
+        self._stub_registry_version(req)
+        rpc.call(req.context, self.topic,
+                 {'namespace': None,
+                  'method': 'resource_schema',
+                  'args': {'type_name': type_name},
+                  'version': self.api_version},
+                 None).AndReturn(engine_response)
+        self.m.ReplayAll()
+
+        response = self.controller.resource_schema(req,
+                                                   tenant_id=self.tenant,
+                                                   type_name=type_name)
+        self.assertEqual(engine_response, response)
+        (header, etag), = req.environ['heat.response_headers']
+        self.assertEqual('ETag', header)
+
+        req = self._get('/resource_types/ResourceWithProps')
+        response = self.controller.resource_schema(req,
+                                                   tenant_id=self.tenant,
+                                                   type_name=type_name)
+        self.assertEqual(engine_response, response)
+        self.assertEqual([('ETag', etag)],
+                         req.environ['heat.response_headers'])
+
+        req = self._get('/resource_types/ResourceWithProps')
+        req.headers['If-None-Match'] = etag
+        ex = self.assertRaises(webob.exc.HTTPNotModified,
+                               self.controller.resource_schema,
+                               req, tenant_id=self.tenant,
+                               type_name=type_name)
+        self.assertEqual(etag, ex.headers['ETag'])
+        self.m.VerifyAll()
+
+    def test_list_resource_types_registry_changed(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'list_resource_types', True,
+                                 expected_request_count=3)
+        cfg.CONF.set_override('resource_type_cache_ttl', 0, group='heat_api')
+        req = self._get('/resource_types')
+
+        def list_types(engine_response):
+            rpc.call(req.context, self.topic,
+                     {'namespace': None,
+                      'method': 'list_resource_types',
+                      'args': {'support_status': None},
+                      'version': '1.1'},
+                     None).AndReturn(engine_response)
+
+        self.m.StubOutWithMock(rpc, 'call')
+        self._stub_registry_version(req, 'v1')
+        list_types(['AWS::EC2::Instance'])
+        self._stub_registry_version(req, 'v1')
+        self._stub_registry_version(req, 'v2')
+        list_types(['AWS::EC2::Instance', 'AWS::EC2::EIP'])
+        self.m.ReplayAll()
+
+        for expected in (['AWS::EC2::Instance'],
+                         ['AWS::EC2::Instance'],
+                         ['AWS::EC2::Instance', 'AWS::EC2::EIP']):
+            response = self.controller.list_resource_types(
+                req, tenant_id=self.tenant)
+            self.assertEqual({'resource_types': expected}, response)
+        self.m.VerifyAll()
+
     def test_generate_template_err_denied_policy(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'generate_template', False)
         req = self._get('/resource_types/NOT_FOUND/template')
@@ -1653,6 +1783,12 @@ class ResourceControllerTest(ControllerTest, HeatTestCase):
         cfgopts = DummyConfig()
         self.controller = resources.ResourceController(options=cfgopts)
 
+    def _stub_watch(self, changed):
+        wait_for_change = mock.Mock(return_value=changed)
+        watch = self.patchobject(changes, 'watch')
+        watch.return_value.__enter__.return_value = wait_for_change
+        return wait_for_change
+
     def test_index(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'index', True)
         res_name = 'WikiDatabase'
@@ -1783,8 +1919,9 @@ class ResourceControllerTest(ControllerTest, HeatTestCase):
                  {'namespace': None,
                   'method': 'describe_stack_resource',
                   'args': {'stack_identity': stack_identity,
-                           'resource_name': res_name},
-                  'version': self.api_version},
+                           'resource_name': res_name,
+                           'etag': None},
+                  'version': '1.3'},
                  None).AndReturn(engine_resp)
         self.m.ReplayAll()
 
@@ -1830,8 +1967,9 @@ class ResourceControllerTest(ControllerTest, HeatTestCase):
                  {'namespace': None,
                   'method': 'describe_stack_resource',
                   'args': {'stack_identity': stack_identity,
-                           'resource_name': res_name},
-                  'version': self.api_version},
+                           'resource_name': res_name,
+                           'etag': None},
+                  'version': '1.3'},
                  None).AndRaise(to_remote_error(error))
         self.m.ReplayAll()
 
@@ -1862,8 +2000,9 @@ class ResourceControllerTest(ControllerTest, HeatTestCase):
                  {'namespace': None,
                   'method': 'describe_stack_resource',
                   'args': {'stack_identity': stack_identity,
-                           'resource_name': res_name},
-                  'version': self.api_version},
+                           'resource_name': res_name,
+                           'etag': None},
+                  'version': '1.3'},
                  None).AndRaise(to_remote_error(error))
         self.m.ReplayAll()
 
@@ -1894,8 +2033,9 @@ class ResourceControllerTest(ControllerTest, HeatTestCase):
                  {'namespace': None,
                   'method': 'describe_stack_resource',
                   'args': {'stack_identity': stack_identity,
-                           'resource_name': res_name},
-                  'version': self.api_version},
+                           'resource_name': res_name,
+                           'etag': None},
+                  'version': '1.3'},
                  None).AndRaise(to_remote_error(error))
         self.m.ReplayAll()
 
@@ -1961,8 +2101,9 @@ class ResourceControllerTest(ControllerTest, HeatTestCase):
                  {'namespace': None,
                   'method': 'describe_stack_resource',
                   'args': {'stack_identity': stack_identity,
-                           'resource_name': res_name},
-                  'version': self.api_version},
+                           'resource_name': res_name,
+                           'etag': None},
+                  'version': '1.3'},
                  None).AndReturn(engine_resp)
         self.m.ReplayAll()
 
@@ -2024,8 +2165,9 @@ class ResourceControllerTest(ControllerTest, HeatTestCase):
                  {'namespace': None,
                   'method': 'describe_stack_resource',
                   'args': {'stack_identity': stack_identity,
-                           'resource_name': res_name},
-                  'version': self.api_version},
+                           'resource_name': res_name,
+                           'etag': None},
+                  'version': '1.3'},
                  None).AndReturn(engine_resp)
         self.m.ReplayAll()
 
@@ -2039,6 +2181,200 @@ class ResourceControllerTest(ControllerTest, HeatTestCase):
         self.assertEqual(expected, result)
         self.m.VerifyAll()
 
+    def test_metadata_show_etag(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'metadata', True)
+        res_name = 'WikiDatabase'
+        stack_identity = identifier.HeatIdentifier(self.tenant,
+                                                   'wordpress', '6')
+        res_identity = identifier.ResourceIdentifier(resource_name=res_name,
+                                                     **stack_identity)
+
+        req = self._get(res_identity._tenant_path() + '/metadata')
+
+        engine_resp = {
+            u'resource_name': res_name,
+            u'metadata': {u'ensureRunning': u'true'},
+            u'etag': u'abc123',
+        }
+        self.m.StubOutWithMock(rpc, 'call')
+        rpc.call(req.context, self.topic,
+                 {'namespace': None,
+                  'method': 'describe_stack_resource',
+                  'args': {'stack_identity': stack_identity,
+                           'resource_name': res_name,
+                           'etag': None},
+                  'version': '1.3'},
+                 None).AndReturn(engine_resp)
+        self.m.ReplayAll()
+
+        result = self.controller.metadata(req, tenant_id=self.tenant,
+                                          stack_name=stack_identity.stack_name,
+                                          stack_id=stack_identity.stack_id,
+                                          resource_name=res_name)
+
+        self.assertEqual({'metadata': {u'ensureRunning': u'true'}}, result)
+        self.assertEqual([('ETag', '"abc123"')],
+                         req.environ['heat.response_headers'])
+        self.m.VerifyAll()
+
+    def test_metadata_show_not_modified(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'metadata', True)
+        res_name = 'WikiDatabase'
+        stack_identity = identifier.HeatIdentifier(self.tenant,
+                                                   'wordpress', '6')
+        res_identity = identifier.ResourceIdentifier(resource_name=res_name,
+                                                     **stack_identity)
+
+        req = self._get(res_identity._tenant_path() + '/metadata')
+        req.headers['If-None-Match'] = '"abc123"'
+
+        self.m.StubOutWithMock(rpc, 'call')
+        rpc.call(req.context, self.topic,
+                 {'namespace': None,
+                  'method': 'describe_stack_resource',
+                  'args': {'stack_identity': stack_identity,
+                           'resource_name': res_name,
+                           'etag': 'abc123'},
+                  'version': '1.3'},
+                 None).AndReturn(None)
+        self.m.ReplayAll()
+
+        ex = self.assertRaises(webob.exc.HTTPNotModified,
+                               self.controller.metadata,
+                               req, tenant_id=self.tenant,
+                               stack_name=stack_identity.stack_name,
+                               stack_id=stack_identity.stack_id,
+                               resource_name=res_name)
+        self.assertEqual('"abc123"', ex.headers['ETag'])
+        self.m.VerifyAll()
+
+    def test_metadata_show_wait(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'metadata', True)
+        res_name = 'WikiDatabase'
+        stack_identity = identifier.HeatIdentifier(self.tenant,
+                                                   'wordpress', '6')
+        res_identity = identifier.ResourceIdentifier(resource_name=res_name,
+                                                     **stack_identity)
+
+        req = self._get(res_identity._tenant_path() + '/metadata',
+                        params={'wait': '20'})
+        req.headers['If-None-Match'] = '"abc123"'
+
+        engine_resp = {
+            u'resource_name': res_name,
+            u'metadata': {u'ensureRunning': u'true'},
+            u'etag': u'def456',
+        }
+        wait_for_change = self._stub_watch(True)
+        self.m.StubOutWithMock(rpc, 'call')
+        msg = {'namespace': None,
+               'method': 'describe_stack_resource',
+               'args': {'stack_identity': stack_identity,
+                        'resource_name': res_name,
+                        'etag': 'abc123'},
+               'version': '1.3'}
+        rpc.call(req.context, self.topic, msg, None).AndReturn(None)
+        rpc.call(req.context, self.topic, msg, None).AndReturn(engine_resp)
+        self.m.ReplayAll()
+
+        result = self.controller.metadata(req, tenant_id=self.tenant,
+                                          stack_name=stack_identity.stack_name,
+                                          stack_id=stack_identity.stack_id,
+                                          resource_name=res_name)
+
+        self.assertEqual({'metadata': {u'ensureRunning': u'true'}}, result)
+        changes.watch.assert_called_with(
+            changes.resource_key(stack_identity.stack_id, res_name))
+        self.assertEqual(1, wait_for_change.call_count)
+        self.m.VerifyAll()
+
+    def test_metadata_show_wait_no_change(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'metadata', True)
+        res_name = 'WikiDatabase'
+        stack_identity = identifier.HeatIdentifier(self.tenant,
+                                                   'wordpress', '6')
+        res_identity = identifier.ResourceIdentifier(resource_name=res_name,
+                                                     **stack_identity)
+
+        req = self._get(res_identity._tenant_path() + '/metadata',
+                        params={'wait': '20'})
+        req.headers['If-None-Match'] = '"abc123"'
+
+        wait_for_change = self._stub_watch(False)
+        self.m.StubOutWithMock(rpc, 'call')
+        rpc.call(req.context, self.topic,
+                 {'namespace': None,
+                  'method': 'describe_stack_resource',
+                  'args': {'stack_identity': stack_identity,
+                           'resource_name': res_name,
+                           'etag': 'abc123'},
+                  'version': '1.3'},
+                 None).AndReturn(None)
+        self.m.ReplayAll()
+
+        ex = self.assertRaises(webob.exc.HTTPNotModified,
+                               self.controller.metadata,
+                               req, tenant_id=self.tenant,
+                               stack_name=stack_identity.stack_name,
+                               stack_id=stack_identity.stack_id,
+                               resource_name=res_name)
+        self.assertEqual('"abc123"', ex.headers['ETag'])
+        self.assertEqual(1, wait_for_change.call_count)
+        self.m.VerifyAll()
+
+    def test_metadata_show_wait_timeout(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'metadata', True)
+        res_name = 'WikiDatabase'
+        stack_identity = identifier.HeatIdentifier(self.tenant,
+                                                   'wordpress', '6')
+        res_identity = identifier.ResourceIdentifier(resource_name=res_name,
+                                                     **stack_identity)
+
+        req = self._get(res_identity._tenant_path() + '/metadata',
+                        params={'wait': '20'})
+        req.headers['If-None-Match'] = '"abc123"'
+
+        cfg.CONF.set_override('max_long_poll_wait', 0, group='heat_api')
+        self._stub_watch(True)
+        self.m.StubOutWithMock(rpc, 'call')
+        rpc.call(req.context, self.topic,
+                 {'namespace': None,
+                  'method': 'describe_stack_resource',
+                  'args': {'stack_identity': stack_identity,
+                           'resource_name': res_name,
+                           'etag': 'abc123'},
+                  'version': '1.3'},
+                 None).AndReturn(None)
+        self.m.ReplayAll()
+
+        ex = self.assertRaises(webob.exc.HTTPNotModified,
+                               self.controller.metadata,
+                               req, tenant_id=self.tenant,
+                               stack_name=stack_identity.stack_name,
+                               stack_id=stack_identity.stack_id,
+                               resource_name=res_name)
+        self.assertEqual('"abc123"', ex.headers['ETag'])
+        self.assertFalse(changes.watch.called)
+        self.m.VerifyAll()
+
+    def test_metadata_show_bad_wait(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'metadata', True)
+        res_name = 'WikiDatabase'
+        stack_identity = identifier.HeatIdentifier(self.tenant,
+                                                   'wordpress', '6')
+        res_identity = identifier.ResourceIdentifier(resource_name=res_name,
+                                                     **stack_identity)
+
+        req = self._get(res_identity._tenant_path() + '/metadata',
+                        params={'wait': 'forever'})
+
+        self.assertRaises(webob.exc.HTTPBadRequest,
+                          self.controller.metadata,
+                          req, tenant_id=self.tenant,
+                          stack_name=stack_identity.stack_name,
+                          stack_id=stack_identity.stack_id,
+                          resource_name=res_name)
+
     def test_metadata_show_nonexist(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'metadata', True)
         res_name = 'WikiDatabase'
@@ -2055,8 +2391,9 @@ class ResourceControllerTest(ControllerTest, HeatTestCase):
                  {'namespace': None,
                   'method': 'describe_stack_resource',
                   'args': {'stack_identity': stack_identity,
-                           'resource_name': res_name},
-                  'version': self.api_version},
+                           'resource_name': res_name,
+                           'etag': None},
+                  'version': '1.3'},
                  None).AndRaise(to_remote_error(error))
         self.m.ReplayAll()
 
@@ -2087,8 +2424,9 @@ class ResourceControllerTest(ControllerTest, HeatTestCase):
                  {'namespace': None,
                   'method': 'describe_stack_resource',
                   'args': {'stack_identity': stack_identity,
-                           'resource_name': res_name},
-                  'version': self.api_version},
+                           'resource_name': res_name,
+                           'etag': None},
+                  'version': '1.3'},
                  None).AndRaise(to_remote_error(error))
         self.m.ReplayAll()
 
@@ -2809,6 +3147,17 @@ class RoutesTest(HeatTestCase):
                 'stack_name': 'teststack',
                 'stack_id': 'bbbb',
             })
+        self.assertRoute(
+            self.m,
+            '/aaaa/stacks/teststack/bbbb/timings',
+            'GET',
+            'timings',
+            'StackController',
+            {
+                'tenant_id': 'aaaa',
+                'stack_name': 'teststack',
+                'stack_id': 'bbbb',
+            })
         self.assertRoute(
             self.m,
             '/aaaa/stacks/teststack/template',
@@ -15,6 +15,7 @@
 import datetime
 import copy
 
+import mock
 import mox
 
 from testtools import skipIf
@@ -1166,6 +1167,237 @@ class AutoScalingTest(HeatTestCase):
         rsrc.delete()
         self.m.VerifyAll()
 
+    def test_scaling_policy_up_deferred(self):
+        t = template_format.parse(as_template)
+        stack = utils.parse_stack(t, params=self.params)
+
+        # Create initial group
+        self._stub_lb_reload(1)
+        now = timeutils.utcnow()
+        self._stub_meta_expected(now, 'ExactCapacity : 1')
+        self._stub_create(1)
+
+        self.m.ReplayAll()
+        rsrc = self.create_scaling_group(t, stack, 'WebServerGroup')
+        stack['WebServerGroup'] = rsrc
+        self.assertEqual(1, len(rsrc.get_instance_names()))
+
+        # Scale up one, in a deferred task
+        self._stub_lb_reload(2)
+        self._stub_meta_expected(now, 'ChangeInCapacity : 1', 2)
+        self._stub_create(1)
+
+        self.m.StubOutWithMock(asc.ScalingPolicy, 'keystone')
+        asc.ScalingPolicy.keystone().MultipleTimes().AndReturn(
+            self.fc)
+
+        self.m.ReplayAll()
+        up_policy = self.create_scaling_policy(t, stack,
+                                               'WebServerScaleUpPolicy')
+
+        deferred = []
+        stack.deferred_task_runner = (
+            lambda task, cleanup: deferred.append(task))
+        up_policy.signal()
+        self.assertEqual(1, len(rsrc.get_instance_names()))
+        self.assertEqual(1, len(deferred))
+
+        deferred[0](stack)
+        self.assertEqual(2, len(rsrc.get_instance_names()))
+        self.assertEqual({}, asc._pending_adjustments)
+
+        rsrc.delete()
+        self.m.VerifyAll()
+
+    def test_queue_adjustment_coalesced(self):
+        t = template_format.parse(as_template)
+        stack = utils.parse_stack(t, params=self.params)
+        rsrc = asc.AutoScalingGroup('WebServerGroup',
+                                    t['Resources']['WebServerGroup'],
+                                    stack)
+        stack['WebServerGroup'] = rsrc
+        adjust = self.patchobject(asc.AutoScalingGroup, 'adjust')
+
+        deferred = []
+        stack.deferred_task_runner = (
+            lambda task, cleanup: deferred.append(task))
+        rsrc.queue_adjustment(1)
+        rsrc.queue_adjustment(1)
+        rsrc.queue_adjustment(2, 'ChangeInCapacity')
+        rsrc.queue_adjustment(50, 'PercentChangeInCapacity')
+        rsrc.queue_adjustment(-1)
+        self.assertEqual(1, len(deferred))
+        self.assertFalse(adjust.called)
+
+        deferred[0](stack)
+        self.assertEqual([mock.call(4, 'ChangeInCapacity'),
+                          mock.call(50, 'PercentChangeInCapacity'),
+                          mock.call(-1, 'ChangeInCapacity')],
+                         adjust.call_args_list)
+        self.assertEqual({}, asc._pending_adjustments)
+
+    def test_queue_adjustment_exact_capacity(self):
+        t = template_format.parse(as_template)
+        stack = utils.parse_stack(t, params=self.params)
+        rsrc = asc.AutoScalingGroup('WebServerGroup',
+                                    t['Resources']['WebServerGroup'],
+                                    stack)
+        stack['WebServerGroup'] = rsrc
+        adjust = self.patchobject(asc.AutoScalingGroup, 'adjust')
+
+        deferred = []
+        stack.deferred_task_runner = (
+            lambda task, cleanup: deferred.append(task))
+        rsrc.queue_adjustment(1)
+        rsrc.queue_adjustment(20, 'PercentChangeInCapacity')
+        rsrc.queue_adjustment(3, 'ExactCapacity')
+        rsrc.queue_adjustment(1)
+        self.assertEqual(1, len(deferred))
+
+        deferred[0](stack)
+        self.assertEqual([mock.call(3, 'ExactCapacity'),
+                          mock.call(1, 'ChangeInCapacity')],
+                         adjust.call_args_list)
+
+        # Once the queue is drained, a new adjustment needs a new task
+        rsrc.queue_adjustment(1)
+        self.assertEqual(2, len(deferred))
+        deferred[1](stack)
+        self.assertEqual(3, adjust.call_count)
+
+    def test_queue_adjustment_cleanup(self):
+        t = template_format.parse(as_template)
+        stack = utils.parse_stack(t, params=self.params)
+        rsrc = asc.AutoScalingGroup('WebServerGroup',
+                                    t['Resources']['WebServerGroup'],
+                                    stack)
+        stack['WebServerGroup'] = rsrc
+        adjust = self.patchobject(asc.AutoScalingGroup, 'adjust')
+
+        deferred = []
+        stack.deferred_task_runner = (
+            lambda task, cleanup: deferred.append((task, cleanup)))
+        rsrc.queue_adjustment(1)
+        rsrc.queue_adjustment(1)
+        self.assertEqual(1, len(deferred))
+
+        # The task is never run (e.g. the stack lock was not acquired)
+        deferred[0][1]()
+        self.assertEqual({}, asc._pending_adjustments)
+
+        rsrc.queue_adjustment(3)
+        self.assertEqual(2, len(deferred))
+        task, cleanup = deferred[1]
+        task(stack)
+        adjust.assert_called_once_with(3, 'ChangeInCapacity')
+
+        # A stale cleanup does not discard adjustments queued since
+        rsrc.queue_adjustment(1)
+        deferred[0][1]()
+        cleanup()
+        self.assertEqual([(1, 'ChangeInCapacity', (), True)],
+                         asc._pending_adjustments.values()[0])
+        deferred[2][0](stack)
+        self.assertEqual({}, asc._pending_adjustments)
+
+    def test_queue_adjustment_group_cooldown(self):
+        t = template_format.parse(as_template)
+        properties = t['Resources']['WebServerGroup']['Properties']
+        properties['Cooldown'] = '60'
+        stack = utils.parse_stack(t, params=self.params)
+        rsrc = asc.AutoScalingGroup('WebServerGroup',
+                                    t['Resources']['WebServerGroup'],
+                                    stack)
+        stack['WebServerGroup'] = rsrc
+        adjust = self.patchobject(asc.AutoScalingGroup, 'adjust')
+
+        deferred = []
+        stack.deferred_task_runner = (
+            lambda task, cleanup: deferred.append(task))
+        rsrc.queue_adjustment(1)
+        rsrc.queue_adjustment(1)
+        rsrc.queue_adjustment(3, 'ExactCapacity')
+
+        # Each adjustment is checked against the group's cooldown in turn
+        deferred[0](stack)
+        self.assertEqual([mock.call(1, 'ChangeInCapacity'),
+                          mock.call(1, 'ChangeInCapacity'),
+                          mock.call(3, 'ExactCapacity')],
+                         adjust.call_args_list)
+
+    def test_queue_adjustment_policy_cooldown(self):
+        t = template_format.parse(as_template)
+        stack = utils.parse_stack(t, params=self.params)
+        rsrc = asc.AutoScalingGroup('WebServerGroup',
+                                    t['Resources']['WebServerGroup'],
+                                    stack)
+        stack['WebServerGroup'] = rsrc
+        policy = stack['WebServerScaleUpPolicy']
+        adjust = self.patchobject(asc.AutoScalingGroup, 'adjust')
+        inprogress = self.patchobject(asc.ScalingPolicy,
+                                      '_cooldown_inprogress')
+        timestamp = self.patchobject(asc.ScalingPolicy, '_cooldown_timestamp')
+
+        deferred = []
+        stack.deferred_task_runner = (
+            lambda task, cleanup: deferred.append(task))
+        rsrc.queue_adjustment(1, policy=policy)
+        rsrc.queue_adjustment(1, policy=policy)
+        self.assertFalse(timestamp.called)
+
+        # The first adjustment starts the policy's cooldown, which is in
+        # progress by the time the second is to be made
+        def cooldown_started(reason):
+            inprogress.return_value = True
+        timestamp.side_effect = cooldown_started
+        inprogress.return_value = False
+
+        deferred[0](stack)
+        adjust.assert_called_once_with(1, 'ChangeInCapacity')
+        timestamp.assert_called_once_with('ChangeInCapacity : 1')
+
+    def test_queue_adjustment_failed_no_cooldown(self):
+        t = template_format.parse(as_template)
+        stack = utils.parse_stack(t, params=self.params)
+        rsrc = asc.AutoScalingGroup('WebServerGroup',
+                                    t['Resources']['WebServerGroup'],
+                                    stack)
+        stack['WebServerGroup'] = rsrc
+        policy = stack['WebServerScaleUpPolicy']
+        adjust = self.patchobject(asc.AutoScalingGroup, 'adjust')
+        adjust.side_effect = exception.Error('resize failed')
+        timestamp = self.patchobject(asc.ScalingPolicy, '_cooldown_timestamp')
+
+        self.assertRaises(exception.Error, rsrc.queue_adjustment, 1,
+                          policy=policy)
+        self.assertFalse(timestamp.called)
+        self.assertEqual({}, asc._pending_adjustments)
+
+    def test_queue_adjustment_while_adjusting(self):
+        t = template_format.parse(as_template)
+        stack = utils.parse_stack(t, params=self.params)
+        rsrc = asc.AutoScalingGroup('WebServerGroup',
+                                    t['Resources']['WebServerGroup'],
+                                    stack)
+        stack['WebServerGroup'] = rsrc
+        adjust = self.patchobject(asc.AutoScalingGroup, 'adjust')
+
+        def queue_more(adjustment, adjustment_type):
+            if adjust.call_count == 1:
+                rsrc.queue_adjustment(1)
+                rsrc.queue_adjustment(1)
+        adjust.side_effect = queue_more
+
+        deferred = []
+        stack.deferred_task_runner = (
+            lambda task, cleanup: deferred.append(task))
+        rsrc.queue_adjustment(1)
+        deferred[0](stack)
+        self.assertEqual(1, len(deferred))
+        self.assertEqual([mock.call(1, 'ChangeInCapacity'),
+                          mock.call(2, 'ChangeInCapacity')],
+                         adjust.call_args_list)
+
     def test_scaling_up_meta_update(self):
         t = template_format.parse(as_template)
 
@@ -0,0 +1,110 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+
+from heat.openstack.common import rpc
+from heat.rpc import api as rpc_api
+from heat.rpc import changes
+from heat.tests.common import HeatTestCase
+from heat.tests import utils
+
+
+class ChangesTest(HeatTestCase):
+
+    def setUp(self):
+        super(ChangesTest, self).setUp()
+        self.addCleanup(self._stop_listening)
+
+    def _stop_listening(self):
+        if changes._connection is not None:
+            changes._connection.close()
+            changes._connection = None
+
+    def test_notify(self):
+        key = changes.resource_key('stack', 'WebServer')
+
+        def notify():
+            eventlet.sleep(0.01)
+            changes.notify(changes.resource_key('stack', 'other'))
+            changes.notify(key)
+
+        with changes.watch(key) as wait:
+            eventlet.spawn(notify)
+            self.assertTrue(wait(10))
+
+        self.assertEqual({}, changes._watchers)
+
+    def test_notify_before_wait(self):
+        key = changes.deployments_key('server')
+        with changes.watch(key) as wait:
+            changes.notify(key)
+            self.assertTrue(wait(0))
+
+    def test_timeout(self):
+        key = changes.deployments_key('server')
+        with changes.watch(key) as wait:
+            with changes.watch(key) as other_wait:
+                self.assertFalse(wait(0.01))
+            changes.notify(changes.deployments_key('other'))
+            self.assertFalse(wait(0.01))
+
+        self.assertFalse(other_wait(0))
+        self.assertEqual({}, changes._watchers)
+
+    def test_notifier_resource_metadata_changed(self):
+        ctx = utils.dummy_context()
+        fanout_cast = self.patchobject(rpc, 'fanout_cast')
+        changes.ChangeNotifier().resource_metadata_changed(ctx, 'stack',
+                                                           'WebServer')
+        fanout_cast.assert_called_once_with(
+            ctx, rpc_api.CHANGES_TOPIC,
+            {'method': 'resource_metadata_changed',
+             'namespace': None,
+             'args': {'stack_id': 'stack', 'resource_name': 'WebServer'},
+             'version': '1.0'})
+
+    def test_notifier_software_deployments_changed(self):
+        ctx = utils.dummy_context()
+        fanout_cast = self.patchobject(rpc, 'fanout_cast')
+        changes.ChangeNotifier().software_deployments_changed(ctx, 'server')
+        fanout_cast.assert_called_once_with(
+            ctx, rpc_api.CHANGES_TOPIC,
+            {'method': 'software_deployments_changed',
+             'namespace': None,
+             'args': {'server_id': 'server'},
+             'version': '1.0'})
+
+    def test_listener_resource_metadata_changed(self):
+        key = changes.resource_key('stack', 'WebServer')
+        with changes.watch(key) as wait:
+            changes.ChangeListener().resource_metadata_changed(
+                utils.dummy_context(), 'stack', 'WebServer')
+            self.assertTrue(wait(0))
+
+    def test_listener_software_deployments_changed(self):
+        key = changes.deployments_key('server')
+        with changes.watch(changes.deployments_key(None)) as wait_all:
+            with changes.watch(key) as wait:
+                changes.ChangeListener().software_deployments_changed(
+                    utils.dummy_context(), 'server')
+                self.assertTrue(wait(0))
+            self.assertTrue(wait_all(0))
+
+    def test_listen_once(self):
+        with changes.watch(changes.deployments_key('server')):
+            connection = changes._connection
+        with changes.watch(changes.deployments_key('server')):
+            self.assertIs(connection, changes._connection)
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
 import os.path
 
 from oslo.config import cfg
@@ -47,6 +48,8 @@ class TestPolicyEnforcer(HeatTestCase):
         ]
         cfg.CONF.register_opts(opts)
         self.addCleanup(self.m.VerifyAll)
+        policy._parsed_policies.clear()
+        self.addCleanup(policy._parsed_policies.clear)
 
     def stub_policyfile(self, filename):
         pf = policy_path + filename
@@ -187,3 +190,78 @@ class TestPolicyEnforcer(HeatTestCase):
 
         ctx = utils.dummy_context(roles=['admin'])
         self.assertTrue(enforcer.check_is_admin(ctx))
+
+    def test_policy_file_parsed_once(self):
+        self.stub_policyfile('deny_stack_user.json')
+
+        with mock.patch.object(base_policy, 'parse_rule',
+                               wraps=base_policy.parse_rule) as parse:
+            first = policy.Enforcer(scope='cloudformation')
+            first.load_rules()
+            parse_count = parse.call_count
+            self.assertTrue(parse_count > 0)
+
+            second = policy.Enforcer(scope='cloudformation')
+            second.load_rules()
+            self.assertEqual(parse_count, parse.call_count)
+
+        rule = 'cloudformation:ListStacks'
+        self.assertIs(first.enforcer.rules[rule], second.enforcer.rules[rule])
+        self.assertIsNot(first.enforcer.rules, second.enforcer.rules)
+
+    def test_policy_file_check_interval(self):
+        self.stub_policyfile('deny_stack_user.json')
+        cfg.CONF.set_override('policy_check_interval', 10)
+        enforcer = policy.Enforcer(scope='cloudformation')
+
+        with mock.patch('time.time') as mock_time:
+            mock_time.return_value = 1000
+            enforcer.load_rules()
+            rules = enforcer.enforcer.rules
+            with mock.patch('os.path.getmtime') as getmtime:
+                mock_time.return_value = 1009
+                enforcer.load_rules()
+                self.assertFalse(getmtime.called)
+                self.assertIs(rules, enforcer.enforcer.rules)
+
+                getmtime.return_value = 0
+                mock_time.return_value = 1010
+                enforcer.load_rules()
+                self.assertTrue(getmtime.called)
+            self.assertIsNot(rules, enforcer.enforcer.rules)
+
+    def test_enforce_memoized_per_request(self):
+        self.stub_policyfile('deny_stack_user.json')
+        enforcer = policy.Enforcer(scope='cloudformation')
+
+        with mock.patch.object(base_policy.Enforcer, 'enforce',
+                               autospec=True,
+                               side_effect=base_policy.Enforcer.enforce
+                               ) as enforce:
+            ctx = utils.dummy_context(roles=['not_a_stack_user'])
+            self.assertTrue(enforcer.enforce(ctx, 'ListStacks'))
+            self.assertTrue(enforcer.enforce(ctx, 'ListStacks'))
+            self.assertEqual(1, enforce.call_count)
+
+            stack_user_ctx = utils.dummy_context(roles=['heat_stack_user'])
+            for i in range(2):
+                self.assertRaises(exception.Forbidden, enforcer.enforce,
+                                  stack_user_ctx, 'ListStacks')
+            self.assertEqual(2, enforce.call_count)
+
+            # Each request makes its own decisions
+            ctx = utils.dummy_context(roles=['not_a_stack_user'])
+            self.assertTrue(enforcer.enforce(ctx, 'ListStacks'))
+            self.assertEqual(3, enforce.call_count)
+
+    def test_enforce_memoized_rules_changed(self):
+        self.stub_policyfile('deny_stack_user.json')
+        enforcer = policy.Enforcer(scope='cloudformation')
+        ctx = utils.dummy_context(roles=['not_a_stack_user'])
+        self.assertTrue(enforcer.enforce(ctx, 'ListStacks'))
+
+        # Rules updated in place are still new rules
+        enforcer.set_rules({'cloudformation:ListStacks':
+                            base_policy.FalseCheck()}, overwrite=False)
+        self.assertRaises(exception.Forbidden, enforcer.enforce,
+                          ctx, 'ListStacks')
@@ -56,6 +56,20 @@ class SchemaTest(testtools.TestCase):
                                       description='allowed values')
         self.assertEqual(d, dict(r))
 
+    def test_allowed_values_validate(self):
+        r = constraints.AllowedValues(['foo', 'bar', 1])
+        r.validate('foo')
+        r.validate(1)
+        r.validate(['foo', 'bar'])
+        self.assertRaises(ValueError, r.validate, 'baz')
+        self.assertRaises(ValueError, r.validate, ['foo', 'baz'])
+        self.assertRaises(ValueError, r.validate, {'foo': 'bar'})
+
+    def test_allowed_values_unhashable(self):
+        r = constraints.AllowedValues([['foo'], {'bar': 'baz'}])
+        r.validate({'bar': 'baz'})
+        self.assertRaises(ValueError, r.validate, 'foo')
+
     def test_allowed_pattern_schema(self):
         d = {'allowed_pattern': '[A-Za-z0-9]', 'description': 'alphanumeric'}
         r = constraints.AllowedPattern('[A-Za-z0-9]',
@@ -211,8 +211,10 @@ class EIPTest(HeatTestCase):
         self.m.VerifyAll()
 
     def test_association_eip(self):
-        eip.ElasticIp.nova().AndReturn(self.fc)
-        eip.ElasticIp.nova().AndReturn(self.fc)
+        eip.ElasticIp.nova().MultipleTimes().AndReturn(self.fc)
+        eip.ElasticIpAssociation.nova().MultipleTimes().AndReturn(self.fc)
+        server = self.fc.servers.list()[0]
+        self.fc.servers.get('WebServer').MultipleTimes().AndReturn(server)
 
         self.m.ReplayAll()
 
@@ -35,8 +35,10 @@ import heat.rpc.api as engine_api
 import heat.db.api as db_api
 from heat.common import identifier
 from heat.common import template_format
+from heat.engine import api
 from heat.engine import dependencies
 from heat.engine import parser
+from heat.engine import profiler
 from heat.engine.resource import _register_class
 from heat.engine import service
 from heat.engine.properties import Properties
@@ -49,6 +51,7 @@ from heat.engine import watchrule
 from heat.openstack.common import threadgroup
 from heat.openstack.common.rpc import common as rpc_common
 from heat.openstack.common.rpc import proxy
+from heat.rpc import changes
 from heat.tests.common import HeatTestCase
 from heat.tests import generic_resource as generic_rsrc
 from heat.tests import utils
@@ -1467,7 +1470,9 @@ class StackServiceTest(HeatTestCase):
         thread.link(mox.IgnoreArg(), self.stack.id).AndReturn(None)
 
         def run(stack_id, func, *args):
-            func(*args)
+            # Deferred tasks would wait for the lock held by the update
+            if func != self.eng._run_deferred_task:
+                func(*args)
             return thread
         self.eng.thread_group_mgr.start = run
 
@@ -1689,6 +1694,17 @@ class StackServiceTest(HeatTestCase):
 
         self.m.VerifyAll()
 
+    @stack_context('service_timings_test_stack', False)
+    def test_stack_timings(self):
+        history = self.patchobject(profiler, 'history')
+        history.return_value = [{'action': 'CREATE'}]
+
+        timings = self.eng.get_stack_timings(self.ctx,
+                                             self.stack.identifier())
+
+        self.assertEqual([{'action': 'CREATE'}], timings)
+        history.assert_called_once_with(self.ctx, self.stack.id)
+
     @stack_context('service_describe_all_test_stack', False)
     def test_stack_describe_all(self):
         sl = self.eng.show_stack(self.ctx, None)
@@ -1742,6 +1758,13 @@ class StackServiceTest(HeatTestCase):
         schema = self.eng.resource_schema(self.ctx, type_name=type_name)
         self.assertEqual(expected, schema)
 
+    def test_resource_registry_version(self):
+        with mock.patch.object(environment.ResourceRegistry,
+                               'digest') as digest:
+            digest.return_value = 'abc123'
+            self.assertEqual('abc123',
+                             self.eng.resource_registry_version(self.ctx))
+
     def test_resource_schema_nonexist(self):
         self.assertRaises(exception.ResourceTypeNotFound,
                           self.eng.resource_schema,
@@ -1819,6 +1842,61 @@ class StackServiceTest(HeatTestCase):
 
         self.m.VerifyAll()
 
+    @stack_context('service_resource_describe_etag_test_stack')
+    def test_stack_resource_describe_etag(self):
+        self.m.StubOutWithMock(parser.Stack, 'load')
+        parser.Stack.load(self.ctx,
+                          stack=mox.IgnoreArg()).AndReturn(self.stack)
+        self.m.ReplayAll()
+
+        r = self.eng.describe_stack_resource(self.ctx, self.stack.identifier(),
+                                             'WebServer')
+        self.assertIn('etag', r)
+
+        # An unchanged resource is recognised without loading the stack
+        self.assertIsNone(self.eng.describe_stack_resource(
+            self.ctx, self.stack.identifier(), 'WebServer', etag=r['etag']))
+        self.m.VerifyAll()
+
+        self.m.UnsetStubs()
+        self.stack['WebServer'].metadata = {'foo': 'bar'}
+        r2 = self.eng.describe_stack_resource(
+            self.ctx, self.stack.identifier(), 'WebServer', etag=r['etag'])
+        self.assertEqual({'foo': 'bar'}, r2['metadata'])
+        self.assertNotEqual(r['etag'], r2['etag'])
+
+    @stack_context('service_resource_describe_user_etag_test_stack')
+    def test_stack_resource_describe_stack_user_etag(self):
+        self.ctx.roles = [cfg.CONF.heat_stack_user_role]
+        self.ctx.aws_creds = '{"ec2Credentials": {"access": "4567"}}'
+        self.m.StubOutWithMock(parser.Stack, 'load')
+        self.m.StubOutWithMock(service.EngineService, '_authorize_stack_user')
+        parser.Stack.load(self.ctx,
+                          stack=mox.IgnoreArg()).AndReturn(self.stack)
+        service.EngineService._authorize_stack_user(
+            self.ctx, self.stack, 'WebServer').AndReturn(True)
+        parser.Stack.load(self.ctx,
+                          stack=mox.IgnoreArg()).AndReturn(self.stack)
+        service.EngineService._authorize_stack_user(
+            self.ctx, self.stack, 'WebServer').AndReturn(False)
+        self.m.ReplayAll()
+
+        r = self.eng.describe_stack_resource(self.ctx, self.stack.identifier(),
+                                             'WebServer')
+
+        # Once authorised, the same user need not be authorised again while
+        # the stack is unchanged
+        self.assertIsNone(self.eng.describe_stack_resource(
+            self.ctx, self.stack.identifier(), 'WebServer', etag=r['etag']))
+
+        # But any other user must be
+        self.ctx.aws_creds = '{"ec2Credentials": {"access": "1234"}}'
+        self.assertRaises(exception.Forbidden,
+                          self.eng.describe_stack_resource,
+                          self.ctx, self.stack.identifier(), 'WebServer',
+                          etag=r['etag'])
+        self.m.VerifyAll()
+
     def test_stack_resource_describe_nested(self):
         stack = get_stack('service_stack_resource_describe_nested_test_stack',
                           self.ctx,
@@ -2071,6 +2149,107 @@ class StackServiceTest(HeatTestCase):
         self.m.VerifyAll()
         self.stack.delete()
 
+    def test_signal_deferred_task(self):
+        stack = get_stack('signal_deferred_task',
+                          self.ctx,
+                          policy_template)
+        self.stack = stack
+        setup_keystone_mocks(self.m, stack)
+        self.m.ReplayAll()
+        stack.store()
+        stack.create()
+
+        self.m.StubOutWithMock(service.EngineService, '_get_stack')
+        s = db_api.stack_get(self.ctx, self.stack.id)
+        service.EngineService._get_stack(self.ctx,
+                                         self.stack.identifier()).AndReturn(s)
+
+        self.m.StubOutWithMock(service.EngineService, '_load_user_creds')
+        service.EngineService._load_user_creds(
+            mox.IgnoreArg()).AndReturn(self.ctx)
+        self.m.ReplayAll()
+
+        task = mock.Mock()
+        start = self.patchobject(self.eng.thread_group_mgr, 'start')
+        with mock.patch.object(rsrs.Resource, 'signal',
+                               autospec=True) as signal:
+            signal.side_effect = lambda r, details: r.stack.run_deferred(task)
+            self.eng.resource_signal(self.ctx,
+                                     dict(self.stack.identifier()),
+                                     'WebServerScaleDownPolicy',
+                                     {})
+
+        self.assertFalse(task.called)
+        self.assertEqual(
+            [mock.call(self.stack.id, self.eng._run_deferred_task,
+                       self.ctx, self.stack.id, task, None),
+             mock.call(self.stack.id, self.eng._run_deferred_task,
+                       self.ctx, self.stack.id, parser.Stack.cache_outputs,
+                       None)],
+            start.call_args_list)
+        self.m.VerifyAll()
+        self.stack.delete()
+
+    def test_run_deferred_task(self):
+        stack = parser.Stack(self.ctx, 'run_deferred_task',
+                             parser.Template({}))
+        stack.store()
+        self.stack = stack
+
+        lock = self.patchobject(stack_lock, 'StackLock').return_value
+        lock.acquire.side_effect = [rpc_common.ClientException(), None]
+        sleep = self.patchobject(service.eventlet, 'sleep')
+        task = mock.Mock()
+
+        self.eng._run_deferred_task(self.ctx, stack.id, task)
+
+        sleep.assert_called_once_with(cfg.CONF.deferred_task_retry_interval)
+        self.assertEqual(2, lock.acquire.call_count)
+        self.assertEqual(1, task.call_count)
+        self.assertEqual(stack.id, task.call_args[0][0].id)
+        lock.release.assert_called_once_with(stack.id)
+        stack.delete()
+
+    def test_run_deferred_task_lock_retries(self):
+        stack = parser.Stack(self.ctx, 'run_deferred_task',
+                             parser.Template({}))
+        stack.store()
+        self.stack = stack
+
+        cfg.CONF.set_override('deferred_task_max_retries', 2)
+        lock = self.patchobject(stack_lock, 'StackLock').return_value
+        lock.acquire.side_effect = rpc_common.ClientException()
+        sleep = self.patchobject(service.eventlet, 'sleep')
+        task = mock.Mock()
+        cleanup = mock.Mock()
+
+        self.eng._run_deferred_task(self.ctx, stack.id, task, cleanup)
+
+        self.assertEqual(2, sleep.call_count)
+        self.assertEqual(3, lock.acquire.call_count)
+        self.assertFalse(task.called)
+        self.assertFalse(lock.release.called)
+        cleanup.assert_called_once_with()
+        stack.delete()
+
+    def test_run_deferred_task_cleanup(self):
+        task = mock.Mock()
+        cleanup = mock.Mock()
+
+        # The stack has been deleted
+        self.eng._run_deferred_task(self.ctx, 'missing', task, cleanup)
+        self.assertFalse(task.called)
+        cleanup.assert_called_once_with()
+
+        # Loading the stack fails
+        cleanup.reset_mock()
+        with mock.patch.object(db_api, 'stack_get',
+                               side_effect=exception.Error('DB error')):
+            self.assertRaises(exception.Error, self.eng._run_deferred_task,
+                              self.ctx, 'broken', task, cleanup)
+        self.assertFalse(task.called)
+        cleanup.assert_called_once_with()
+
     @stack_context('service_metadata_test_stack')
     def test_metadata(self):
         test_metadata = {'foo': 'bar', 'baz': 'quux', 'blarg': 'wibble'}
@@ -2416,7 +2595,7 @@ class StackServiceTest(HeatTestCase):
         self.assertIsNone(stack._dependencies)
 
         resources = stack.resources
-        self.assertIsInstance(resources, dict)
+        self.assertIsInstance(resources, parser.ResourceMap)
         self.assertEqual(2, len(resources))
         self.assertIsInstance(resources.get('foo'),
                               generic_rsrc.GenericResource)
@@ -2511,6 +2690,21 @@ class SoftwareConfigServiceTest(HeatTestCase):
             self.ctx, server_id=str(uuid.uuid4()))
         self.assertEqual([], deployments)
 
+    def test_list_software_deployments_etag(self):
+        server_id = str(uuid.uuid4())
+        deployments = self.engine.list_software_deployments(
+            self.ctx, server_id=server_id)
+        etag = api.format_software_deployments_etag(deployments)
+        self.assertIsNone(self.engine.list_software_deployments(
+            self.ctx, server_id=server_id, etag=etag))
+
+        config = self._create_software_config()
+        deployment = self.engine.create_software_deployment(
+            self.ctx, server_id, config['id'], {}, None, 'INIT', 'COMPLETE',
+            '')
+        self.assertEqual([deployment], self.engine.list_software_deployments(
+            self.ctx, server_id=server_id, etag=etag))
+
     def test_show_software_deployment(self):
         deployment_id = str(uuid.uuid4())
         self.assertIsNone(
@@ -2588,6 +2782,82 @@ class SoftwareConfigServiceTest(HeatTestCase):
         check_software_deployment_updated(status='COMPLETE')
         check_software_deployment_updated(status_reason='Done!')
 
+    def test_create_software_deployments(self):
+        config_id = self._create_software_config()['id']
+        server_ids = [str(uuid.uuid4()) for i in range(3)]
+        deployments = self.engine.create_software_deployments(
+            self.ctx, [{'server_id': server_id, 'config_id': config_id}
+                       for server_id in server_ids])
+
+        self.assertEqual(server_ids, [d['server_id'] for d in deployments])
+        for deployment in deployments:
+            self.assertEqual('INIT', deployment['action'])
+            self.assertEqual('COMPLETE', deployment['status'])
+            self.assertEqual([deployment],
+                             self.engine.list_software_deployments(
+                                 self.ctx, server_id=deployment['server_id']))
+
+    def test_create_software_deployments_missing_config(self):
+        config_id = self._create_software_config()['id']
+        server_ids = [str(uuid.uuid4()) for i in range(2)]
+        ex = self.assertRaises(rpc_common.ClientException,
+                               self.engine.create_software_deployments,
+                               self.ctx,
+                               [{'server_id': server_ids[0],
+                                 'config_id': config_id},
+                                {'server_id': server_ids[1],
+                                 'config_id': str(uuid.uuid4())}])
+        self.assertIs(ex._exc_info[0], exception.NotFound)
+
+        for server_id in server_ids:
+            self.assertEqual([], self.engine.list_software_deployments(
+                self.ctx, server_id=server_id))
+
+    def test_update_software_deployments(self):
+        deployments = [self._create_software_deployment() for i in range(2)]
+        updated = self.engine.update_software_deployments(
+            self.ctx, [{'id': d['id'], 'action': 'DEPLOY', 'status': None}
+                       for d in deployments])
+
+        self.assertEqual(set(d['id'] for d in deployments),
+                         set(d['id'] for d in updated))
+        for deployment in updated:
+            self.assertEqual('DEPLOY', deployment['action'])
+            self.assertEqual('COMPLETE', deployment['status'])
+
+        e = self.assertRaises(rpc_common.ClientException,
+                              self.engine.update_software_deployments,
+                              self.ctx, [{'id': str(uuid.uuid4()),
+                                          'status': 'FAILED'}])
+        self.assertIs(e._exc_info[0], exception.NotFound)
+
+    def test_software_deployment_changes_notified(self):
+        notify = self.patchobject(changes.ChangeNotifier,
+                                  'software_deployments_changed')
+        deployment = self._create_software_deployment()
+        server_id = deployment['server_id']
+        notify.assert_called_once_with(self.ctx, server_id)
+
+        notify.reset_mock()
+        self.engine.update_software_deployment(
+            self.ctx, deployment['id'], None, {}, {}, 'DEPLOY', 'WAITING', '')
+        notify.assert_called_once_with(self.ctx, server_id)
+
+        notify.reset_mock()
+        self.engine.create_software_deployments(
+            self.ctx, [{'server_id': server_id,
+                        'config_id': deployment['config_id']}] * 2)
+        notify.assert_called_once_with(self.ctx, server_id)
+
+        notify.reset_mock()
+        self.engine.update_software_deployments(
+            self.ctx, [{'id': deployment['id'], 'status': 'COMPLETE'}])
+        notify.assert_called_once_with(self.ctx, server_id)
+
+        notify.reset_mock()
+        self.engine.delete_software_deployment(self.ctx, deployment['id'])
+        notify.assert_called_once_with(self.ctx, server_id)
+
     def test_delete_software_deployment(self):
         deployment_id = str(uuid.uuid4())
         e = self.assertRaises(rpc_common.ClientException,
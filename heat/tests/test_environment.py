@@ -106,6 +106,54 @@ class EnvironmentTest(common.HeatTestCase):
                          env.get_resource_info('OS::Networking::FloatingIP',
                                                'my_fip').value)
 
+    def test_resource_info_cached(self):
+        env = environment.Environment({u'resource_registry':
+                                       {u'OS::Food': u'fruity.yaml'}})
+        info = env.get_resource_info('OS::Food', 'my_food')
+        with mock.patch.object(env.registry, '_find_resource_info') as find:
+            self.assertIs(info, env.get_resource_info('OS::Food', 'my_food'))
+        self.assertFalse(find.called)
+
+    def test_resource_info_global_change(self):
+        env = environment.Environment({})
+        self.assertIsNone(env.get_resource_info('CloudY::Thing'))
+
+        self.g_env.register_class('CloudY::Thing',
+                                  generic_resource.GenericResource)
+        self.assertEqual('CloudY::Thing',
+                         env.get_resource_info('CloudY::Thing').name)
+
+    def test_digest(self):
+        snippet = {u'resource_registry': {u'OS::Food': u'fruity.yaml'}}
+        env = environment.Environment(snippet)
+        digest = env.registry.digest()
+        self.assertEqual(digest, env.registry.digest())
+        self.assertEqual(digest,
+                         environment.Environment(snippet).registry.digest())
+        self.assertNotEqual(digest, environment.Environment(
+            {u'resource_registry': {u'OS::Food': u'veggie.yaml'}}
+        ).registry.digest())
+
+        self.g_env.register_class('CloudZ::Thing',
+                                  generic_resource.GenericResource)
+        self.assertNotEqual(digest, env.registry.digest())
+
+    def test_glob_prefixes(self):
+        env = environment.Environment({u'resource_registry': {
+            u'OS::*': u'CloudX::*',
+            u'OS::Nova::*': u'CloudZ::Nova::*'}})
+
+        def globs(resource_type):
+            return sorted(info.name for info in
+                          env.registry.iterable_by(resource_type))
+
+        self.assertEqual(['OS::*', 'OS::Nova::*'], globs('OS::Nova::Server'))
+        self.assertEqual(['OS::*'], globs('OS::Cinder::Volume'))
+        self.assertEqual([], globs('AWS::EC2::Instance'))
+
+        env.load({u'resource_registry': {u'OS::Nova::*': None}})
+        self.assertEqual(['OS::*'], globs('OS::Nova::Server'))
+
     def test_constraints(self):
         env = environment.Environment({})
 
@@ -674,3 +674,50 @@ class InstanceGroupTest(HeatTestCase):
         expected_error_message = ('The current UpdatePolicy will result '
                                   'in stack update timeout.')
         self.assertIn(expected_error_message, stack.status_reason)
+
+    def _stub_replace_steps(self, grp, num_instances):
+        self.patchobject(grp, 'nested').return_value = dict(
+            ('i%d' % n, None) for n in range(num_instances))
+        self.patchobject(grp, '_get_instance_definition')
+        self.patchobject(grp, 'get_instances').return_value = []
+        self.patchobject(grp, '_lb_reload')
+        self.patchobject(grp, 'check_update_complete')
+        create_template = self.patchobject(grp, '_create_template')
+        create_template.return_value = {'Resources': {}}
+        update = self.patchobject(grp, 'update_with_template')
+        return create_template, update
+
+    def test_replace_batch_steps(self):
+        tmpl = template_format.parse(ig_tmpl_with_updt_policy)
+        stack = utils.parse_stack(tmpl)
+        grp = stack['JobServerGroup']
+
+        create_template, update = self._stub_replace_steps(grp, 10)
+        grp._replace(0, 2, 'PT0S')
+        self.assertEqual(5, update.call_count)
+        self.assertEqual(2, create_template.call_args_list[0][0][1])
+
+    def test_replace_changing_instances(self):
+        tmpl = template_format.parse(ig_tmpl_with_updt_policy)
+        stack = utils.parse_stack(tmpl)
+        grp = stack['JobServerGroup']
+        create_template, update = self._stub_replace_steps(grp, 3)
+
+        instances = []
+        for name in ('kept', 'replaced', 'removed'):
+            inst = self.m.CreateMockAnything()
+            inst.name = name
+            inst.t = {'Type': 'AWS::EC2::Instance'}
+            inst.FnGetRefId = lambda name=name: 'ref-' + name
+            instances.append(inst)
+        grp.get_instances.return_value = instances
+        definition = grp._get_instance_definition.return_value
+        create_template.return_value = {'Resources': {
+            'kept': instances[0].t,
+            'replaced': definition,
+            'added': definition}}
+
+        grp._replace(0, 3, 'PT0S')
+        self.assertEqual(1, update.call_count)
+        grp._lb_reload.assert_any_call(exclude=set(['ref-replaced',
+                                                    'ref-removed']))
@@ -228,6 +228,61 @@ class LoadBalancerTest(HeatTestCase):
                                               expected_regexp.pattern, text)
             raise self.failureException(msg)
 
+    def _haproxy_servers(self, ha_cfg):
+        return re.findall(r'server (server\d+ [\d.]+):80', ha_cfg)
+
+    def test_haproxy_config_known_addresses(self):
+        t = template_format.parse(lb_template)
+        s = utils.parse_stack(t)
+        rsrc = lb.LoadBalancer('LoadBalancer',
+                               t['Resources']['LoadBalancer'],
+                               s)
+        templ = template_format.parse(lb.lb_template_default)
+        self.m.StubOutWithMock(self.fc.servers, 'get')
+        self.m.StubOutWithMock(self.fc.servers, 'list')
+        self.m.ReplayAll()
+
+        rsrc.record_member_addresses({'s1': '10.0.0.1', 's2': '10.0.0.2',
+                                      's3': None})
+        ha_cfg = rsrc._haproxy_config(templ, ['s2', 's1'])
+        self.assertEqual(['server1 10.0.0.2', 'server2 10.0.0.1'],
+                         self._haproxy_servers(ha_cfg))
+        self.m.VerifyAll()
+
+    def test_haproxy_config_bulk_lookup(self):
+        t = template_format.parse(lb_template)
+        s = utils.parse_stack(t)
+        rsrc = lb.LoadBalancer('LoadBalancer',
+                               t['Resources']['LoadBalancer'],
+                               s)
+        templ = template_format.parse(lb.lb_template_default)
+        servers = self.fc.servers.list()
+        clients.OpenStackClients.nova(
+            "compute").MultipleTimes().AndReturn(self.fc)
+        self.m.StubOutWithMock(self.fc.servers, 'get')
+        self.m.StubOutWithMock(self.fc.servers, 'list')
+        self.fc.servers.list(
+            search_opts={'marker': None}).AndReturn(servers)
+        self.fc.servers.list(
+            search_opts={'marker': servers[-1].id}).AndReturn([])
+        self.m.ReplayAll()
+
+        rsrc.record_member_addresses({'known': '10.0.0.1'})
+        members = ['known', servers[1].id, servers[2].id, 'missing']
+        addresses = [[a[0] for a in srv.networks.values() if a][0]
+                     for srv in servers[1:3]]
+        ha_cfg = rsrc._haproxy_config(templ, members)
+        self.assertEqual(['server1 10.0.0.1',
+                          'server2 %s' % addresses[0],
+                          'server3 %s' % addresses[1],
+                          'server4 0.0.0.0'],
+                         self._haproxy_servers(ha_cfg))
+
+        # Addresses are now known, so Nova is not asked again
+        ha_cfg = rsrc._haproxy_config(templ, members[1:3])
+        self.assertEqual(2, len(self._haproxy_servers(ha_cfg)))
+        self.m.VerifyAll()
+
     def test_loadbalancer_validate_badtemplate(self):
         cfg.CONF.set_override('loadbalancer_template', '/a/noexist/x.y')
 
@@ -14,6 +14,9 @@
 #    under the License.
 """Tests for :module:'heat.engine.resources.nova_utls'."""
 
+import email
+import json
+import pkgutil
 import uuid
 
 from heat.common import exception
@@ -84,6 +87,39 @@ class NovaUtilsTests(HeatTestCase):
                           self.nova_client, 'notakey')
         self.m.VerifyAll()
 
+    def test_servers_to_ipaddresses(self):
+        """Tests the servers_to_ipaddresses function."""
+        servers = []
+        for server_id, networks in (('s1', {'private': ['10.0.0.1']}),
+                                    ('s2', {'private': []}),
+                                    ('s3', {'public': ['172.24.4.3']}),
+                                    ('s4', {'private': ['10.0.0.4']})):
+            server = self.m.CreateMockAnything()
+            server.id = server_id
+            server.networks = networks
+            servers.append(server)
+        self.nova_client.servers = self.m.CreateMockAnything()
+        # The list is returned in pages
+        self.nova_client.servers.list(
+            search_opts={'marker': None}).AndReturn(servers[:2])
+        self.nova_client.servers.list(
+            search_opts={'marker': 's2'}).AndReturn(servers[2:])
+        self.nova_client.servers.list(
+            search_opts={'marker': 's4'}).AndReturn([])
+        # Listing stops once all of the servers are found
+        self.nova_client.servers.list(
+            search_opts={'marker': None}).AndReturn(servers[:2])
+        self.m.ReplayAll()
+        self.assertEqual({'s1': '10.0.0.1', 's3': '172.24.4.3'},
+                         nova_utils.servers_to_ipaddresses(
+                             self.nova_client, ['s1', 's2', 's3', 's5']))
+        self.assertEqual({'s1': '10.0.0.1'},
+                         nova_utils.servers_to_ipaddresses(
+                             self.nova_client, ['s1', 's2']))
+        self.assertEqual({}, nova_utils.servers_to_ipaddresses(
+            self.nova_client, []))
+        self.m.VerifyAll()
+
 
 class NovaUtilsUserdataTests(HeatTestCase):
 
@@ -128,6 +164,57 @@ class NovaUtilsUserdataTests(HeatTestCase):
         self.m.VerifyAll()
 
 
+class NovaUtilsPreparedUserdataTests(HeatTestCase):
+
+    def setUp(self):
+        super(NovaUtilsPreparedUserdataTests, self).setUp()
+        nova_utils._prepared_userdata.clear()
+        self.addCleanup(nova_utils._prepared_userdata.clear)
+        self.resource = self.m.CreateMockAnything()
+        self.resource.t = {'Metadata': {}}
+        self.resource.metadata = {'foo': 'bar'}
+
+    def test_build_userdata_parts(self):
+        data = nova_utils.build_userdata(self.resource, 'echo hello',
+                                         instance_user='fruity')
+        msg = email.message_from_string(data)
+        self.assertTrue(msg.is_multipart())
+
+        parts = msg.get_payload()
+        self.assertEqual(['cloud-config', 'boothook.sh', 'part-handler.py',
+                          'cfn-userdata', 'loguserdata.py', 'cfn-init-data',
+                          'cfn-watch-server', 'cfn-metadata-server',
+                          'cfn-boto-cfg'],
+                         [p.get_filename() for p in parts])
+        self.assertEqual('echo hello', parts[3].get_payload())
+        self.assertEqual({'foo': 'bar'}, json.loads(parts[5].get_payload()))
+        self.assertIn('fruity', parts[0].get_payload())
+
+    def test_build_userdata_prepared_once(self):
+        get_data = self.patchobject(pkgutil, 'get_data')
+        get_data.return_value = '@INSTANCE_USER@'
+
+        first = nova_utils.build_userdata(self.resource, 'one',
+                                          instance_user='fruity')
+        second = nova_utils.build_userdata(self.resource, 'two',
+                                           instance_user='fruity')
+        self.assertEqual(4, get_data.call_count)
+        self.assertIn('one', first)
+        self.assertIn('two', second)
+
+        nova_utils.build_userdata(self.resource, 'three',
+                                  instance_user='nutty')
+        self.assertEqual(8, get_data.call_count)
+
+        self.patchobject(nova_utils.cfg, 'CONF')
+        nova_utils.cfg.CONF.heat_metadata_server_url = 'http://server:123'
+        nova_utils.cfg.CONF.heat_watch_server_url = 'http://server:345'
+        data = nova_utils.build_userdata(self.resource, 'four',
+                                         instance_user='fruity')
+        self.assertEqual(12, get_data.call_count)
+        self.assertIn('http://server:123', data)
+
+
 class NovaUtilsMetadataTests(HeatTestCase):
 
     def test_serialize_string(self):
@@ -15,7 +15,10 @@
 import json
 import time
 
+import eventlet
 from keystoneclient import exceptions as kc_exceptions
+import mock
+import mox
 
 from oslo.config import cfg
 
@@ -27,6 +30,7 @@ from heat.common import urlfetch
 from heat.engine import clients
 from heat.engine import resource
 from heat.engine import parser
+from heat.engine import profiler
 from heat.engine import scheduler
 from heat.engine import template
 
@@ -883,7 +887,9 @@ class StackTest(HeatTestCase):
                               stack.action, stack.status, stack.status_reason,
                               stack.timeout, True, stack.disable_rollback,
                               'parent', owner_id=None,
-                              stack_user_project_id=None)
+                              stack_user_project_id=None,
+                              output_values=None,
+                              timings=mox.IsA(profiler.Timings))
 
         self.m.ReplayAll()
         parser.Stack.load(self.ctx, stack_id=self.stack.id,
@@ -1369,6 +1375,68 @@ class StackTest(HeatTestCase):
         self.assertEqual((parser.Stack.UPDATE, parser.Stack.FAILED),
                          self.stack.state)
 
+    def test_validate_reports_all_errors(self):
+        tmpl = {'Resources': {
+            'AResource': {'Type': 'ResourceWithPropsType',
+                          'Properties': {'Foo': ['a']}},
+            'BResource': {'Type': 'ResourceWithPropsType',
+                          'Properties': {'Foo': 'abc'}},
+            'CResource': {'Type': 'ResourceWithPropsType',
+                          'Properties': {'Bar': 'abc'}}}}
+        stack = parser.Stack(self.ctx, 'validate_errors_test',
+                             template.Template(tmpl))
+
+        ex = self.assertRaises(exception.StackValidationFailed,
+                               stack.validate)
+        errors = sorted(str(ex).splitlines())
+        self.assertEqual(2, len(errors))
+        self.assertTrue(errors[0].startswith('AResource: '))
+        self.assertTrue(errors[1].startswith('CResource: '))
+        self.assertIn('Unknown Property Bar', errors[1])
+
+    def test_validate_single_error(self):
+        tmpl = {'Resources': {
+            'AResource': {'Type': 'ResourceWithPropsType',
+                          'Properties': {'Bar': 'abc'}},
+            'BResource': {'Type': 'GenericResourceType'}}}
+        stack = parser.Stack(self.ctx, 'validate_error_test',
+                             template.Template(tmpl))
+
+        ex = self.assertRaises(exception.StackValidationFailed,
+                               stack.validate)
+        self.assertEqual('Unknown Property Bar', str(ex))
+
+    def test_validation_lookup_shared(self):
+        tmpl = {'Resources': {
+            'AResource': {'Type': 'GenericResourceType'},
+            'BResource': {'Type': 'GenericResourceType'},
+            'CResource': {'Type': 'GenericResourceType'}}}
+        stack = parser.Stack(self.ctx, 'validation_lookup_test',
+                             template.Template(tmpl))
+
+        lookups = []
+
+        def lookup(name):
+            lookups.append(name)
+            eventlet.sleep(0)
+            if name == 'missing':
+                raise exception.ImageNotFound(image_name=name)
+            return name.upper()
+
+        def validate():
+            self.assertEqual('FOO', stack.validation_lookup(lookup, 'foo'))
+            self.assertRaises(exception.ImageNotFound,
+                              stack.validation_lookup, lookup, 'missing')
+
+        self.patchobject(generic_rsrc.GenericResource,
+                         'validate').side_effect = validate
+        stack.validate()
+        self.assertEqual(['foo', 'missing'], lookups)
+
+        # Outside of validation, lookups are not shared
+        self.assertEqual('FOO', stack.validation_lookup(lookup, 'foo'))
+        self.assertEqual(['foo', 'missing', 'foo'], lookups)
+
     @utils.stack_delete_after
     def test_resource_by_refid(self):
         tmpl = {'Resources': {'AResource': {'Type': 'GenericResourceType'}}}
@@ -1401,6 +1469,197 @@ class StackTest(HeatTestCase):
         finally:
             rsrc.state_set(rsrc.CREATE, rsrc.COMPLETE)
 
+    @utils.stack_delete_after
+    def test_resource_by_refid_index(self):
+        tmpl = {'Resources': {'AResource': {'Type': 'GenericResourceType'},
+                              'BResource': {'Type': 'GenericResourceType'}}}
+
+        self.stack = parser.Stack(self.ctx, 'resource_by_refid_index',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+        rsrc_a = self.stack['AResource']
+        rsrc_b = self.stack['BResource']
+        rsrc_a.resource_id_set('aaaa')
+        self.assertEqual(rsrc_a, self.stack.resource_by_refid('aaaa'))
+        self.assertEqual(rsrc_b, self.stack.resource_by_refid('BResource'))
+
+        # Lookups use the index rather than resolving every refid again
+        with mock.patch.object(generic_rsrc.GenericResource,
+                               'FnGetRefId') as get_refid:
+            self.assertEqual(rsrc_a, self.stack.resource_by_refid('aaaa'))
+            self.assertIsNone(self.stack.resource_by_refid('bbbb'))
+            self.assertFalse(get_refid.called)
+
+        # The index follows changes of physical ID and state
+        rsrc_a.resource_id_set('cccc')
+        self.assertIsNone(self.stack.resource_by_refid('aaaa'))
+        self.assertEqual(rsrc_a, self.stack.resource_by_refid('cccc'))
+
+        rsrc_b.resource_id_set('cccc')
+        rsrc_a.state_set(rsrc_a.DELETE, rsrc_a.COMPLETE)
+        self.assertEqual(rsrc_b, self.stack.resource_by_refid('cccc'))
+
+        del self.stack['BResource']
+        self.assertIsNone(self.stack.resource_by_refid('cccc'))
+
+        self.stack['BResource'] = rsrc_b
+        self.assertEqual(rsrc_b, self.stack.resource_by_refid('cccc'))
+
+    @utils.stack_delete_after
+    def test_resources_lazy(self):
+        tmpl = {'Resources': {'AResource': {'Type': 'GenericResourceType'},
+                              'BResource': {'Type': 'GenericResourceType'},
+                              'CResource': {'Type': 'GenericResourceType'}}}
+
+        self.stack = parser.Stack(self.ctx, 'resources_lazy',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+        stack = parser.Stack.load(self.ctx, stack_id=self.stack.id)
+
+        created = set()
+        resource_init = resource.Resource.__init__
+
+        def init(rsrc, name, json_snippet, stack):
+            created.add(name)
+            resource_init(rsrc, name, json_snippet, stack)
+
+        with mock.patch.object(resource.Resource, '__init__', init):
+            self.assertEqual(3, len(stack))
+            self.assertIn('CResource', stack)
+            self.assertNotIn('DResource', stack)
+            self.assertEqual(set(), created)
+
+            rsrc = stack['BResource']
+            self.assertIs(rsrc, stack['BResource'])
+            self.assertEqual(set(['BResource']), created)
+            self.assertEqual((rsrc.CREATE, rsrc.COMPLETE), rsrc.state)
+
+            names = set(['AResource', 'BResource', 'CResource'])
+            self.assertEqual(names, set(r.name for r in stack.itervalues()))
+            self.assertEqual(names, created)
+
+    @utils.stack_delete_after
+    def test_access_allowed_loads_resources(self):
+        class CredentialResource(generic_rsrc.GenericResource):
+            registers_access_allowed_handler = True
+
+            def __init__(self, name, json_snippet, stack):
+                super(CredentialResource, self).__init__(name, json_snippet,
+                                                         stack)
+                stack.register_access_allowed_handler(
+                    'cred-%s' % name, lambda r: r == 'AResource')
+
+        resource._register_class('CredentialResourceType', CredentialResource)
+        tmpl = {'Resources': {'AResource': {'Type': 'GenericResourceType'},
+                              'Cred': {'Type': 'CredentialResourceType'}}}
+
+        self.stack = parser.Stack(self.ctx, 'access_allowed',
+                                  template.Template(tmpl))
+        self.stack.store()
+        stack = parser.Stack.load(self.ctx, stack_id=self.stack.id)
+
+        self.assertTrue(stack.access_allowed('cred-Cred', 'AResource'))
+        self.assertFalse(stack.access_allowed('cred-Cred', 'Cred'))
+        self.assertFalse(stack.access_allowed('other', 'AResource'))
+        self.assertEqual(['Cred'],
+                         [n for n, r in stack.resources._resources.items()
+                          if r is not parser.ResourceMap._UNLOADED])
+
+    @utils.stack_delete_after
+    def test_dependencies_stored(self):
+        tmpl = {'Resources': {
+                'AResource': {'Type': 'GenericResourceType'},
+                'BResource': {'Type': 'ResourceWithPropsType',
+                              'Properties': {'Foo': {'Ref': 'AResource'}}},
+                'CResource': {'Type': 'GenericResourceType'}}}
+
+        self.stack = parser.Stack(self.ctx, 'dependencies_stored',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+        self.assertEqual((parser.Stack.CREATE, parser.Stack.COMPLETE),
+                         self.stack.state)
+
+        stored = db_api.raw_template_get(self.ctx, self.stack.t.id)
+        self.assertEqual(self.stack._dependencies_key(),
+                         stored.dependencies['key'])
+
+        stack = parser.Stack.load(self.ctx, stack_id=self.stack.id)
+        with mock.patch.object(resource.Resource,
+                               '_add_dependencies') as add_deps:
+            deps = stack.dependencies
+            self.assertFalse(add_deps.called)
+
+        self.assertEqual([stack['BResource']],
+                         list(deps.required_by(stack['AResource'])))
+        self.assertEqual([], list(deps.required_by(stack['CResource'])))
+        order = [r.name for r in deps]
+        self.assertTrue(order.index('AResource') < order.index('BResource'))
+        self.assertEqual(3, len(order))
+
+    @utils.stack_delete_after
+    def test_dependencies_not_stored_dynamic(self):
+        class DynamicDepsResource(generic_rsrc.GenericResource):
+            def add_dependencies(self, deps):
+                super(DynamicDepsResource, self).add_dependencies(deps)
+
+        resource._register_class('DynamicDepsResourceType',
+                                 DynamicDepsResource)
+        tmpl = {'Resources': {
+                'AResource': {'Type': 'GenericResourceType'},
+                'BResource': {'Type': 'DynamicDepsResourceType'}}}
+
+        self.stack = parser.Stack(self.ctx, 'dependencies_dynamic',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+        self.assertEqual((parser.Stack.CREATE, parser.Stack.COMPLETE),
+                         self.stack.state)
+
+        stored = db_api.raw_template_get(self.ctx, self.stack.t.id)
+        self.assertIsNone(stored.dependencies)
+
+    @utils.stack_delete_after
+    def test_dependencies_stored_mismatch(self):
+        tmpl = {'Resources': {
+                'AResource': {'Type': 'GenericResourceType'},
+                'BResource': {'Type': 'ResourceWithPropsType',
+                              'Properties': {'Foo': {'Ref': 'AResource'}}}}}
+
+        self.stack = parser.Stack(self.ctx, 'dependencies_mismatch',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+
+        stale = {'key': 'stale', 'edges': []}
+        db_api.raw_template_update(self.ctx, self.stack.t.id,
+                                   {'dependencies': stale})
+        stack = parser.Stack.load(self.ctx, stack_id=self.stack.id)
+        self.assertEqual([stack['BResource']],
+                         list(stack.dependencies.required_by(
+                             stack['AResource'])))
+
+        # Loading the stack does not write to the database...
+        stored = db_api.raw_template_get(self.ctx, stack.t.id)
+        self.assertEqual(stale, stored.dependencies)
+
+        # ...but the next operation on it does
+        stack.suspend()
+        stored = db_api.raw_template_get(self.ctx, stack.t.id)
+        self.assertEqual(stack._dependencies_key(),
+                         stored.dependencies['key'])
+
+        # Once the resources no longer match the template, the stored
+        # dependencies are not used
+        stack.reset_dependencies()
+        del stack['BResource']
+        with mock.patch.object(resource.Resource,
+                               '_add_dependencies') as add_deps:
+            self.assertEqual([stack['AResource']], list(stack.dependencies))
+            self.assertTrue(add_deps.called)
+
     @utils.stack_delete_after
     def test_update_add(self):
         tmpl = {'Resources': {'AResource': {'Type': 'GenericResourceType'}}}
@@ -2183,6 +2442,189 @@ class StackTest(HeatTestCase):
             rsrc.state_set(action, status)
             self.assertIsNone(self.stack.output('TestOutput'))
 
+    @utils.stack_delete_after
+    def test_output_values_cached(self):
+        tmpl = {
+            'Resources': {'AResource': {'Type': 'GenericResourceType'}},
+            'Outputs': {'TestOutput': {'Value': {
+                'Fn::GetAtt': ['AResource', 'Foo']}}
+            }
+        }
+
+        self.stack = parser.Stack(self.ctx, 'output_values_cached',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+        self.assertEqual((parser.Stack.CREATE, parser.Stack.COMPLETE),
+                         self.stack.state)
+        db_stack = db_api.stack_get(self.ctx, self.stack.id)
+        self.assertEqual({'TestOutput': 'AResource'}, db_stack.output_values)
+
+        self.m.StubOutWithMock(generic_rsrc.GenericResource, 'FnGetAtt')
+        self.m.ReplayAll()
+
+        loaded = parser.Stack.load(self.ctx, stack_id=self.stack.id)
+        self.assertEqual('AResource', loaded.output('TestOutput'))
+        self.m.VerifyAll()
+
+    @utils.stack_delete_after
+    def test_volatile_output_values_not_cached(self):
+        tmpl = {
+            'Resources': {'AResource': {'Type': 'GenericResourceType'}},
+            'Outputs': {
+                'Volatile': {'Value': {'Fn::Join': ['', [
+                    {'Fn::GetAtt': ['AResource', 'Foo']}]]}},
+                'Stable': {'Value': {'Ref': 'AResource'}},
+            }
+        }
+
+        self.stack = parser.Stack(self.ctx, 'volatile_output_values',
+                                  template.Template(tmpl))
+        self.stack.store()
+        with mock.patch.object(generic_rsrc.GenericResource,
+                               'volatile_attributes', ('Foo',)):
+            self.stack.create()
+            db_stack = db_api.stack_get(self.ctx, self.stack.id)
+            self.assertEqual({'Stable': 'AResource'}, db_stack.output_values)
+
+            loaded = parser.Stack.load(self.ctx, stack_id=self.stack.id)
+            with mock.patch.object(generic_rsrc.GenericResource,
+                                   '_resolve_attribute') as resolve:
+                resolve.return_value = 'changed'
+                self.assertEqual('changed', loaded.output('Volatile'))
+
+    @utils.stack_delete_after
+    def test_output_values_invalidated(self):
+        tmpl = {
+            'Resources': {'AResource': {'Type': 'GenericResourceType'}},
+            'Outputs': {'TestOutput': {'Value': {
+                'Fn::GetAtt': ['AResource', 'Foo']}}
+            }
+        }
+
+        self.stack = parser.Stack(self.ctx, 'output_values_invalidated',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+
+        loaded = parser.Stack.load(self.ctx, stack_id=self.stack.id)
+        rsrc = loaded['AResource']
+        rsrc.state_set(rsrc.UPDATE, rsrc.COMPLETE)
+        db_stack = db_api.stack_get(self.ctx, self.stack.id)
+        self.assertIsNone(db_stack.output_values)
+
+        # Reading the outputs does not write them to the database
+        self.assertEqual('AResource', loaded.output('TestOutput'))
+        db_stack = db_api.stack_get(self.ctx, self.stack.id)
+        self.assertIsNone(db_stack.output_values)
+
+    @utils.stack_delete_after
+    def test_output_values_invalidated_once(self):
+        tmpl = {
+            'Resources': {'AResource': {'Type': 'GenericResourceType'},
+                          'BResource': {'Type': 'GenericResourceType'}},
+            'Outputs': {'TestOutput': {'Value': {
+                'Fn::GetAtt': ['AResource', 'Foo']}}
+            }
+        }
+
+        self.stack = parser.Stack(self.ctx, 'output_values_once',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+
+        loaded = parser.Stack.load(self.ctx, stack_id=self.stack.id)
+        self.m.StubOutWithMock(db_api, 'stack_output_values_clear')
+        db_api.stack_output_values_clear(loaded.context, loaded.id)
+        self.m.ReplayAll()
+
+        for name in ('AResource', 'BResource'):
+            rsrc = loaded[name]
+            rsrc.state_set(rsrc.UPDATE, rsrc.COMPLETE)
+        self.m.VerifyAll()
+
+    @utils.stack_delete_after
+    def test_output_values_not_invalidated_uncached(self):
+        tmpl = {
+            'Resources': {'AResource': {'Type': 'GenericResourceType'}},
+            'Outputs': {'TestOutput': {'Value': {
+                'Fn::GetAtt': ['AResource', 'Foo']}}
+            }
+        }
+
+        self.stack = parser.Stack(self.ctx, 'output_values_uncached',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+        self.stack.state_set(self.stack.UPDATE, self.stack.IN_PROGRESS,
+                             'test')
+
+        # The operation has already cleared the values from the database
+        self.m.StubOutWithMock(db_api, 'stack_output_values_clear')
+        self.m.ReplayAll()
+
+        rsrc = self.stack['AResource']
+        rsrc.state_set(rsrc.UPDATE, rsrc.IN_PROGRESS)
+        rsrc.state_set(rsrc.UPDATE, rsrc.COMPLETE)
+        self.m.VerifyAll()
+
+    @utils.stack_delete_after
+    def test_output_values_cached_deferred(self):
+        tmpl = {'Resources': {'AResource': {'Type': 'GenericResourceType'}},
+                'Outputs': {'TestOutput': {'Value': 'foo'}}}
+
+        self.stack = parser.Stack(self.ctx, 'output_values_deferred',
+                                  template.Template(tmpl))
+        self.stack.store()
+        runner = mock.Mock()
+        self.stack.deferred_task_runner = runner
+        self.stack.create()
+
+        runner.assert_called_once_with(parser.Stack.cache_outputs, None)
+        db_stack = db_api.stack_get(self.ctx, self.stack.id)
+        self.assertIsNone(db_stack.output_values)
+
+    @utils.stack_delete_after
+    def test_output_values_not_cached_in_progress(self):
+        tmpl = {
+            'Resources': {'AResource': {'Type': 'GenericResourceType'}},
+            'Outputs': {'TestOutput': {'Value': {
+                'Fn::GetAtt': ['AResource', 'Foo']}}
+            }
+        }
+
+        self.stack = parser.Stack(self.ctx, 'output_values_in_progress',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+        self.stack.state_set(self.stack.UPDATE, self.stack.IN_PROGRESS,
+                             'test')
+
+        self.assertEqual('AResource', self.stack.output('TestOutput'))
+        db_stack = db_api.stack_get(self.ctx, self.stack.id)
+        self.assertIsNone(db_stack.output_values)
+
+    @utils.stack_delete_after
+    def test_update_output_values(self):
+        tmpl = {'Resources': {'AResource': {'Type': 'GenericResourceType'}},
+                'Outputs': {'TestOutput': {'Value': 'foo'}}}
+
+        self.stack = parser.Stack(self.ctx, 'update_output_values',
+                                  template.Template(tmpl))
+        self.stack.store()
+        self.stack.create()
+        self.assertEqual('foo', self.stack.output('TestOutput'))
+
+        tmpl['Outputs']['TestOutput']['Value'] = 'bar'
+        updated_stack = parser.Stack(self.ctx, 'updated_stack',
+                                     template.Template(tmpl))
+        self.stack.update(updated_stack)
+        self.assertEqual((parser.Stack.UPDATE, parser.Stack.COMPLETE),
+                         self.stack.state)
+
+        loaded = parser.Stack.load(self.ctx, stack_id=self.stack.id)
+        self.assertEqual('bar', loaded.output('TestOutput'))
+
     @utils.stack_delete_after
     def test_resource_required_by(self):
         tmpl = {'Resources': {'AResource': {'Type': 'GenericResourceType'},
@@ -0,0 +1,192 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import eventlet
+import fixtures
+from oslo.config import cfg
+
+from heat.engine import parser
+from heat.engine import profiler
+from heat.engine import resource
+from heat.engine import template
+from heat.tests.common import HeatTestCase
+from heat.tests import generic_resource as generic_rsrc
+from heat.tests import utils
+
+
+class TimingsTest(HeatTestCase):
+
+    def test_add(self):
+        timings = profiler.Timings()
+        timings.add('handle_create', 2.0)
+        timings.add('handle_create', 1.0)
+        timings.add('load', 0.5)
+
+        self.assertEqual({'handle_create': {'count': 2,
+                                            'total': 3.0,
+                                            'max': 2.0},
+                          'load': {'count': 1,
+                                   'total': 0.5,
+                                   'max': 0.5}},
+                         timings.as_dict())
+
+    def test_phase(self):
+        timings = profiler.Timings()
+
+        def fail():
+            with timings.phase('validate'):
+                raise ValueError()
+
+        self.assertRaises(ValueError, fail)
+        with timings.phase('validate'):
+            pass
+
+        phases = timings.as_dict()
+        self.assertEqual(['validate'], phases.keys())
+        self.assertEqual(2, phases['validate']['count'])
+
+
+class StackOperationTimingsTest(HeatTestCase):
+
+    tmpl = {'Resources': {
+            'AResource': {'Type': 'GenericResourceType'},
+            'BResource': {'Type': 'GenericResourceType',
+                          'DependsOn': 'AResource'}}}
+
+    def setUp(self):
+        super(StackOperationTimingsTest, self).setUp()
+        utils.setup_dummy_db()
+        self.ctx = utils.dummy_context()
+        resource._register_class('GenericResourceType',
+                                 generic_rsrc.GenericResource)
+
+    def _create_stack(self, name):
+        stack = parser.Stack(self.ctx, name, template.Template(self.tmpl))
+        stack.store()
+        stack.create()
+        self.assertEqual((stack.CREATE, stack.COMPLETE), stack.state)
+        return stack
+
+    def test_create(self):
+        stack = self._create_stack('timings_create')
+        self.addCleanup(stack.delete)
+
+        history = profiler.history(self.ctx, stack.id)
+        self.assertEqual(1, len(history))
+        op = history[0]
+        self.assertEqual('CREATE', op['action'])
+        self.assertEqual('COMPLETE', op['status'])
+        self.assertEqual(stack.id, op['stack_id'])
+        self.assertTrue(op['elapsed'] >= 0)
+        self.assertEqual(2, op['phases']['handle_create']['count'])
+        self.assertEqual(2, op['phases']['resource_init']['count'])
+        self.assertIn('dependencies', op['phases'])
+
+        # Timings start afresh for the next operation
+        self.assertEqual({}, stack.timings.as_dict())
+
+    def test_load_and_delete(self):
+        stack = self._create_stack('timings_delete')
+        stack_id = stack.id
+
+        stack = parser.Stack.load(self.ctx, stack_id=stack_id)
+        stack.delete()
+        self.assertEqual((stack.DELETE, stack.COMPLETE), stack.state)
+
+        history = profiler.history(self.ctx, stack_id)
+        self.assertEqual(['DELETE', 'CREATE'],
+                         [op['action'] for op in history])
+        self.assertEqual(1, history[0]['phases']['load']['count'])
+        self.assertEqual(2, history[0]['phases']['handle_delete']['count'])
+
+    def test_history_limit(self):
+        cfg.CONF.set_override('stack_timings_history', 2)
+        stack = self._create_stack('timings_limit')
+        self.addCleanup(stack.delete)
+        stack.suspend()
+        stack.resume()
+
+        history = profiler.history(self.ctx, stack.id)
+        self.assertEqual(['RESUME', 'SUSPEND'],
+                         [op['action'] for op in history])
+        self.assertEqual([], profiler.history(self.ctx, 'other'))
+
+    def test_rollback(self):
+        tmpl = {'Resources': {
+                'AResource': {'Type': 'GenericResourceType'},
+                'BResource': {'Type': 'GenericResourceType',
+                              'DependsOn': 'AResource'}}}
+        stack = parser.Stack(self.ctx, 'timings_rollback',
+                             template.Template(tmpl), disable_rollback=False)
+        stack_id = stack.store()
+
+        handle_create = self.patchobject(generic_rsrc.GenericResource,
+                                         'handle_create')
+        handle_create.side_effect = [None, Exception('failed')]
+        stack.create()
+        self.assertEqual((stack.ROLLBACK, stack.COMPLETE), stack.state)
+
+        # The rollback is recorded as part of the create
+        history = profiler.history(self.ctx, stack_id)
+        self.assertEqual(['CREATE'], [op['action'] for op in history])
+        self.assertEqual('COMPLETE', history[0]['status'])
+        self.assertIn('handle_delete', history[0]['phases'])
+
+    def test_profile(self):
+        profile_dir = self.useFixture(fixtures.TempDir()).path
+        cfg.CONF.set_override('stack_profile_dir', profile_dir)
+
+        stack = self._create_stack('timings_profile')
+        self.addCleanup(stack.delete)
+
+        profiles = os.listdir(profile_dir)
+        self.assertEqual(1, len(profiles))
+        self.assertTrue(profiles[0].startswith('%s-create-' % stack.id))
+
+    def _create_concurrently(self, names):
+        # Switch green threads while creating each resource
+        handle_create = self.patchobject(generic_rsrc.GenericResource,
+                                         'handle_create')
+        handle_create.side_effect = lambda *args: eventlet.sleep(0)
+
+        stacks = [parser.Stack(self.ctx, name, template.Template(self.tmpl))
+                  for name in names]
+        for stack in stacks:
+            stack.store()
+            self.addCleanup(stack.delete)
+        threads = [eventlet.spawn(stack.create) for stack in stacks]
+        for thread in threads:
+            thread.wait()
+        return stacks
+
+    def test_concurrent(self):
+        stacks = self._create_concurrently(['timings_a', 'timings_b'])
+
+        for stack in stacks:
+            history = profiler.history(self.ctx, stack.id)
+            self.assertEqual(['CREATE'], [op['action'] for op in history])
+            self.assertEqual(2, history[0]['phases']['handle_create']['count'])
+        self.assertEqual({}, profiler._recording)
+
+    def test_profile_concurrent(self):
+        profile_dir = self.useFixture(fixtures.TempDir()).path
+        cfg.CONF.set_override('stack_profile_dir', profile_dir)
+
+        stacks = self._create_concurrently(['timings_profile_a',
+                                            'timings_profile_b'])
+
+        profiles = os.listdir(profile_dir)
+        self.assertEqual(sorted('%s-create-' % stack.id for stack in stacks),
+                         sorted(p[:len(stacks[0].id) + 8] for p in profiles))
+        self.assertEqual({}, profiler._profiles)
@@ -1006,6 +1006,87 @@ class PropertiesTest(testtools.TestCase):
         err = self.assertRaises(ValueError, props.get, 'foo')
         self.assertEqual('foo resolution failed!', str(err))
 
+    def _memoising_props(self, data, schema=None):
+        self.resolved = []
+        self.epoch = 0
+
+        def resolver(d):
+            self.resolved.append(d)
+            return d
+
+        if schema is None:
+            schema = {'foo': {'Type': 'Map'}}
+        return properties.Properties(schema, data, resolver,
+                                     epoch=lambda: self.epoch)
+
+    def test_memoise_static(self):
+        props = self._memoising_props({'foo': {'a': 'b'}})
+        self.assertEqual({'a': 'b'}, props['foo'])
+        self.assertEqual({'a': 'b'}, props['foo'])
+        self.epoch = 1
+        self.assertEqual({'a': 'b'}, props['foo'])
+        self.assertEqual(1, len(self.resolved))
+
+    def test_memoise_value_copied(self):
+        props = self._memoising_props({'foo': {'a': 'b'}})
+        props['foo']['a'] = 'c'
+        self.assertEqual({'a': 'b'}, props['foo'])
+
+    def test_memoise_data_modified(self):
+        data = {'foo': {'a': 'b'}}
+        props = self._memoising_props(data)
+        self.assertEqual({'a': 'b'}, props['foo'])
+        data['foo']['a'] = 'c'
+        self.assertEqual({'a': 'c'}, props['foo'])
+        self.assertEqual(2, len(self.resolved))
+
+    def test_memoise_data_replaced(self):
+        data = {'foo': {'a': 'b'}}
+        props = self._memoising_props(data)
+        self.assertEqual({'a': 'b'}, props['foo'])
+        data['foo'] = {'a': 'c'}
+        self.assertEqual({'a': 'c'}, props['foo'])
+        self.assertEqual(2, len(self.resolved))
+
+    def test_memoise_reference(self):
+        props = self._memoising_props({'foo': {'a': {'Ref': 'r'}}})
+        props['foo']
+        props['foo']
+        self.assertEqual(1, len(self.resolved))
+        self.epoch = 1
+        props['foo']
+        self.assertEqual(2, len(self.resolved))
+
+    def test_memoise_attribute(self):
+        props = self._memoising_props({'foo': {'a': {'Ref': 'r'},
+                                               'b': {'get_attr': ['r', 'x']}}})
+        props['foo']
+        props['foo']
+        self.assertEqual(2, len(self.resolved))
+
+    def test_no_memoise_without_epoch(self):
+        schema = {'foo': {'Type': 'String'}}
+        resolved = []
+
+        def resolver(d):
+            resolved.append(d)
+            return d
+
+        props = properties.Properties(schema, {'foo': 'bar'}, resolver)
+        props['foo']
+        props['foo']
+        self.assertEqual(2, len(resolved))
+
+    def test_runtime_dependency(self):
+        self.assertEqual(properties.STATIC,
+                         properties.runtime_dependency(['a', {'b': 'c'}]))
+        self.assertEqual(properties.REFERENCE,
+                         properties.runtime_dependency(
+                             {'Fn::Join': ['', ['a', {'Ref': 'r'}]]}))
+        self.assertEqual(properties.ATTRIBUTE,
+                         properties.runtime_dependency(
+                             [{'Ref': 'r'}, {'Fn::GetAtt': ['r', 'x']}]))
+
     def test_schema_from_params(self):
         params_snippet = {
             "DBUsername": {
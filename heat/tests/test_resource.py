@@ -21,11 +21,13 @@ import mock
 from heat.common import exception
 from heat.engine import dependencies
 from heat.engine import parser
+from heat.engine import properties
 from heat.engine import resource
 from heat.engine import scheduler
 from heat.engine import template
 from heat.engine import environment
 from heat.openstack.common.gettextutils import _
+from heat.rpc import changes
 import heat.db.api as db_api
 
 from heat.tests import generic_resource as generic_rsrc
@@ -63,6 +65,26 @@ class ResourceTest(HeatTestCase):
         self.assertIsInstance(res, generic_rsrc.GenericResource)
         self.assertEqual("INIT", res.action)
 
+    def test_properties_schemata_compiled_once(self):
+        schemata = generic_rsrc.ResourceWithProps.properties_schemata()
+        self.assertIsInstance(schemata['Foo'], properties.Schema)
+        self.assertIs(schemata,
+                      generic_rsrc.ResourceWithProps.properties_schemata())
+
+        snippet = {'Type': 'GenericResourceType', 'Properties': {'Foo': 'b'}}
+        res = generic_rsrc.ResourceWithProps('aresource', snippet, self.stack)
+        self.assertIs(schemata['Foo'], res.properties.props['Foo'].schema)
+
+    def test_properties_memoised_by_epoch(self):
+        snippet = {'Type': 'GenericResourceType',
+                   'Properties': {'Foo': {'Ref': 'aresource'}}}
+        res = generic_rsrc.ResourceWithProps('aresource', snippet, self.stack)
+        self.stack.resources['aresource'] = res
+        self.assertEqual('aresource', res.properties['Foo'])
+
+        res.resource_id_set('abc')
+        self.assertEqual('abc', res.properties['Foo'])
+
     def test_resource_new_stack_not_stored(self):
         snippet = {'Type': 'GenericResourceType'}
         self.stack.id = None
@@ -140,6 +162,111 @@ class ResourceTest(HeatTestCase):
         self.assertEqual((res.CREATE, res.COMPLETE), res.state)
         self.assertEqual('wibble', res.status_reason)
 
+    def _create_generic_resource(self):
+        tmpl = {'Type': 'Foo'}
+        res = generic_rsrc.GenericResource('test_resource', tmpl, self.stack)
+        scheduler.TaskRunner(res.create)()
+        self.assertEqual((res.CREATE, res.COMPLETE), res.state)
+        return res
+
+    def test_attributes_cached(self):
+        res = self._create_generic_resource()
+        resolve = self.patchobject(res, '_resolve_attribute')
+        resolve.return_value = 'bar'
+
+        self.assertEqual('bar', res.FnGetAtt('foo'))
+        self.assertEqual('bar', res.FnGetAtt('foo'))
+        resolve.assert_called_once_with('foo')
+
+        # The cache is persisted with the resource
+        loaded = generic_rsrc.GenericResource('test_resource', res.t,
+                                              self.stack)
+        self.patchobject(loaded, '_resolve_attribute')
+        self.assertEqual('bar', loaded.FnGetAtt('foo'))
+        self.assertFalse(loaded._resolve_attribute.called)
+
+    def test_attributes_not_cached_in_progress(self):
+        res = self._create_generic_resource()
+        res.state_set(res.UPDATE, res.IN_PROGRESS)
+        resolve = self.patchobject(res, '_resolve_attribute')
+        resolve.return_value = 'bar'
+
+        self.assertEqual('bar', res.FnGetAtt('foo'))
+        self.assertEqual('bar', res.FnGetAtt('foo'))
+        self.assertEqual(2, resolve.call_count)
+
+    def test_attributes_none_not_cached(self):
+        res = self._create_generic_resource()
+        resolve = self.patchobject(res, '_resolve_attribute')
+        resolve.return_value = None
+
+        self.assertIsNone(res.FnGetAtt('foo'))
+        self.assertIsNone(res.FnGetAtt('foo'))
+        self.assertEqual(2, resolve.call_count)
+
+    def test_volatile_attributes_not_cached(self):
+        res = self._create_generic_resource()
+        res.volatile_attributes = ('foo',)
+        resolve = self.patchobject(res, '_resolve_attribute')
+        resolve.return_value = 'bar'
+
+        self.assertEqual('bar', res.FnGetAtt('foo'))
+        self.assertEqual('bar', res.FnGetAtt('foo'))
+        self.assertEqual(2, resolve.call_count)
+
+    def test_attributes_invalidated(self):
+        res = self._create_generic_resource()
+        resolve = self.patchobject(res, '_resolve_attribute')
+
+        resolve.return_value = 'bar'
+        self.assertEqual('bar', res.FnGetAtt('foo'))
+
+        for value, change in (
+                ('baz', lambda: res.state_set(res.UPDATE, res.COMPLETE)),
+                ('qux', lambda: res.resource_id_set('abc')),
+                ('quux', res.invalidate_attributes)):
+            change()
+            resolve.return_value = value
+            self.assertEqual(value, res.FnGetAtt('foo'))
+            self.assertEqual(value, res.FnGetAtt('foo'))
+
+            loaded = generic_rsrc.GenericResource('test_resource', res.t,
+                                                  self.stack)
+            self.assertEqual({'foo': value}, loaded._attribute_values)
+
+        self.assertEqual(4, resolve.call_count)
+
+    def test_attributes_invalidated_uncached(self):
+        res = self._create_generic_resource()
+        self.m.StubOutWithMock(db_api, 'resource_attribute_values_clear')
+        self.m.ReplayAll()
+
+        res.invalidate_attributes()
+        self.m.VerifyAll()
+
+    def test_attributes_invalidated_once(self):
+        res = self._create_generic_resource()
+        self.patchobject(res, '_resolve_attribute').return_value = 'bar'
+        self.assertEqual('bar', res.FnGetAtt('foo'))
+
+        self.m.StubOutWithMock(db_api, 'resource_attribute_values_clear')
+        db_api.resource_attribute_values_clear(res.context, res.id)
+        self.m.ReplayAll()
+
+        res.invalidate_attributes()
+        res.invalidate_attributes()
+        self.m.VerifyAll()
+
+    def test_derived_volatile_attributes_not_cached(self):
+        res = self._create_generic_resource()
+        self.patchobject(res, 'attribute_volatile').return_value = True
+        resolve = self.patchobject(res, '_resolve_attribute')
+        resolve.return_value = 'bar'
+
+        self.assertEqual('bar', res.FnGetAtt('foo'))
+        self.assertEqual('bar', res.FnGetAtt('foo'))
+        self.assertEqual(2, resolve.call_count)
+
     def test_set_deletion_policy(self):
         tmpl = {'Type': 'Foo'}
         res = generic_rsrc.GenericResource('test_resource', tmpl, self.stack)
@@ -261,6 +388,17 @@ class ResourceTest(HeatTestCase):
         res = generic_rsrc.GenericResource('test_resource', tmpl, self.stack)
         self.assertEqual({}, res.metadata)
 
+    def test_metadata_set_notifies(self):
+        tmpl = {'Type': 'Foo'}
+        res = generic_rsrc.GenericResource('test_resource', tmpl, self.stack)
+        res._store()
+        notify = self.patchobject(changes.ChangeNotifier,
+                                  'resource_metadata_changed')
+        res.metadata = {'foo': 'bar'}
+        self.assertEqual({'foo': 'bar'}, res.metadata)
+        notify.assert_called_once_with(self.stack.context, self.stack.id,
+                                       'test_resource')
+
     def test_equals_different_stacks(self):
         tmpl1 = {'Type': 'Foo'}
         tmpl2 = {'Type': 'Foo'}
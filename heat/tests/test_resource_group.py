@@ -15,6 +15,8 @@
 
 import copy
 
+import mock
+
 from heat.common import exception
 from heat.engine import resource
 from heat.engine import scheduler
@@ -78,6 +80,8 @@ class ResourceGroupTest(common.HeatTestCase):
         common.HeatTestCase.setUp(self)
         resource._register_class("dummy.resource",
                                  ResourceWithPropsAndId)
+        resource._register_class("dummy.plain",
+                                 generic_resource.ResourceWithProps)
         utils.setup_dummy_db()
 
     def test_assemble_nested(self):
@@ -202,8 +206,57 @@ class ResourceGroupTest(common.HeatTestCase):
         self.assertRaises(exception.InvalidTemplateAttribute, resg.FnGetAtt,
                           'resource.2')
 
-    def _create_dummy_stack(self):
-        stack = utils.parse_stack(template)
+    @utils.stack_delete_after
+    def test_aggregate_refs_stored(self):
+        """
+        Test resource id aggregation from the stored resources, without
+        loading the nested stack.
+        """
+        tmpl = copy.deepcopy(template)
+        tmpl['resources']['group1']['properties']['resource_def']['type'] = (
+            'dummy.plain')
+        resg = self._create_dummy_stack(tmpl)
+        self.stack['0'].resource_id_set('phys-0')
+        resg._nested = None
+
+        with mock.patch.object(resource_group.ResourceGroup, 'nested',
+                               autospec=True) as nested:
+            self.assertEqual(['phys-0', '1'], resg.FnGetAtt('refs'))
+            self.assertEqual('phys-0', resg.FnGetAtt('resource.0'))
+        self.assertFalse(nested.called)
+
+    @utils.stack_delete_after
+    def test_aggregate_attribs_stored(self):
+        """
+        Test attribute aggregation from cached attribute values, loading the
+        nested stack only for those that are not cached.
+        """
+        resg = self._create_dummy_stack()
+        self.assertEqual('1', resg.FnGetAtt('resource.1.foo'))
+        resg._nested = None
+
+        with mock.patch.object(resource_group.ResourceGroup, 'nested',
+                               autospec=True,
+                               side_effect=resource_group.ResourceGroup.nested
+                               ) as nested:
+            self.assertEqual('1', resg.FnGetAtt('resource.1.foo'))
+            self.assertFalse(nested.called)
+            self.assertEqual(['0', '1'], resg.FnGetAtt('foo'))
+            self.assertTrue(nested.called)
+            self.assertEqual(['ID-0', 'ID-1'], resg.FnGetAtt('refs'))
+
+    def test_attribute_volatile(self):
+        resg = self._create_dummy_stack()
+        with mock.patch.object(ResourceWithPropsAndId, 'volatile_attributes',
+                               ('foo',)):
+            self.assertTrue(resg.attribute_volatile('foo'))
+            self.assertTrue(resg.attribute_volatile('resource.1.foo'))
+            self.assertFalse(resg.attribute_volatile('Foo'))
+            self.assertFalse(resg.attribute_volatile('refs'))
+            self.assertFalse(resg.attribute_volatile('resource.1'))
+
+    def _create_dummy_stack(self, template_data=template):
+        stack = utils.parse_stack(template_data)
         snip = stack.t['Resources']['group1']
         resg = resource_group.ResourceGroup('test', snip, stack)
         scheduler.TaskRunner(resg.create)()
@@ -118,6 +118,10 @@ class EngineRpcAPITestCase(testtools.TestCase):
         self._test_engine_api('get_template', 'call',
                               stack_identity=self.identity)
 
+    def test_get_stack_timings(self):
+        self._test_engine_api('get_stack_timings', 'call',
+                              stack_identity=self.identity, version='1.2')
+
     def test_delete_stack_cast(self):
         self._test_engine_api('delete_stack', 'cast',
                               stack_identity=self.identity)
@@ -134,6 +138,10 @@ class EngineRpcAPITestCase(testtools.TestCase):
         self._test_engine_api('list_resource_types', 'call',
                               support_status=None, version='1.1')
 
+    def test_resource_registry_version(self):
+        self._test_engine_api('resource_registry_version', 'call',
+                              version='1.5')
+
     def test_resource_schema(self):
         self._test_engine_api('resource_schema', 'call', type_name="TYPE")
 
@@ -147,7 +155,8 @@ class EngineRpcAPITestCase(testtools.TestCase):
     def test_describe_stack_resource(self):
         self._test_engine_api('describe_stack_resource', 'call',
                               stack_identity=self.identity,
-                              resource_name='LogicalResourceId')
+                              resource_name='LogicalResourceId',
+                              etag=None, version='1.3')
 
     def test_find_physical_resource(self):
         self._test_engine_api('find_physical_resource', 'call',
@@ -218,9 +227,10 @@ class EngineRpcAPITestCase(testtools.TestCase):
 
     def test_list_software_deployments(self):
         self._test_engine_api('list_software_deployments', 'call',
-                              server_id=None)
+                              server_id=None, etag=None, version='1.3')
         self._test_engine_api('list_software_deployments', 'call',
-                              server_id='9dc13236-d342-451f-a885-1c82420ba5ed')
+                              server_id='9dc13236-d342-451f-a885-1c82420ba5ed',
+                              etag='abc123', version='1.3')
 
     def test_show_software_deployment(self):
         deployment_id = '86729f02-4648-44d8-af44-d0ec65b6abc9'
@@ -237,6 +247,12 @@ class EngineRpcAPITestCase(testtools.TestCase):
                               status='COMPLETE',
                               status_reason=None)
 
+    def test_create_software_deployments(self):
+        deployments = [{'server_id': '9f1f0e00-05d2-4ca5-8602-95021f19c9d0',
+                        'config_id': '48e8ade1-9196-42d5-89a2-f709fde42632'}]
+        self._test_engine_api('create_software_deployments', 'call',
+                              deployments=deployments, version='1.4')
+
     def test_update_software_deployment(self):
         deployment_id = '86729f02-4648-44d8-af44-d0ec65b6abc9'
         self._test_engine_api('update_software_deployment', 'call',
@@ -248,6 +264,12 @@ class EngineRpcAPITestCase(testtools.TestCase):
                               status='COMPLETE',
                               status_reason=None)
 
+    def test_update_software_deployments(self):
+        deployments = [{'id': '86729f02-4648-44d8-af44-d0ec65b6abc9',
+                        'status': 'COMPLETE'}]
+        self._test_engine_api('update_software_deployments', 'call',
+                              deployments=deployments, version='1.4')
+
     def test_delete_software_deployment(self):
         deployment_id = '86729f02-4648-44d8-af44-d0ec65b6abc9'
         self._test_engine_api('delete_software_deployment', 'call',
@@ -713,6 +713,44 @@ class DescriptionTest(HeatTestCase):
 
         self.assertEqual('o', scheduler.task_description(C()))
 
+    def test_runner_name_on_demand(self):
+        class C(object):
+            descriptions = 0
+
+            def __repr__(self):
+                C.descriptions += 1
+                return 'o'
+
+            def __call__(self):
+                pass
+
+        runner = scheduler.TaskRunner(C())
+        self.assertEqual(0, C.descriptions)
+        self.assertEqual('Task o', str(runner))
+        self.assertEqual('Task o', str(runner))
+        self.assertEqual(1, C.descriptions)
+
+    def test_dependency_group_name_on_demand(self):
+        class Deps(dependencies.Dependencies):
+            descriptions = 0
+
+            def __str__(self):
+                Deps.descriptions += 1
+                return 'deps'
+
+        def task(o):
+            pass
+
+        tg = scheduler.DependencyTaskGroup(Deps([('a', None)]), task)
+        self.assertEqual(0, Deps.descriptions)
+        self.assertEqual('DependencyTaskGroup((task) deps)', repr(tg))
+        self.assertEqual(1, Deps.descriptions)
+
+        named = scheduler.DependencyTaskGroup(Deps([('a', None)]), task,
+                                              name='named')
+        self.assertEqual('DependencyTaskGroup(named)', repr(named))
+        self.assertEqual(1, Deps.descriptions)
+
 
 class WrapperTaskTest(HeatTestCase):
 
@@ -687,6 +687,14 @@ class SqlAlchemyTest(HeatTestCase):
         self.assertIsNotNone(deployment)
         self.assertEqual(values['tenant'], deployment.tenant)
 
+    def test_software_deployment_create_all(self):
+        values_list = [self._deployment_values() for i in range(3)]
+        deployments = db_api.software_deployment_create_all(self.ctx,
+                                                            values_list)
+        self.assertEqual([v['server_id'] for v in values_list],
+                         [d.server_id for d in deployments])
+        self.assertEqual(3, len(db_api.software_deployment_get_all(self.ctx)))
+
     def test_software_deployment_get(self):
         self.assertIsNone(
             db_api.software_deployment_get(self.ctx, str(uuid.uuid4())))
@@ -735,6 +743,30 @@ class SqlAlchemyTest(HeatTestCase):
         self.assertIsNotNone(deployment)
         self.assertEqual(values['status'], deployment.status)
 
+    def test_software_deployment_update_all(self):
+        deployments = db_api.software_deployment_create_all(
+            self.ctx, [self._deployment_values() for i in range(2)])
+        values_by_id = dict((d.id, {'status': 'COMPLETED'})
+                            for d in deployments)
+        deployments = db_api.software_deployment_update_all(self.ctx,
+                                                            values_by_id)
+        self.assertEqual(set(values_by_id), set(d.id for d in deployments))
+        for deployment in deployments:
+            self.assertEqual('COMPLETED', deployment.status)
+
+        # Nothing is updated if any of the deployments does not exist
+        missing_id = str(uuid.uuid4())
+        values_by_id = dict((d.id, {'status': 'FAILED'}) for d in deployments)
+        values_by_id[missing_id] = {'status': 'FAILED'}
+        err = self.assertRaises(exception.NotFound,
+                                db_api.software_deployment_update_all,
+                                self.ctx, values_by_id)
+        self.assertIn(missing_id, str(err))
+        for deployment in deployments:
+            deployment = db_api.software_deployment_get(self.ctx,
+                                                        deployment.id)
+            self.assertEqual('COMPLETED', deployment.status)
+
     def test_software_deployment_delete(self):
         deployment_id = str(uuid.uuid4())
         err = self.assertRaises(exception.NotFound,
@@ -866,6 +898,18 @@ class DBAPIRawTemplateTest(HeatTestCase):
         self.assertEqual(tp.id, template.id)
         self.assertEqual(tp.template, template.template)
 
+    def test_raw_template_update(self):
+        t = template_format.parse(wp_template)
+        tp = create_raw_template(self.ctx, template=t)
+        deps = {'key': 'abc', 'edges': [['WebServer', None]]}
+        db_api.raw_template_update(self.ctx, tp.id, {'dependencies': deps})
+        template = db_api.raw_template_get(self.ctx, tp.id)
+        self.assertEqual(deps, template.dependencies)
+        self.assertEqual(t, template.template)
+
+        self.assertRaises(exception.NotFound, db_api.raw_template_update,
+                          self.ctx, tp.id + 1, {'dependencies': deps})
+
 
 class DBAPIUserCredsTest(HeatTestCase):
     def setUp(self):
@@ -969,6 +1013,34 @@ class DBAPIStackTest(HeatTestCase):
         self.assertRaises(exception.NotFound, db_api.stack_update, self.ctx,
                           UUID2, values)
 
+    def test_stack_output_values_set(self):
+        stack = create_stack(self.ctx, self.template, self.user_creds)
+        self.assertIsNone(stack.output_values)
+        updated_at = stack.updated_at
+
+        db_api.stack_output_values_set(self.ctx, stack.id, {'foo': 'bar'})
+        stack = db_api.stack_get(self.ctx, stack.id)
+        self.assertEqual({'foo': 'bar'}, stack.output_values)
+        self.assertEqual(updated_at, stack.updated_at)
+
+        db_api.stack_output_values_set(self.ctx, stack.id, None)
+        stack = db_api.stack_get(self.ctx, stack.id)
+        self.assertIsNone(stack.output_values)
+
+    def test_stack_output_values_clear(self):
+        stack = create_stack(self.ctx, self.template, self.user_creds)
+        updated_at = stack.updated_at
+
+        db_api.stack_output_values_set(self.ctx, stack.id, {'foo': 'bar'})
+        db_api.stack_output_values_clear(self.ctx, stack.id)
+        stack = db_api.stack_get(self.ctx, stack.id)
+        self.assertIsNone(stack.output_values)
+        self.assertEqual(updated_at, stack.updated_at)
+
+        db_api.stack_output_values_clear(self.ctx, stack.id)
+        stack = db_api.stack_get(self.ctx, stack.id)
+        self.assertIsNone(stack.output_values)
+
     def test_stack_get_returns_a_stack(self):
         stack = create_stack(self.ctx, self.template, self.user_creds)
         ret_stack = db_api.stack_get(self.ctx, stack.id, show_deleted=False)
@@ -1103,6 +1175,25 @@ class DBAPIStackTest(HeatTestCase):
         self._deleted_stack_existance(utils.dummy_context(), stacks,
                                       (), (0, 1, 2, 3, 4))
 
+    def test_purge_deleted_timings(self):
+        now = datetime.now()
+        deleted = [now - timedelta(days=2), now]
+        stacks = [create_stack(self.ctx, create_raw_template(self.ctx),
+                               create_user_creds(self.ctx),
+                               deleted_at=deleted[i]) for i in range(2)]
+        for s in stacks:
+            db_api.stack_timing_create(self.ctx, {'stack_id': s.id,
+                                                  'action': 'CREATE',
+                                                  'status': 'COMPLETE'})
+
+        db_api.purge_deleted(age=1, granularity='days')
+        ctx = utils.dummy_context()
+        self._deleted_stack_existance(ctx, stacks, (1,), (0,))
+        self.assertEqual([], db_api.stack_timing_get_all_by_stack(
+            ctx, stacks[0].id))
+        self.assertEqual(1, len(db_api.stack_timing_get_all_by_stack(
+            ctx, stacks[1].id)))
+
     def _deleted_stack_existance(self, ctx, stacks, existing, deleted):
         for s in existing:
             self.assertIsNotNone(db_api.stack_get(ctx, stacks[s].id,
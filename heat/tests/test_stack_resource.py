@@ -13,6 +13,8 @@
 #    under the License.
 
 import uuid
+
+import mock
 import mox
 
 from heat.common import template_format
@@ -226,6 +228,33 @@ class StackResourceTest(HeatTestCase):
             self.parent_stack.context, self.stack.id)
         self.assertEqual(self.parent_stack.id, saved_stack.owner_id)
 
+    @utils.stack_delete_after
+    def test_update_with_template_validates_changed(self):
+        """
+        Only resources whose definitions are new or changed are validated
+        when updating a stack with a template.
+        """
+        create_result = self.parent_resource.create_with_template(
+            self.simple_template, {})
+        while not create_result.step():
+            pass
+        self.stack = self.parent_resource.nested()
+
+        new_templ = self.simple_template.copy()
+        new_templ["Resources"] = {
+            "WebServer": self.stack["WebServer"].t,
+            "WebServer2": {"Type": "GenericResource", "Properties": {}},
+        }
+        with mock.patch.object(generic_rsrc.GenericResource, 'validate',
+                               autospec=True) as validate:
+            validate.return_value = None
+            updater = self.parent_resource.update_with_template(
+                new_templ, {})
+        self.assertEqual(['WebServer2'],
+                         [c[0][0].name for c in validate.call_args_list])
+        updater.run_to_completion()
+        self.assertEqual(('UPDATE', 'COMPLETE'), self.stack.state)
+
     @utils.stack_delete_after
     def test_update_with_template_state_err(self):
         """
@@ -667,6 +667,23 @@ class validateTest(HeatTestCase):
         res = dict(engine.validate_template(None, t))
         self.assertEqual({'Error': 'Unknown Property UnknownProperty'}, res)
 
+    def test_validate_properties_all_errors(self):
+        t = template_format.parse(test_template_invalid_property)
+        t['Resources']['WebServer'] = {
+            'Type': 'AWS::EC2::Instance',
+            'Properties': {'ImageId': 'image_name',
+                           'InstanceType': 'm1.large',
+                           'OtherProperty': 'unknown'}}
+        self.m.StubOutWithMock(service.EngineListener, 'start')
+        service.EngineListener.start().AndReturn(None)
+        self.m.ReplayAll()
+
+        engine = service.EngineService('a', 't')
+        res = dict(engine.validate_template(None, t))
+        self.assertEqual(['Unknown Property OtherProperty',
+                          'Unknown Property UnknownProperty'],
+                         sorted(res['Error'].splitlines()))
+
     def test_invalid_resources(self):
         t = template_format.parse(test_template_invalid_resources)
         self.m.StubOutWithMock(instances.Instance, 'nova')
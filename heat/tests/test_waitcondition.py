@@ -483,6 +483,18 @@ class WaitConditionHandleTest(HeatTestCase):
         self.assertEqual(handle_metadata, rsrc.metadata)
         self.m.VerifyAll()
 
+    @utils.stack_delete_after
+    def test_metadata_update_invalidates(self):
+        self.stack = self.create_stack()
+        rsrc = self.stack['WaitHandle']
+        invalidate = self.patchobject(rsrc, 'invalidate_attributes')
+
+        test_metadata = {'Data': 'foo', 'Reason': 'bar',
+                         'Status': 'SUCCESS', 'UniqueId': '123'}
+        rsrc.metadata_update(new_metadata=test_metadata)
+        invalidate.assert_called_once_with()
+        self.m.VerifyAll()
+
     @utils.stack_delete_after
     def test_metadata_update_invalid(self):
         self.stack = self.create_stack()
@@ -22,6 +22,7 @@ from oslo.config import cfg
 import stubout
 import webob
 
+from heat.api.aws import exception as aws_exception
 from heat.common import exception
 from heat.common import wsgi
 from heat.tests.common import HeatTestCase
@@ -102,6 +103,13 @@ class RequestTest(HeatTestCase):
         request.headers.pop('Accept-Language')
         self.assertIsNone(request.best_match_language())
 
+    def test_if_none_match_etag(self):
+        request = wsgi.Request.blank('/')
+        self.assertIsNone(request.if_none_match_etag())
+
+        request.headers['If-None-Match'] = '"abc123"'
+        self.assertEqual('abc123', request.if_none_match_etag())
+
 
 class ResourceTest(HeatTestCase):
 
@@ -225,6 +233,52 @@ class ResourceTest(HeatTestCase):
         self.assertEqual(message_es, str(e.exc))
         self.m.VerifyAll()
 
+    def test_resource_call_response_headers(self):
+        class Controller(object):
+            def show(self, req):
+                req.add_response_header('ETag', '"abc123"')
+                return {'foo': 'bar'}
+
+        actions = {'action': 'show'}
+        env = {'wsgiorg.routing_args': [None, actions]}
+        request = wsgi.Request.blank('/tests/123', environ=env)
+        resource = wsgi.Resource(Controller(),
+                                 wsgi.JSONRequestDeserializer(),
+                                 wsgi.JSONResponseSerializer())
+
+        response = request.get_response(resource)
+        self.assertEqual('"abc123"', response.headers['ETag'])
+        self.assertEqual({'foo': 'bar'}, json.loads(response.body))
+
+    def _aws_error_response(self, url):
+        class Controller(object):
+            def index(self, req):
+                return aws_exception.HeatInvalidParameterValueError(
+                    detail='bad value')
+
+        actions = {'action': 'index'}
+        env = {'wsgiorg.routing_args': [None, actions]}
+        request = wsgi.Request.blank(url, environ=env)
+        resource = wsgi.Resource(Controller(),
+                                 wsgi.JSONRequestDeserializer(),
+                                 None)
+        return request.get_response(resource)
+
+    def test_resource_call_error_response_xml(self):
+        response = self._aws_error_response('/tests')
+        self.assertEqual(400, response.status_int)
+        self.assertEqual('application/xml', response.content_type)
+        self.assertIn('<Code>InvalidParameterValue</Code>', response.body)
+        self.assertIn('bad value', response.body)
+
+    def test_resource_call_error_response_json(self):
+        response = self._aws_error_response('/tests?ContentType=JSON')
+        self.assertEqual(400, response.status_int)
+        self.assertEqual('application/json', response.content_type)
+        error = json.loads(response.body)['ErrorResponse']['Error']
+        self.assertEqual('InvalidParameterValue', error['Code'])
+        self.assertIn('bad value', error['Message'])
+
 
 class ResourceExceptionHandlingTest(HeatTestCase):
     scenarios = [
@@ -290,6 +344,67 @@ class JSONResponseSerializerTest(HeatTestCase):
         self.assertEqual('application/json', response.content_type)
         self.assertEqual('{"key": "value"}', response.body)
 
+    def test_to_json_iter(self):
+        fixture = {"stacks": [{"id": i,
+                               "created": datetime.datetime(2014, 1, 1, i),
+                               "tags": ("a", "b")} for i in range(10)],
+                   "nested": {"empty": [], "ints": {1: "one"}},
+                   "scalar": None}
+        serializer = wsgi.JSONResponseSerializer()
+        self.assertEqual(serializer.to_json(fixture),
+                         ''.join(serializer.to_json_iter(fixture)))
+        for data in ([], {}, "value", [1, [2, 3]]):
+            self.assertEqual(serializer.to_json(data),
+                             ''.join(serializer.to_json_iter(data)))
+
+    def test_default_lazy(self):
+        fixture = {"stacks": [{"id": i} for i in range(10)]}
+        serializer = wsgi.JSONResponseSerializer()
+        chunks = ['{"stacks": ', '[]', '}']
+        generated = []
+
+        def to_json_iter(data):
+            for chunk in chunks:
+                generated.append(chunk)
+                yield chunk
+
+        self.patchobject(serializer, 'to_json_iter').side_effect = to_json_iter
+        response = webob.Response()
+        serializer.default(response, fixture)
+        self.assertEqual(chunks[:1], generated)
+        self.assertIsNone(response.content_length)
+        self.assertEqual(''.join(chunks), response.body)
+        self.assertEqual(chunks, generated)
+
+    def test_chunked(self):
+        self.assertEqual(['abcd', 'efg', 'h'],
+                         list(wsgi._chunked(['a', 'bcd', 'efg', 'h'], 3)))
+        self.assertEqual([], list(wsgi._chunked([], 3)))
+
+
+class XMLResponseSerializerTest(HeatTestCase):
+
+    fixture = {'DescribeStacksResponse': {'DescribeStacksResult': {
+        'Stacks': [{'StackName': 'stack%d' % i,
+                    'Outputs': [],
+                    'Parameters': [{'ParameterKey': 'Key',
+                                    'ParameterValue': 'a < b & c'}],
+                    'Metadata': {'foo': 'bar'}} for i in range(3)],
+        'Empty': {},
+        'TemplateBody': {'Resources': {}}}}}
+
+    def test_to_xml_iter(self):
+        serializer = wsgi.XMLResponseSerializer()
+        self.assertEqual(serializer.to_xml(self.fixture),
+                         ''.join(serializer.to_xml_iter(self.fixture)))
+
+    def test_default(self):
+        response = webob.Response()
+        wsgi.XMLResponseSerializer().default(response, self.fixture)
+        self.assertEqual('application/xml', response.content_type)
+        self.assertEqual(wsgi.XMLResponseSerializer().to_xml(self.fixture),
+                         response.body)
+
 
 class JSONRequestDeserializerTest(HeatTestCase):
 
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark building CloudInit user data for a large number of servers.
+
+Builds a stack of (by default) 1,000 servers, each with its own metadata
+and user data, and times nova_utils.build_userdata() for all of them.
+
+Usage: build_userdata.py [num_resources] [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+from oslo.config import cfg
+
+from heat.common import context
+from heat.engine import parser
+from heat.engine import resource
+from heat.engine.resources import nova_utils
+from heat.engine import template
+from heat.openstack.common import gettextutils
+
+gettextutils.install('heat')
+
+
+class BenchmarkServer(resource.Resource):
+    properties_schema = {}
+
+
+def make_template(num_resources):
+    resources = dict(('server%d' % n,
+                      {'Type': 'Benchmark::Server',
+                       'Metadata': {'AWS::CloudFormation::Init': {
+                           'config': {'files': {'/etc/index': {
+                               'content': str(n)}}}}}})
+                     for n in range(num_resources))
+    return template.Template({'HeatTemplateFormatVersion': '2012-12-12',
+                              'Resources': resources})
+
+
+def main(num_resources=1000, iterations=5):
+    config_dir = os.path.join(os.path.dirname(__file__),
+                              os.pardir, os.pardir, 'etc', 'heat')
+    cfg.CONF(args=['--config-dir', config_dir], project='heat',
+             default_config_files=[])
+    resource._register_class('Benchmark::Server', BenchmarkServer)
+    ctx = context.RequestContext(tenant_id='benchmark', username='benchmark')
+
+    stack = parser.Stack(ctx, 'benchmark', make_template(num_resources))
+    servers = [(res, '#!/bin/sh\necho %s\n' % res.name)
+               for res in stack.itervalues()]
+    for res, userdata in servers:
+        # Resolve the metadata up front, so that only building is timed
+        res.metadata
+
+    def build():
+        for res, userdata in servers:
+            nova_utils.build_userdata(res, userdata, instance_user='ec2-user')
+
+    best = min(timeit.repeat(build, number=1, repeat=iterations))
+    print('%-10s %4d resources: %8.3f ms' %
+          ('build', num_resources, best * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
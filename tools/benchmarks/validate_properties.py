@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark resource property validation for a large template.
+
+Builds a stack of (by default) 1,000 resources whose properties carry
+AllowedValues, AllowedPattern, Range and Length constraints, then times
+Stack.validate() and repeated property access of every resource.
+
+Usage: validate_properties.py [num_resources] [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+from oslo.config import cfg
+
+from heat.common import context
+from heat.engine import parser
+from heat.engine import resource
+from heat.engine import template
+from heat.openstack.common import gettextutils
+
+gettextutils.install('heat')
+
+
+class BenchmarkResource(resource.Resource):
+    properties_schema = {
+        'Name': {'Type': 'String',
+                 'AllowedPattern': '[a-zA-Z][a-zA-Z0-9_.-]*',
+                 'MinLength': 1, 'MaxLength': 64},
+        'Flavor': {'Type': 'String',
+                   'AllowedValues': ['m1.tiny', 'm1.small', 'm1.medium',
+                                     'm1.large', 'm1.xlarge']},
+        'Count': {'Type': 'Integer', 'MinValue': 1, 'MaxValue': 100},
+        'Enabled': {'Type': 'Boolean'},
+        'Tags': {'Type': 'List',
+                 'Schema': {'Type': 'Map',
+                            'Schema': {'Key': {'Type': 'String',
+                                               'Required': True},
+                                       'Value': {'Type': 'String',
+                                                 'Required': True}}}},
+    }
+
+
+def make_template(num_resources):
+    def properties(n):
+        return {
+            'Name': 'resource_%d' % n,
+            'Flavor': 'm1.small',
+            'Count': str(n % 100 + 1),
+            'Enabled': 'true',
+            'Tags': [{'Key': 'index', 'Value': str(n)},
+                     {'Key': 'group', 'Value': 'benchmark'}],
+        }
+
+    resources = dict(('r%d' % n, {'Type': 'Benchmark::Resource',
+                                  'Properties': properties(n)})
+                     for n in range(num_resources))
+    return template.Template({'HeatTemplateFormatVersion': '2012-12-12',
+                              'Resources': resources})
+
+
+def main(num_resources=1000, iterations=5):
+    config_dir = os.path.join(os.path.dirname(__file__),
+                              os.pardir, os.pardir, 'etc', 'heat')
+    cfg.CONF(args=['--config-dir', config_dir], project='heat',
+             default_config_files=[])
+    resource._register_class('Benchmark::Resource', BenchmarkResource)
+    ctx = context.RequestContext(tenant_id='benchmark', username='benchmark')
+
+    def load():
+        return parser.Stack(ctx, 'benchmark', make_template(num_resources))
+
+    def validate():
+        load().validate()
+
+    stack = load()
+    stack.validate()
+
+    def access():
+        for res in stack.itervalues():
+            for key in res.properties:
+                res.properties[key]
+
+    for name, func in (('construct', lambda: load().resources),
+                       ('validate', validate),
+                       ('access', access)):
+        best = min(timeit.repeat(func, number=1, repeat=iterations))
+        print('%-10s %4d resources: %8.3f ms' %
+              (name, num_resources, best * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])